@@ -15,7 +15,12 @@ import home_page
 from serial_funcs import *
 import manual_control
 import programs_page
+import diagnostics_page
 import thread_manager
+import control_server
+import watchdog
+import telemetry_replay
+import telemetry_shared_memory
 
 # Constants
 ## Base width of the App window
@@ -30,6 +35,9 @@ INDEX_HOME = 0
 ## Index to access the programs page in the list of frames
 INDEX_PROGRAMS = 1
 
+## Index to access the diagnostics page in the list of frames
+INDEX_DIAGNOSTICS = 2
+
 ## Available COM ports combobox width
 CBBOX_WIDTH = 175
 
@@ -90,6 +98,9 @@ def combobox_com_ports_generate(frame, strvar_com_port_placeholder):
     else:
         list_com_ports += ["No COM Port detected"]
 
+    # Archived runs can be replayed in place of the microcontroler
+    list_com_ports += telemetry_replay.list_replay_ports()
+
     combobox = customtkinter.CTkComboBox(
                                         master      = frame,
                                         width       = CBBOX_WIDTH,
@@ -110,14 +121,19 @@ def button_com_ports_click(combobox_com_port, thread_services, connected_device_
     @param combobox_com_port        StringVar containing the current COM port selected
     @param connected_device_object  Connected device object to send and receive data
     """
-    connected_device_object[INDEX_STM32] = connect_to_port(combobox_com_port)
+    # Only one reader at a time: release the previous connection before opening a new one
+    thread_services.stop_serial_read_thread(connected_device_object)
+
+    if (combobox_com_port.startswith(telemetry_replay.REPLAY_PORT_PREFIX) == True):
+        connected_device_object[INDEX_STM32] = telemetry_replay.open_replay_port(combobox_com_port)
+    else:
+        connected_device_object[INDEX_STM32] = connect_to_port(combobox_com_port)
     
     if (connected_device_object[INDEX_STM32] != None):
         print("COM port connected: ", combobox_com_port)
         print("Starting to read data")
 
-        thread_rx_data = Thread(target = read_rx_buffer, args = (thread_services.serial_buffer_read_thread_event, connected_device_object, ))
-        thread_rx_data.start()
+        thread_services.start_serial_read_thread(connected_device_object)
     else:
         print("COM port unavailable")
 
@@ -129,10 +145,10 @@ class App(customtkinter.CTk):
     Is the main application base on which all the other frames exist
     """
     ## All frames to be shown - This list's purpose is to simplify index accessing
-    list_frames = ["Home", "Programs"]
+    list_frames = ["Home", "Programs", "Diagnostics"]
 
     ## Frame dictionnary associating a page name with its related frame
-    dict_frames = {"Home" : None, "Programs" : None}
+    dict_frames = {"Home" : None, "Programs" : None, "Diagnostics" : None}
 
     ## List of buttons to select the frames - Initially empty (fills up when creating the buttons)
     list_btn_selector = []
@@ -156,6 +172,11 @@ class App(customtkinter.CTk):
                                                                                                 thread_services = thread_services,
                                                                                                 connected_device = connected_device_object,
                                                                                                 fg_color="#1a1822")
+        self.dict_frames[self.list_frames[INDEX_DIAGNOSTICS]] = diagnostics_page.DiagnosticsPageFrame(
+                                                                                                        master = self,
+                                                                                                        thread_services = thread_services,
+                                                                                                        connected_device = connected_device_object,
+                                                                                                        fg_color="#1a1822")
 
         # Populate the left side frame and link the correct frame to initialize with the correct button
         for i in range(len(self.dict_frames)):
@@ -244,7 +265,32 @@ if __name__ == "__main__":
     thread_services = thread_manager.ThreadManager()
 
     app_window = App("Zimmer Test Bench", thread_services)
+
+    # Compress the finished runs of the archive in the background
+    thread_services.start_archive_compaction_thread()
+
+    # Record the results of the runs in the background
+    thread_services.start_results_writer_thread()
+
+    # Give external tools access to the bench, on the address and with the token set in the profile of the bench
+    control_server_host, control_server_port, control_server_token = control_server.load_control_server_address()
+    control_services = control_server.ControlServer(thread_services, connected_device, control_server_host, control_server_port, control_server_token)
+    control_services.start()
+
+    # Publish the received frames to the other processes of the bench
+    telemetry_publisher = telemetry_shared_memory.TelemetryPublisher()
+    telemetry_publisher.start()
+
+    # Report the callbacks blocking the main loop
+    mainloop_watchdog = watchdog.MainloopWatchdog(app_window)
+    mainloop_watchdog.start()
+
     app_window.mainloop()
 
     # Closing procedure in case of exit of mainloop
-    thread_services.close_all_threads()
\ No newline at end of file
+    mainloop_watchdog.stop()
+    control_services.stop()
+    thread_services.close_all_threads()
+
+    # The shared memory is released once the serial reading thread cannot publish anymore
+    telemetry_publisher.stop()
\ No newline at end of file
@@ -0,0 +1,295 @@
+##
+# @file
+# archive_compaction.py
+#
+# @brief
+# Compressed tier of the run archive for long campaigns. \n
+# Finished runs are delta, zigzag and varint encoded, then compressed, and min/max/mean pyramids of the position of every encoder are built at 1 s, 1 min and 1 h to read zoomed-out views without decoding the frames.
+
+# Imports
+import json
+import os
+import zlib
+
+import numpy
+
+from serial_funcs import LIST_ENCODER_IDS
+from run_archive import RunArchive, list_archived_runs, get_column_path, DICT_ARCHIVE_COLUMNS, ARCHIVE_HEADER_FILE
+
+# Constants
+## Name of the description file of a compacted run
+COMPACT_HEADER_FILE = 'compact.json'
+
+## Scale applied to the timestamps before encoding them as integers - Timestamps are kept to the microsecond
+TIMESTAMP_SCALE = 1000000
+
+## Compression level of the encoded columns
+COMPACT_COMPRESSION_LEVEL = 6
+
+## Periods (s) of the pyramid levels, from the finest to the coarsest
+LIST_PYRAMID_PERIODS = [1, 60, 3600]
+
+## Default maximal number of points returned for a time range
+DEFAULT_MAX_POINTS = 2000
+
+## Period (s) at which the compaction worker looks for new finished runs
+COMPACTION_PERIOD_SEC = 600
+
+# Functions
+def encode_varint(values):
+    """! Encodes unsigned integers in 7 bits groups, the high bit of each byte telling if another byte follows
+    @param values   numpy array of uint64
+    @return numpy array of uint8
+    """
+    counts_bytes = numpy.ones(len(values), dtype = numpy.int64)
+    remaining = values >> numpy.uint64(7)
+
+    while (numpy.any(remaining) == True):
+        counts_bytes = counts_bytes + (remaining != 0)
+        remaining = remaining >> numpy.uint64(7)
+
+    offsets = numpy.cumsum(counts_bytes) - counts_bytes
+    encoded = numpy.zeros(int(counts_bytes.sum()), dtype = numpy.uint8)
+    remaining = values.copy()
+
+    for k in range(int(counts_bytes.max(initial = 0))):
+        mask = (counts_bytes > k)
+        byte = (remaining[mask] & numpy.uint64(0x7F)).astype(numpy.uint8)
+        byte[counts_bytes[mask] > (k + 1)] |= 0x80
+
+        encoded[offsets[mask] + k] = byte
+        remaining = remaining >> numpy.uint64(7)
+
+    return encoded
+
+def decode_varint(encoded):
+    """! Decodes the integers encoded by encode_varint
+    @param encoded  numpy array of uint8
+    @return numpy array of uint64
+    """
+    ends = numpy.flatnonzero((encoded & 0x80) == 0)
+    starts = numpy.concatenate(([0], ends[:-1] + 1)).astype(numpy.int64)
+    counts_bytes = ends - starts + 1
+
+    values = numpy.zeros(len(ends), dtype = numpy.uint64)
+
+    for k in range(int(counts_bytes.max(initial = 0))):
+        mask = (counts_bytes > k)
+        values[mask] |= (encoded[starts[mask] + k] & 0x7F).astype(numpy.uint64) << numpy.uint64(7 * k)
+
+    return values
+
+def encode_column(values):
+    """! Delta, zigzag and varint encodes a column, then compresses it
+    @param values   numpy array of integers
+    @return The compressed bytes
+    """
+    deltas = numpy.diff(values.astype(numpy.int64), prepend = 0)
+    zigzag = ((deltas << 1) ^ (deltas >> 63)).astype(numpy.uint64)
+
+    return zlib.compress(encode_varint(zigzag).tobytes(), COMPACT_COMPRESSION_LEVEL)
+
+def decode_column(data):
+    """! Decodes a column encoded by encode_column
+    @param data     The compressed bytes
+    @return numpy array of int64
+    """
+    zigzag = decode_varint(numpy.frombuffer(zlib.decompress(data), dtype = numpy.uint8))
+    deltas = (zigzag >> numpy.uint64(1)).astype(numpy.int64) ^ -(zigzag & numpy.uint64(1)).astype(numpy.int64)
+
+    return numpy.cumsum(deltas)
+
+def build_pyramid_level(timestamps, positions, period):
+    """! Groups the frames in buckets of a fixed duration and gives the statistics of the position in every bucket
+    @param timestamps   Reception times of the frames (s since epoch), sorted
+    @param positions    Positions of the frames
+    @param period       Duration of a bucket (s)
+    @return A dictionnary of arrays: start time, number of frames, minimum, maximum and mean position of every bucket
+    """
+    if (len(timestamps) == 0):
+        return {name : numpy.zeros(0) for name in ["time", "count", "min", "max", "mean"]}
+
+    keys = numpy.floor(timestamps / period).astype(numpy.int64)
+    starts = numpy.concatenate(([0], numpy.flatnonzero(numpy.diff(keys)) + 1))
+    counts = numpy.diff(numpy.append(starts, len(keys)))
+    positions = positions.astype(numpy.float64)
+
+    return {
+            "time"  : keys[starts].astype(numpy.float64) * period,
+            "count" : counts,
+            "min"   : numpy.minimum.reduceat(positions, starts),
+            "max"   : numpy.maximum.reduceat(positions, starts),
+            "mean"  : numpy.add.reduceat(positions, starts) / counts}
+
+def get_pyramid_path(path_run, encoder_id, period):
+    """! Gives the path of a pyramid level of an encoder of a run
+    @param path_run     Folder of the run
+    @param encoder_id   ID of the encoder
+    @param period       Duration of a bucket of the level (s)
+    @return The path of the level file
+    """
+    return os.path.join(path_run, 'pyramid_' + str(encoder_id) + '_' + str(period) + 's.npz')
+
+def is_run_compacted(path_run):
+    """! Indicates if a run was compacted
+    @param path_run     Folder of the run
+    @return True if the run has a compressed tier
+    """
+    return os.path.exists(os.path.join(path_run, COMPACT_HEADER_FILE))
+
+def open_run_archive(path_run):
+    """! Opens a run whatever its tier
+    @param path_run     Folder of the run
+    @return A RunArchive, or a CompactedRunArchive if the raw columns were removed by the compaction
+    """
+    if ((is_run_compacted(path_run) == True) and (os.path.exists(get_column_path(path_run, "timestamp")) == False)):
+        return CompactedRunArchive(path_run)
+
+    return RunArchive(path_run)
+
+def compact_run(path_run, flag_remove_raw = True):
+    """! Builds the compressed tier and the pyramids of a finished run
+    @param path_run         Folder of the run
+    @param flag_remove_raw  If true, removes the raw columns once the compressed tier is verified
+    @return The size of the raw columns and of the compressed tier (bytes)
+    """
+    archive = RunArchive(path_run)
+    timestamps = numpy.asarray(archive.dict_columns["timestamp"])
+    ids = numpy.asarray(archive.dict_columns["id"])
+
+    # Pyramids are built from the raw data, one per encoder since the positions of different encoders cannot be mixed in a bucket
+    for encoder_id in LIST_ENCODER_IDS:
+        mask_encoder = (ids == encoder_id)
+        timestamps_encoder = timestamps[mask_encoder]
+        positions_encoder = numpy.asarray(archive.dict_columns["position"])[mask_encoder]
+
+        for period in LIST_PYRAMID_PERIODS:
+            numpy.savez(get_pyramid_path(path_run, encoder_id, period), **build_pyramid_level(timestamps_encoder, positions_encoder, period))
+
+    dict_integer_columns = {column : numpy.asarray(array) for column, array in archive.dict_columns.items()}
+    dict_integer_columns["timestamp"] = numpy.round(timestamps * TIMESTAMP_SCALE).astype(numpy.int64)
+
+    size_raw = 0
+    size_compacted = 0
+
+    for column, values in dict_integer_columns.items():
+        data = encode_column(values)
+
+        with open(os.path.join(path_run, column + '.vz'), "wb") as f:
+            f.write(data)
+
+        size_raw = size_raw + values.size * DICT_ARCHIVE_COLUMNS[column].itemsize
+        size_compacted = size_compacted + len(data)
+
+        # The raw data is only removed once the compressed tier gives it back exactly
+        if (numpy.array_equal(decode_column(data), values) != True):
+            flag_remove_raw = False
+            print("Compaction of the " + column + " column of " + path_run + " could not be verified")
+
+    with open(os.path.join(path_run, COMPACT_HEADER_FILE), "w") as f:
+        json.dump({"frames" : archive.counter_frames, "timestamp_scale" : TIMESTAMP_SCALE, "pyramid_periods" : LIST_PYRAMID_PERIODS, "pyramid_ids" : LIST_ENCODER_IDS}, f, indent = 4)
+
+    # The memory maps must be released before the files are removed - The last column of the loop is still a view of its map
+    del archive, timestamps, ids, dict_integer_columns, values
+
+    if (flag_remove_raw == True):
+        for column in DICT_ARCHIVE_COLUMNS:
+            os.remove(get_column_path(path_run, column))
+
+    return size_raw, size_compacted
+
+def compact_finished_runs(flag_remove_raw = True):
+    """! Compacts every finished run that was not compacted yet
+    @param flag_remove_raw  If true, removes the raw columns once the compressed tier is verified
+    @return The number of compacted runs
+    """
+    counter_runs = 0
+
+    for path_run in list_archived_runs():
+        if (is_run_compacted(path_run) == True):
+            continue
+
+        with open(os.path.join(path_run, ARCHIVE_HEADER_FILE), "r") as f:
+            header = json.load(f)
+
+        # A run still recording is left for a later pass
+        if (header["status"] == "recording"):
+            continue
+
+        size_raw, size_compacted = compact_run(path_run, flag_remove_raw)
+        counter_runs = counter_runs + 1
+        print("Run " + path_run + " compacted from " + str(size_raw) + " to " + str(size_compacted) + " bytes")
+
+    return counter_runs
+
+def compact_archives(stop_event):
+    """! Compacts the finished runs periodically until stopped - Executed by the compaction worker
+    @param stop_event   Thread event stopping the compaction when set
+    """
+    while (stop_event.is_set() != True):
+        compact_finished_runs()
+
+        stop_event.wait(COMPACTION_PERIOD_SEC)
+
+def read_time_range(path_run, encoder_id, time_start, time_end, max_points = DEFAULT_MAX_POINTS):
+    """! Gives the positions of an encoder of a run in a time range at the finest resolution that fits in a number of points\n
+    The raw frames are used if they fit, else the pyramid level with the shortest buckets that fits
+    @param path_run     Folder of the run
+    @param encoder_id   ID of the encoder
+    @param time_start   Start of the range (s since epoch) - Included
+    @param time_end     End of the range (s since epoch) - Excluded
+    @param max_points   Maximal number of points wanted
+    @return The period of the level used (0 for the raw frames) and a dictionnary of arrays: time, count, min, max and mean
+    """
+    if ((is_run_compacted(path_run) != True) or (os.path.exists(get_column_path(path_run, "timestamp")) == True)):
+        archive = RunArchive(path_run)
+        index_start, index_end = archive.find_frames(time_start, time_end)
+        dict_frames = archive.slice_frames(index_start, index_end)
+        mask_encoder = (numpy.asarray(dict_frames["id"]) == encoder_id)
+
+        if ((numpy.count_nonzero(mask_encoder) <= max_points) or (is_run_compacted(path_run) != True)):
+            positions = numpy.asarray(dict_frames["position"], dtype = numpy.float64)[mask_encoder]
+
+            return 0, {
+                        "time"  : numpy.asarray(dict_frames["timestamp"])[mask_encoder],
+                        "count" : numpy.ones(len(positions), dtype = numpy.int64),
+                        "min"   : positions,
+                        "max"   : positions,
+                        "mean"  : positions}
+
+    for period in LIST_PYRAMID_PERIODS:
+        with numpy.load(get_pyramid_path(path_run, encoder_id, period)) as level:
+            times = level["time"]
+            index_start = numpy.searchsorted(times, time_start - period, 'right')
+            index_end = numpy.searchsorted(times, time_end, 'left')
+
+            if (((index_end - index_start) <= max_points) or (period == LIST_PYRAMID_PERIODS[-1])):
+                return period, {name : level[name][index_start:index_end] for name in level.files}
+
+# Classes
+class CompactedRunArchive(RunArchive):
+    """! Read access to a run whose raw columns were replaced by the compressed tier - The columns are decoded in memory when opened
+    """
+    def __init__(self, path_run):
+        """! Opens and decodes the compressed tier of a run
+        @param path_run     Folder of the run
+        """
+        self.path_run = path_run
+
+        with open(os.path.join(path_run, ARCHIVE_HEADER_FILE), "r") as f:
+            self.header = json.load(f)
+
+        with open(os.path.join(path_run, COMPACT_HEADER_FILE), "r") as f:
+            compact_header = json.load(f)
+
+        self.counter_frames = compact_header["frames"]
+        self.dict_columns = {}
+
+        for column, dtype in DICT_ARCHIVE_COLUMNS.items():
+            with open(os.path.join(path_run, column + '.vz'), "rb") as f:
+                values = decode_column(f.read())
+
+            if (column == "timestamp"):
+                self.dict_columns[column] = values / compact_header["timestamp_scale"]
+            else:
+                self.dict_columns[column] = values.astype(dtype)
@@ -7,8 +7,11 @@
 
 # Imports
 import time
+from threading import Lock
 
 from serial_funcs import *
+from common import PULSE_PER_MM, PULSE_PER_TURN_ADAPTOR, RATIO_GEARBOX_ADAPTOR
+import metrics
 
 # Constants
 INDEX_MOVEMENT_UP_DOWN          = 0
@@ -36,6 +39,17 @@ CHECKPOINT_A = 0
 ## Second checkpoint of the full movement to reach
 CHECKPOINT_B = 1
 
+## Maximal time to wait for the microcontroler to verify an uploaded program (s)
+PROGRAM_UPLOAD_TIMEOUT_SEC = 1.0
+
+## Number of uploads of a program rejected by the microcontroler before the movements are streamed instead
+PROGRAM_UPLOAD_ATTEMPTS = 2
+
+## Parameters of a running program that can be changed without stopping it: slider value of the speed, number of repetitions and amplitude (mm)
+PARAMETER_SPEED     = "speed"
+PARAMETER_REPS      = "reps"
+PARAMETER_AMPLITUDE = "amplitude"
+
 def determine_trajectory_parameters(directions, list_movements):
     """! Determines the parameters to send to the microcontroler to ensure correct control
     @param directions       Movement type to be executed by the bench test
@@ -78,7 +92,101 @@ def determine_trajectory_parameters(directions, list_movements):
 
     return id, command_a, command_b
 
+def create_program_parameters(position_to_reach, directions, number_of_turns, number_reps_to_do):
+    """! Groups the parameters of an automatic program to save or compare them
+    @param position_to_reach    The amplitude of the movement in millimeters
+    @param directions           Combination of movements to execute in repetition
+    @param number_of_turns      Number of turns to be done by the adaptor motor
+    @param number_reps_to_do    Number of repetitions to execute
+    @return A dictionnary of the program parameters
+    """
+    return {
+            "movement"  : directions,
+            "amplitude" : position_to_reach,
+            "turns"     : number_of_turns,
+            "reps"      : number_reps_to_do}
+
+def notify_run_observers(list_run_observers, function_name, *args):
+    """! Calls the given function of every observer of an automatic run
+    @param list_run_observers   RunObserver objects to notify
+    @param function_name        Name of the RunObserver function to call
+    @param args                 Arguments to give to the function
+    """
+    for observer in list_run_observers:
+        getattr(observer, function_name)(*args)
+
 # Classes
+class RunObserver():
+    """! Base class of the objects following the progress of an automatic run\n
+    Every function is called from the automatic mode thread and must return quickly
+    """
+    def on_run_start(self, program, counter_repetitions):
+        """! Called when the run starts
+        @param program                  Dictionnary of the program parameters ("movement", "amplitude", "turns" and "reps")
+        @param counter_repetitions      Number of repetitions already executed (non-zero when resuming a run)
+        """
+        pass
+
+    def on_command_sent(self, counter_repetitions, checkpoint_to_reach):
+        """! Called when a movement command has been sent to the microcontroler
+        @param counter_repetitions      Number of repetitions started
+        @param checkpoint_to_reach      Checkpoint that the movement will reach
+        """
+        pass
+
+    def on_trajectory_started(self, counter_repetitions):
+        """! Called when the microcontroler confirms that the movement is in execution
+        @param counter_repetitions      Number of repetitions started
+        """
+        pass
+
+    def on_trajectory_ended(self, counter_repetitions, checkpoint_reached):
+        """! Called when the microcontroler confirms the end of the movement
+        @param counter_repetitions      Number of repetitions started
+        @param checkpoint_reached       Checkpoint reached by the tool
+        """
+        pass
+
+    def on_parameters_changed(self, counter_repetitions, program, dict_changes):
+        """! Called when parameter changes are applied at a checkpoint, before the next movement command is sent
+        @param counter_repetitions      Number of repetitions started
+        @param program                  Dictionnary of the program parameters with the changes applied
+        @param dict_changes             Dictionnary of the new values by parameter (PARAMETER_SPEED, PARAMETER_REPS or PARAMETER_AMPLITUDE)
+        """
+        pass
+
+    def on_run_end(self, counter_repetitions, flag_is_stopped):
+        """! Called when the run ends
+        @param counter_repetitions      Number of repetitions executed
+        @param flag_is_stopped          True if the run was stopped before executing all of its repetitions
+        """
+        pass
+
+class ParameterChanges():
+    """! Changes of the parameters of a running program, requested from the GUI or the control server and taken by the run at its next checkpoint\n
+    Only the last value requested for every parameter is kept
+    """
+    def request(self, dict_parameters):
+        """! Queues parameter changes
+        @param dict_parameters  Dictionnary of the new values by parameter (PARAMETER_SPEED, PARAMETER_REPS or PARAMETER_AMPLITUDE)
+        """
+        with self.lock:
+            self.dict_pending.update(dict_parameters)
+
+    def take(self, list_names):
+        """! Removes the pending changes of some parameters from the queue
+        @param list_names   Parameters that can be applied
+        @return The dictionnary of the new values by parameter - Empty if no change of these parameters is pending
+        """
+        with self.lock:
+            return {name : self.dict_pending.pop(name) for name in list_names if name in self.dict_pending}
+
+    def __init__(self):
+        """! Initialisation of an empty queue of changes
+        """
+        self.lock = Lock()
+        self.dict_pending = {}
+
 class AutomaticMode():
     """! Gives access to the automatic control mode functions in order to repeat or test a specific movement
     """
@@ -110,7 +218,63 @@ class AutomaticMode():
         
         return data
 
-    def auto_mode(position_to_reach, directions, number_of_turns, number_reps_to_do, label_reps_actual, connected_device, stop_event, pause_event):
+    def calculate_movement_pulses(motor_id, position_to_reach, number_of_turns):
+        """! Converts the amplitude of a movement to the number of pulses the motor executes
+        @param motor_id             The ID of the selected motor for the movement
+        @param position_to_reach    The amplitude of the movement in millimeters
+        @param number_of_turns      Number of turns to be done by the adaptor motor
+        @return     The number of pulses of the movement
+        """
+        if (motor_id == ID_MOTOR_ADAPT):
+            pulses = number_of_turns * PULSE_PER_TURN_ADAPTOR * RATIO_GEARBOX_ADAPTOR
+        else:
+            pulses = position_to_reach * PULSE_PER_MM
+
+        return pulses
+
+    def apply_parameter_changes(parameter_changes, motor_id, program, counter_repetitions, connected_device, list_run_observers):
+        """! Applies the pending parameter changes of a run at a checkpoint - The repetition counter and the checkpoints are kept\n
+        The amplitude only changes at checkpoint A so that both movements of a repetition have the same length, the repetition in progress is always completed
+        @param parameter_changes    ParameterChanges queue of the run
+        @param motor_id             The ID of the motor of the run
+        @param program              Dictionnary of the program parameters, updated with the changes
+        @param counter_repetitions  Number of repetitions started
+        @param connected_device     The Serial object currently connected to the application
+        @param list_run_observers   RunObserver objects to notify of the changes
+        @return True if parameters were changed
+        """
+        flag_is_at_checkpoint_a = (AutomaticMode.current_checkpoint_to_reach == CHECKPOINT_A)
+
+        if (flag_is_at_checkpoint_a == True):
+            dict_changes = parameter_changes.take([PARAMETER_SPEED, PARAMETER_REPS, PARAMETER_AMPLITUDE])
+        else:
+            dict_changes = parameter_changes.take([PARAMETER_SPEED, PARAMETER_REPS])
+
+        if (len(dict_changes) == 0):
+            return False
+
+        if (PARAMETER_SPEED in dict_changes):
+            transmit_serial_data(motor_id, COMMAND_MOTOR_CHANGE_SPEED, MODE_CHANGE_PARAMS, dict_changes[PARAMETER_SPEED], connected_device)
+
+        if (PARAMETER_REPS in dict_changes):
+            if (flag_is_at_checkpoint_a == True):
+                dict_changes[PARAMETER_REPS] = max(dict_changes[PARAMETER_REPS], counter_repetitions)
+            else:
+                dict_changes[PARAMETER_REPS] = max(dict_changes[PARAMETER_REPS], counter_repetitions + 1)
+
+            program["reps"] = dict_changes[PARAMETER_REPS]
+
+        if (PARAMETER_AMPLITUDE in dict_changes):
+            program["amplitude"] = dict_changes[PARAMETER_AMPLITUDE]
+
+        print("Parameters changed at repetition " + str(counter_repetitions) + ": " + str(dict_changes))
+        metrics.increment_counter("auto_mode.parameter_changes")
+
+        notify_run_observers(list_run_observers, "on_parameters_changed", counter_repetitions, program, dict_changes)
+
+        return True
+
+    def auto_mode(position_to_reach, directions, number_of_turns, number_reps_to_do, label_reps_actual, connected_device, stop_event, pause_event, list_run_observers = None, start_repetition = 0, parameter_changes = None):
         """! Sends correct commands alternately to the microcontroler in order to make the tool move from point A to point B and back to point A\n
                 This function is initialized every time a test needs to be executed (and will subsequently end with its corresponding thread)
         @param position_to_reach    The amplitude of the movement in millimeters
@@ -121,13 +285,23 @@ class AutomaticMode():
         @param connected_device     The Serial object currently connected to the application
         @param stop_event           Thread event to stop any other movement to be executed - If set, will reset the number of repetitions executed
         @param pause_event          Thread event to pause the execution of movements - If set, will not reset the number of repetitions executed   
+        @param list_run_observers   RunObserver objects to notify of the progress of the run
+        @param start_repetition     Number of repetitions already executed by a previous run of the same program when resuming it
+        @param parameter_changes    ParameterChanges queue applied at every checkpoint - The parameters cannot change during the run if None
         """
+        if (list_run_observers == None):
+            list_run_observers = []
+
         id, command_a, command_b = determine_trajectory_parameters(directions, AutomaticMode.list_movement_entries)
-        counter_repetitions = 0
+        counter_repetitions = start_repetition
         current_process_state = AUTO_MODE_STATE_INIT
 
         data_to_send = AutomaticMode.convert_data_number_of_turns(id, position_to_reach, number_of_turns)
 
+        program = create_program_parameters(position_to_reach, directions, number_of_turns, number_reps_to_do)
+        notify_run_observers(list_run_observers, "on_run_start", program, counter_repetitions)
+        label_reps_actual.configure(text = str(counter_repetitions))
+
         # Initial movement - Needs to produce correct movement downwards
         if ((AutomaticMode.current_checkpoint_to_reach == CHECKPOINT_A) and (AutomaticMode.previous_checkpoint_to_reach == CHECKPOINT_B)):
             transmit_serial_data(
@@ -140,6 +314,8 @@ class AutomaticMode():
             AutomaticMode.previous_checkpoint_to_reach = AutomaticMode.current_checkpoint_to_reach
             AutomaticMode.current_checkpoint_to_reach = CHECKPOINT_B
 
+            notify_run_observers(list_run_observers, "on_command_sent", counter_repetitions, CHECKPOINT_B)
+
         current_process_state = AUTO_MODE_STATE_WAITING_FOR_ANSWER
 
         """Process for auto mode
@@ -153,15 +329,30 @@ class AutomaticMode():
         # Control loop with thread events and number of reps
         while ((stop_event.is_set() != True) and (counter_repetitions < number_reps_to_do)):
             if (pause_event.is_set() != True):
+                time_start_iteration = time.perf_counter()
+
                 if (current_process_state == AUTO_MODE_STATE_WAITING_FOR_ANSWER):
                     if (g_list_message_info[INDEX_STATUS_MOTOR] == MOTOR_STATE_AUTO_IN_TRAJ):
                         current_process_state = AUTO_MODE_STATE_WAITING_END_OF_TRAJ
 
+                        notify_run_observers(list_run_observers, "on_trajectory_started", counter_repetitions)
+
                 elif (current_process_state == AUTO_MODE_STATE_WAITING_END_OF_TRAJ):
                     if (g_list_message_info[INDEX_STATUS_MOTOR] == MOTOR_STATE_AUTO_END_OF_TRAJ):
                         current_process_state = AUTO_MODE_STATE_READY_TO_SEND_COMMAND
 
+                        notify_run_observers(list_run_observers, "on_trajectory_ended", counter_repetitions, AutomaticMode.current_checkpoint_to_reach)
+
                 elif (current_process_state == AUTO_MODE_STATE_READY_TO_SEND_COMMAND):
+                    # The tool is stopped at a checkpoint: the parameters changed meanwhile are applied before the next movement
+                    if (parameter_changes != None):
+                        if (AutomaticMode.apply_parameter_changes(parameter_changes, id, program, counter_repetitions, connected_device, list_run_observers) == True):
+                            number_reps_to_do = program["reps"]
+                            data_to_send = AutomaticMode.convert_data_number_of_turns(id, program["amplitude"], number_of_turns)
+
+                            if (counter_repetitions >= number_reps_to_do):
+                                break
+
                     # Go to A position
                     if (AutomaticMode.current_checkpoint_to_reach == CHECKPOINT_A and AutomaticMode.previous_checkpoint_to_reach == CHECKPOINT_B):
                         transmit_serial_data(
@@ -176,6 +367,8 @@ class AutomaticMode():
                         AutomaticMode.previous_checkpoint_to_reach = AutomaticMode.current_checkpoint_to_reach
                         AutomaticMode.current_checkpoint_to_reach = CHECKPOINT_B
 
+                        notify_run_observers(list_run_observers, "on_command_sent", counter_repetitions, CHECKPOINT_B)
+
                     elif (AutomaticMode.current_checkpoint_to_reach == CHECKPOINT_B and AutomaticMode.previous_checkpoint_to_reach == CHECKPOINT_A):
                         # Go to B position
                         transmit_serial_data(
@@ -191,19 +384,170 @@ class AutomaticMode():
                         AutomaticMode.current_checkpoint_to_reach = CHECKPOINT_A
                         
                         counter_repetitions = counter_repetitions + 1
+                        metrics.increment_counter("auto_mode.repetitions")
+
+                        notify_run_observers(list_run_observers, "on_command_sent", counter_repetitions, CHECKPOINT_A)
 
                 label_reps_actual.configure(text = str(counter_repetitions))
 
-                time.sleep(0.1)
+                metrics.record_duration("auto_mode.iteration", time.perf_counter() - time_start_iteration)
 
-            time.sleep(0.1)
+                stop_event.wait(0.1)
+
+            # Waiting on the stop event lets the run end as soon as it is stopped
+            stop_event.wait(0.1)
 
         # Reset the checkpoints in case of stop
         if (stop_event.is_set() == True):
             AutomaticMode.current_checkpoint_to_reach    = CHECKPOINT_A
             AutomaticMode.previous_checkpoint_to_reach   = CHECKPOINT_B
 
-    def auto_mode_test(position_to_reach, directions, number_of_turns, connected_device, stop_event):
+        notify_run_observers(list_run_observers, "on_run_end", counter_repetitions, stop_event.is_set())
+
+    def upload_program(motor_id, command_a, command_b, data_to_send, number_reps, slider_value, connected_device):
+        """! Uploads a repetition program to the microcontroler and waits for its verification
+        @param motor_id             The ID of the selected motor for the movement
+        @param command_a            Movement command towards checkpoint B
+        @param command_b            Movement command towards checkpoint A
+        @param data_to_send         Data of the movement commands
+        @param number_reps          Number of repetitions to execute
+        @param slider_value         Slider value of the speed of the movements
+        @param connected_device     The Serial object currently connected to the application
+        @return True if the microcontroler loaded the program - False if it rejected it or does not support programs
+        """
+        list_frames = build_program_frames(motor_id, command_a, command_b, data_to_send, number_reps, slider_value)
+
+        for i in range(PROGRAM_UPLOAD_ATTEMPTS):
+            # Only the motor of the program answers the upload - Encoders send their count in place of the state
+            waiter = MotorStateWaiter([MOTOR_STATE_PROGRAM_LOADED, MOTOR_STATE_PROGRAM_REJECTED], motor_id)
+
+            for command, data in list_frames:
+                transmit_serial_data(motor_id, command, MODE_PROGRAM, data, connected_device)
+
+            # A microcontroler without program support does not answer
+            if (waiter.wait(PROGRAM_UPLOAD_TIMEOUT_SEC) == None):
+                print("Program upload not answered")
+                return False
+
+            if (waiter.state_received == MOTOR_STATE_PROGRAM_LOADED):
+                return True
+
+            print("Program upload rejected (" + str(i + 1) + "/" + str(PROGRAM_UPLOAD_ATTEMPTS) + ")")
+
+        return False
+
+    def auto_mode_offloaded(position_to_reach, directions, number_of_turns, number_reps_to_do, label_reps_actual, connected_device, stop_event, pause_event, slider_value, list_run_observers = None, start_repetition = 0):
+        """! Uploads the program to the microcontroler, which executes the repetitions by itself, and follows its progress\n
+                The movements are streamed by auto_mode instead if the program cannot be uploaded\n
+                The observers are notified from the progress polled every 0.1 s: their events can be late by this period and on_trajectory_started is not sent
+        @param position_to_reach    The amplitude of the movement in millimeters
+        @param directions           Combination of movements given to determine the trajectory
+        @param number_of_turns      Number of turns to be done by the adaptor motor
+        @param number_reps_to_do    Number of repetitions to execute before a test is deemed complete
+        @param label_reps_actual    Label object to update the number of repetitions that have been completed by the testbench
+        @param connected_device     The Serial object currently connected to the application
+        @param stop_event           Thread event to stop the run - The motor stop command also ends the program on the microcontroler
+        @param pause_event          Thread event to hold the program at the end of the current movement
+        @param slider_value         Slider value of the speed of the movements
+        @param list_run_observers   RunObserver objects to notify of the progress of the run
+        @param start_repetition     Number of repetitions already executed by a previous run of the same program when resuming it
+        """
+        if (list_run_observers == None):
+            list_run_observers = []
+
+        id, command_a, command_b = determine_trajectory_parameters(directions, AutomaticMode.list_movement_entries)
+        data_to_send = AutomaticMode.convert_data_number_of_turns(id, position_to_reach, number_of_turns)
+        counter_movements_to_do = 2 * (number_reps_to_do - start_repetition)
+
+        if (AutomaticMode.upload_program(id, command_a, command_b, data_to_send, number_reps_to_do - start_repetition, slider_value, connected_device) != True):
+            print("Program not uploaded: the movements are streamed")
+            AutomaticMode.auto_mode(position_to_reach, directions, number_of_turns, number_reps_to_do, label_reps_actual, connected_device, stop_event, pause_event, list_run_observers, start_repetition)
+            return
+
+        progress_tracker = ProgramProgressTracker(id)
+        counter_movements_notified = 0
+        flag_is_held = False
+
+        program = create_program_parameters(position_to_reach, directions, number_of_turns, number_reps_to_do)
+        notify_run_observers(list_run_observers, "on_run_start", program, start_repetition)
+        label_reps_actual.configure(text = str(start_repetition))
+
+        transmit_serial_data(id, COMMAND_PROGRAM_RUN, MODE_PROGRAM, DATA_NONE, connected_device)
+        notify_run_observers(list_run_observers, "on_command_sent", start_repetition, CHECKPOINT_B)
+
+        # The microcontroler sends the number of movements executed: odd movements reach checkpoint B, even movements reach checkpoint A
+        while ((stop_event.is_set() != True) and ((progress_tracker.event_done.is_set() != True) or (counter_movements_notified < progress_tracker.counter_movements))):
+            if (pause_event.is_set() != flag_is_held):
+                flag_is_held = pause_event.is_set()
+                transmit_serial_data(id, COMMAND_PROGRAM_HOLD, MODE_PROGRAM, int(flag_is_held), connected_device)
+
+            while (counter_movements_notified < min(progress_tracker.counter_movements, counter_movements_to_do)):
+                counter_movements_notified = counter_movements_notified + 1
+
+                if ((counter_movements_notified % 2) == 1):
+                    notify_run_observers(list_run_observers, "on_trajectory_ended", start_repetition + (counter_movements_notified // 2), CHECKPOINT_B)
+                    checkpoint_next = CHECKPOINT_A
+                    metrics.increment_counter("auto_mode.repetitions")
+                else:
+                    notify_run_observers(list_run_observers, "on_trajectory_ended", start_repetition + (counter_movements_notified // 2), CHECKPOINT_A)
+                    checkpoint_next = CHECKPOINT_B
+
+                if (counter_movements_notified < counter_movements_to_do):
+                    notify_run_observers(list_run_observers, "on_command_sent", start_repetition + ((counter_movements_notified + 1) // 2), checkpoint_next)
+
+            label_reps_actual.configure(text = str(start_repetition + ((counter_movements_notified + 1) // 2)))
+
+            stop_event.wait(0.1)
+
+        progress_tracker.close()
+
+        # The program always ends at checkpoint A, the checkpoints are reset in case of stop as in auto_mode
+        AutomaticMode.current_checkpoint_to_reach    = CHECKPOINT_A
+        AutomaticMode.previous_checkpoint_to_reach   = CHECKPOINT_B
+
+        notify_run_observers(list_run_observers, "on_run_end", start_repetition + ((counter_movements_notified + 1) // 2), stop_event.is_set())
+
+    def auto_mode_sequence(list_steps, number_reps_to_do, label_reps_actual, connected_device, stop_event, pause_event):
+        """! Executes a sequence of movements of any axes in repetition, such as a taught program\n
+                Every movement is sent once the previous one ended, so the sequence is executed at the speed of the motors
+        @param list_steps           Movements to execute: dictionnaries of the "motor_id", "command", "data", "slider_value" and planned "duration" (s)
+        @param number_reps_to_do    Number of times the sequence is executed
+        @param label_reps_actual    Label object to update the number of repetitions executed
+        @param connected_device     The Serial object currently connected to the application
+        @param stop_event           Thread event to stop the sequence
+        @param pause_event          Thread event to pause the sequence at the end of the current movement
+        """
+        counter_repetitions = 0
+        dict_slider_values = {}
+        label_reps_actual.configure(text = str(counter_repetitions))
+
+        while ((stop_event.is_set() != True) and (counter_repetitions < number_reps_to_do)):
+            for step in list_steps:
+                while ((pause_event.is_set() == True) and (stop_event.is_set() != True)):
+                    stop_event.wait(0.1)
+
+                if (stop_event.is_set() == True):
+                    break
+
+                # The speed is only sent when it changes
+                if (dict_slider_values.get(step["motor_id"]) != step["slider_value"]):
+                    transmit_serial_data(step["motor_id"], COMMAND_MOTOR_CHANGE_SPEED, MODE_CHANGE_PARAMS, step["slider_value"], connected_device)
+                    dict_slider_values[step["motor_id"]] = step["slider_value"]
+
+                waiter = MotorStateWaiter([MOTOR_STATE_AUTO_END_OF_TRAJ], step["motor_id"])
+                transmit_serial_data(step["motor_id"], step["command"], MODE_POSITION_CONTROL, step["data"], connected_device)
+
+                # A movement is given twice its planned duration to end
+                if (waiter.wait(1.0 + (2 * step["duration"])) == None):
+                    print("Movement of motor " + str(step["motor_id"]) + " did not end in time: sequence stopped")
+                    stop_event.set()
+
+            if (stop_event.is_set() != True):
+                counter_repetitions = counter_repetitions + 1
+                metrics.increment_counter("auto_mode.repetitions")
+                label_reps_actual.configure(text = str(counter_repetitions))
+
+    def auto_mode_test(position_to_reach, directions, number_of_turns, connected_device, stop_event, list_run_observers = None):
         """! This function lets the user test an iteration of an automatic movement
                 It executes a back-and-forth between the two positions once
         @param position_to_reach    The amplitude of the movement in millimeters
@@ -211,12 +555,19 @@ class AutomaticMode():
         @param number_of_turns      Number of turns to be done by the adaptor motor
         @param connected_device     The Serial object currently connected to the application
         @param stop_event           Thread event to stop any other movement to be executed - If set, will reset the number of repetitions executed
+        @param list_run_observers   RunObserver objects to notify of the progress of the test - The test ends once the movement back is sent
         """
+        if (list_run_observers == None):
+            list_run_observers = []
+
         id, command_a, command_b = determine_trajectory_parameters(directions, AutomaticMode.list_movement_entries)
         current_process_state = AUTO_MODE_STATE_INIT
 
         data_to_send = AutomaticMode.convert_data_number_of_turns(id, position_to_reach, number_of_turns)
 
+        program = create_program_parameters(position_to_reach, directions, number_of_turns, 1)
+        notify_run_observers(list_run_observers, "on_run_start", program, 0)
+
         # Start auto mode trajectory
         transmit_serial_data(
                                 id,
@@ -227,19 +578,27 @@ class AutomaticMode():
         
         current_process_state = AUTO_MODE_STATE_WAITING_FOR_ANSWER
 
+        notify_run_observers(list_run_observers, "on_command_sent", 0, CHECKPOINT_B)
+
         # Static checkpoint since there is only one repetition needed
         static_current_checkpoint_to_reach = CHECKPOINT_B
         flag_is_trajectory_completed = False
 
         while (stop_event.is_set() != True and flag_is_trajectory_completed == False):
+            time_start_iteration = time.perf_counter()
+
             if (current_process_state == AUTO_MODE_STATE_WAITING_FOR_ANSWER):
                 if (g_list_message_info[INDEX_STATUS_MOTOR] == MOTOR_STATE_AUTO_IN_TRAJ):
                     current_process_state = AUTO_MODE_STATE_WAITING_END_OF_TRAJ
 
+                    notify_run_observers(list_run_observers, "on_trajectory_started", 0)
+
             elif (current_process_state == AUTO_MODE_STATE_WAITING_END_OF_TRAJ):
                 if (g_list_message_info[INDEX_STATUS_MOTOR] == MOTOR_STATE_AUTO_END_OF_TRAJ):
                     current_process_state = AUTO_MODE_STATE_READY_TO_SEND_COMMAND
 
+                    notify_run_observers(list_run_observers, "on_trajectory_ended", 0, CHECKPOINT_B)
+
             elif (current_process_state == AUTO_MODE_STATE_READY_TO_SEND_COMMAND):
                 if ((g_list_message_info[INDEX_STATUS_MOTOR] == MOTOR_STATE_AUTO_END_OF_TRAJ) and (static_current_checkpoint_to_reach == CHECKPOINT_B)):
                     transmit_serial_data(
@@ -251,5 +610,11 @@ class AutomaticMode():
 
                     static_current_checkpoint_to_reach = CHECKPOINT_A
                     flag_is_trajectory_completed = True
-                    
-            time.sleep(0.1)
\ No newline at end of file
+
+                    notify_run_observers(list_run_observers, "on_command_sent", 1, CHECKPOINT_A)
+
+            metrics.record_duration("auto_mode_test.iteration", time.perf_counter() - time_start_iteration)
+
+            stop_event.wait(0.1)
+
+        notify_run_observers(list_run_observers, "on_run_end", int(flag_is_trajectory_completed), stop_event.is_set())
\ No newline at end of file
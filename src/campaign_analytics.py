@@ -0,0 +1,247 @@
+##
+# @file
+# campaign_analytics.py
+#
+# @brief
+# Analytics of a campaign of archived runs. \n
+# Every run is reduced to mergeable aggregates in a separate process, the results are cached by run and merged by movement type.
+
+# Imports
+import hashlib
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy
+
+# The common module must be imported before the serial functions that the index imports
+import common
+from automatic_control import AutomaticMode
+from run_archive import list_archived_runs, ARCHIVE_HEADER_FILE
+from rep_index import RepIndex, REP_INDEX_FILE
+
+# Constants
+## File in which the aggregates of every analysed run are cached
+path_analytics_cache = 'logs/analytics_cache.json'
+
+## Files of a run whose content identifies the run for the cache
+LIST_FINGERPRINT_FILES = [ARCHIVE_HEADER_FILE, REP_INDEX_FILE]
+
+## Features of the movements aggregated for every run
+LIST_FEATURES = ["duration", "peak_speed", "overshoot"]
+
+# Functions
+def create_series_aggregate(values):
+    """! Gives the mergeable aggregate of a series of values - NaN values are ignored
+    @param values   numpy array of values
+    @return A dictionnary of the count, sum, sum of squares, minimum and maximum
+    """
+    values = values[numpy.isfinite(values)]
+
+    return {
+            "count"     : int(values.size),
+            "sum"       : float(values.sum()),
+            "sum_sq"    : float(numpy.square(values).sum()),
+            "min"       : float(values.min()) if values.size else math.inf,
+            "max"       : float(values.max()) if values.size else -math.inf}
+
+def create_trend_aggregate(x, y):
+    """! Gives the mergeable aggregate of a linear regression of y against x - Pairs with a NaN are ignored
+    @param x    numpy array of the abscissas
+    @param y    numpy array of the ordinates
+    @return A dictionnary of the sums needed by the least squares slope
+    """
+    mask = numpy.isfinite(x) & numpy.isfinite(y)
+    x = x[mask].astype(numpy.float64)
+    y = y[mask].astype(numpy.float64)
+
+    return {
+            "count"     : int(x.size),
+            "sum_x"     : float(x.sum()),
+            "sum_y"     : float(y.sum()),
+            "sum_xy"    : float((x * y).sum()),
+            "sum_xx"    : float((x * x).sum())}
+
+def merge_aggregates(aggregate_a, aggregate_b):
+    """! Merges two aggregates of the same kind: counts and sums are added, extrema are compared and lists are concatenated
+    @param aggregate_a  First aggregate
+    @param aggregate_b  Second aggregate
+    @return The merged aggregate
+    """
+    merged = {}
+
+    for key, value in aggregate_a.items():
+        if (key == "min"):
+            merged[key] = min(value, aggregate_b[key])
+        elif (key == "max"):
+            merged[key] = max(value, aggregate_b[key])
+        elif (isinstance(value, dict) == True):
+            merged[key] = merge_aggregates(value, aggregate_b[key])
+        else:
+            merged[key] = value + aggregate_b[key]
+
+    return merged
+
+def reduce_run(path_run):
+    """! Reduces a run to its aggregates - Executed in a worker process
+    @param path_run     Folder of the archive of the run
+    @return A dictionnary of the program of the run and of its aggregates
+    """
+    rep_index = RepIndex(path_run)
+    features = rep_index.get_features()
+    repetitions = features["repetition"].astype(numpy.float64)
+
+    # A movement without end of trajectory frame never completed
+    list_failed_repetitions = sorted(set(int(repetition) for repetition in features["repetition"][numpy.isnan(features["duration"])]))
+
+    return {
+            "program"   : rep_index.archive.header["program"],
+            "aggregate" : {
+                            "runs"                  : 1,
+                            "frames"                : int(rep_index.archive.counter_frames),
+                            "repetitions"           : int(features["repetition"].max(initial = 0)),
+                            "failed_repetitions"    : [[path_run, repetition] for repetition in list_failed_repetitions],
+                            "features"              : {feature : create_series_aggregate(features[feature]) for feature in LIST_FEATURES},
+                            "duration_drift"        : create_trend_aggregate(repetitions, features["duration"]),
+                            "peak_speed_wear"       : create_trend_aggregate(repetitions, features["peak_speed"])}}
+
+def get_run_fingerprint(path_run):
+    """! Gives the last modification time and the hash of the files identifying a run
+    @param path_run     Folder of the archive of the run
+    @return The latest modification time of the files and a function computing their hash
+    """
+    list_paths = [os.path.join(path_run, name) for name in LIST_FINGERPRINT_FILES if os.path.exists(os.path.join(path_run, name))]
+    mtime = max(os.path.getmtime(path) for path in list_paths)
+
+    def compute_hash():
+        hash_run = hashlib.sha1()
+        for path in list_paths:
+            with open(path, "rb") as f:
+                hash_run.update(f.read())
+        return hash_run.hexdigest()
+
+    return mtime, compute_hash
+
+def load_cache(path_cache = path_analytics_cache):
+    """! Reads the cached aggregates of the runs
+    @param path_cache   Path of the cache file
+    @return A dictionnary of the cache entries by run folder - Empty if there is no cache
+    """
+    if (os.path.exists(path_cache) == False):
+        return {}
+
+    with open(path_cache, "r") as f:
+        return json.load(f)
+
+def save_cache(dict_cache, path_cache = path_analytics_cache):
+    """! Writes the cached aggregates of the runs
+    @param dict_cache   Dictionnary of the cache entries by run folder
+    @param path_cache   Path of the cache file
+    """
+    folder = os.path.dirname(path_cache)
+    if (folder != ''):
+        os.makedirs(folder, exist_ok = True)
+
+    with open(path_cache, "w") as f:
+        json.dump(dict_cache, f)
+
+def get_trend_slope(trend):
+    """! Gives the least squares slope of a trend aggregate
+    @param trend    Aggregate given by create_trend_aggregate
+    @return The slope - NaN if it cannot be computed
+    """
+    denominator = (trend["count"] * trend["sum_xx"]) - (trend["sum_x"] ** 2)
+
+    if ((trend["count"] < 2) or (denominator == 0)):
+        return math.nan
+
+    return ((trend["count"] * trend["sum_xy"]) - (trend["sum_x"] * trend["sum_y"])) / denominator
+
+def summarize_series(series):
+    """! Gives the statistics of a series aggregate
+    @param series   Aggregate given by create_series_aggregate
+    @return A dictionnary of the count, mean, standard deviation, minimum and maximum
+    """
+    if (series["count"] == 0):
+        return {"count" : 0}
+
+    mean = series["sum"] / series["count"]
+    variance = max(0.0, (series["sum_sq"] / series["count"]) - (mean ** 2))
+
+    return {"count" : series["count"], "mean" : mean, "std" : math.sqrt(variance), "min" : series["min"], "max" : series["max"]}
+
+def analyse_campaign(list_paths_runs = None, max_workers = None, path_cache = path_analytics_cache):
+    """! Analyses a campaign of runs - Only the runs that changed since the last analysis are reduced again
+    @param list_paths_runs  Folders of the runs to analyse - Every archived run with an index if None
+    @param max_workers      Number of worker processes - Number of processors if None
+    @param path_cache       Path of the cache file
+    @return A dictionnary of the merged aggregates by movement type, ordered as the movement combobox
+    """
+    if (list_paths_runs == None):
+        list_paths_runs = [path_run for path_run in list_archived_runs() if os.path.exists(os.path.join(path_run, REP_INDEX_FILE))]
+
+    dict_cache = load_cache(path_cache)
+    list_paths_to_reduce = []
+    dict_fingerprints = {}
+
+    for path_run in list_paths_runs:
+        mtime, compute_hash = get_run_fingerprint(path_run)
+        entry = dict_cache.get(path_run)
+
+        # The hash is only computed when the modification time changed
+        if ((entry != None) and (entry["mtime"] == mtime)):
+            continue
+
+        hash_run = compute_hash()
+        if ((entry != None) and (entry["hash"] == hash_run)):
+            entry["mtime"] = mtime
+            continue
+
+        dict_fingerprints[path_run] = (mtime, hash_run)
+        list_paths_to_reduce.append(path_run)
+
+    if (len(list_paths_to_reduce) != 0):
+        with ProcessPoolExecutor(max_workers = max_workers) as executor:
+            for path_run, result in zip(list_paths_to_reduce, executor.map(reduce_run, list_paths_to_reduce)):
+                mtime, hash_run = dict_fingerprints[path_run]
+                dict_cache[path_run] = {"mtime" : mtime, "hash" : hash_run, "result" : result}
+
+    save_cache(dict_cache, path_cache)
+
+    dict_by_movement = {}
+    for path_run in list_paths_runs:
+        result = dict_cache[path_run]["result"]
+        movement = result["program"]["movement"]
+
+        if (movement in dict_by_movement):
+            dict_by_movement[movement] = merge_aggregates(dict_by_movement[movement], result["aggregate"])
+        else:
+            dict_by_movement[movement] = result["aggregate"]
+
+    return {movement : dict_by_movement[movement] for movement in AutomaticMode.list_movement_entries if movement in dict_by_movement}
+
+def format_campaign_report(dict_by_movement):
+    """! Formats the analysis of a campaign to be shown to the user
+    @param dict_by_movement     Dictionnary given by analyse_campaign
+    @return The formatted text
+    """
+    list_lines = []
+
+    for movement, aggregate in dict_by_movement.items():
+        list_lines.append(movement + ": " + str(aggregate["runs"]) + " runs, " + str(aggregate["repetitions"]) + " repetitions, " + str(aggregate["frames"]) + " frames")
+
+        for feature in LIST_FEATURES:
+            list_lines.append("    " + feature + ": " + str(summarize_series(aggregate["features"][feature])))
+
+        list_lines.append("    duration drift (s/rep): " + str(get_trend_slope(aggregate["duration_drift"])))
+        list_lines.append("    peak speed against wear (counts/s/rep): " + str(get_trend_slope(aggregate["peak_speed_wear"])))
+        list_lines.append("    failed repetitions: " + str(len(aggregate["failed_repetitions"])))
+
+    return '\n'.join(list_lines)
+
+if __name__ == "__main__":
+    """! Analyses the given runs, or every archived run
+    """
+    print(format_campaign_report(analyse_campaign(sys.argv[1:] or None)))
@@ -10,6 +10,7 @@ import tkinter
 import customtkinter
 
 from serial_funcs import transmit_serial_data, ID_MOTOR_ADAPT, ID_MOTOR_HORIZONTAL, ID_MOTOR_VERTICAL_LEFT, COMMAND_MOTOR_CHANGE_SPEED, MODE_CHANGE_PARAMS
+import metrics
 
 # Global constants
 ## List to contain the previous slider value and the previous speed value of the vertical slider
@@ -66,11 +67,17 @@ MODE_AUTOMATIC_TEST = 1
 ## Automatic mode indicator
 MODE_AUTOMATIC = 2
 
-## Maximal horizontal distance possible without any tools attached
-MAX_HORIZONTAL  = 400
+## Position mode indicator
+MODE_POSITION = 3
 
-## Maximal vertical distance possible without any tools attached
-MAX_VERTICAL    = 400
+## Time spent by the automatic mode between the end of a movement and the next movement command (s) - Polling of its control loop
+AUTO_MODE_OVERHEAD_PER_MOVEMENT_SEC = 0.4
+
+## Maximal horizontal amplitude of the programs - The travel is 400 mm without any tools attached, the rest is kept for the tools
+MAX_HORIZONTAL  = 300
+
+## Maximal vertical amplitude of the programs - The travel is 400 mm without any tools attached, the rest is kept for the tools
+MAX_VERTICAL    = 300
 
 ## First row index
 ROW_ZERO = 0
@@ -275,6 +282,27 @@ def calculate_speed_turn_per_sec(slider_value):
 
     return gearbox_turn_per_sec
 
+def estimate_program_duration_sec(position_to_reach, number_of_turns, number_reps, slider_value, flag_is_adaptor = False):
+    """! Estimates the duration of an automatic program with the speed model of the stepper timers\n
+    Accepts numpy arrays of parameters to estimate many programs at once
+    @param position_to_reach    Amplitude of the movement in millimeters
+    @param number_of_turns      Number of turns to be done by the adaptor motor
+    @param number_reps          Number of repetitions to execute
+    @param slider_value         Slider value of the speed of the motor
+    @param flag_is_adaptor      True if the movement is done by the adaptor motor
+    @return The estimated duration in seconds
+    """
+    pulse_rate = CLOCK_FREQUENCY / (((ARR_MINIMUM - (SPEED_INCREMENT * slider_value)) + 1) * (PRESCALOR + 1))
+
+    if (flag_is_adaptor == True):
+        pulses = number_of_turns * PULSE_PER_TURN_ADAPTOR * RATIO_GEARBOX_ADAPTOR
+    else:
+        pulses = position_to_reach * PULSE_PER_MM
+
+    # Every repetition is a movement towards checkpoint B and a movement back
+    return number_reps * 2 * ((pulses / pulse_rate) + AUTO_MODE_OVERHEAD_PER_MOVEMENT_SEC)
+
+@metrics.timed("gui.slider_speed_callback")
 def slider_speed_callback(slider_value, list_slider_info, slider_type, label_slider, device):
     """! Every time a new value is set, sends the updated desired speed value to the device
     @param slider_value         The selected speed value for the vertical motor speed
@@ -674,4 +702,16 @@ def generate_sliders(self, chosen_mode, device):
         label_adaptor_speed_slider
     ))
 
-    return list_slider_items
\ No newline at end of file
+    return list_slider_items
+
+def refresh_sliders(list_slider_items):
+    """! Updates the sliders and their speed labels with the last speeds sent to the device\n
+            Used when a panel generated earlier is shown again, since the speeds can be changed from other pages
+    @param list_slider_items    The list of the items related to slider positioning, as returned by generate_sliders
+    """
+    list_sliders_info = [list_slider_vertical_info, list_slider_horizontal_info, list_slider_adaptor_info]
+    list_units = [" mm/s", " mm/s", " turn/s"]
+
+    for i in range(len(list_sliders_info)):
+        list_slider_items[i].configure(text = (str(list_sliders_info[i][SLIDER_PREV_SPEED_VALUE_MM_PER_SEC_INDEX]) + list_units[i]))
+        list_slider_items[i + 3].set(list_sliders_info[i][SLIDER_PREV_VALUE_INDEX])
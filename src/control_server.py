@@ -0,0 +1,555 @@
+##
+# @file
+# control_server.py
+#
+# @brief
+# Local control server giving external tools access to the test bench without going through the GUI. \n
+# Requests and answers are JSON objects, one per line, exchanged over a TCP socket - On localhost unless the profile of the bench gives another address and the token required in every request.
+
+# Imports
+import hmac
+import json
+import queue
+import socketserver
+from threading import Event, Thread
+
+from serial_funcs import *
+from common import list_slider_vertical_info, list_slider_horizontal_info, list_slider_adaptor_info, calculate_speed_mm_per_sec, calculate_speed_turn_per_sec, SLIDER_PREV_VALUE_INDEX, SLIDER_PREV_SPEED_VALUE_MM_PER_SEC_INDEX, SLIDER_VERTICAL_SPEED_RANGE_MAX, SLIDER_HORIZONTAL_SPEED_RANGE_MAX, SLIDER_ADAPTOR_SPEED_RANGE_MAX
+from automatic_control import AutomaticMode, PARAMETER_SPEED, PARAMETER_REPS, PARAMETER_AMPLITUDE
+from motion_profile import PROFILE_CONSTANT, LIST_PROFILE_ENTRIES
+from speed_autotune import DICT_AUTOTUNE_AXES, apply_tuned_speeds, load_bench_profile, path_bench_profile
+from position_control import DICT_POSITION_AXES
+from teach_mode import list_taught_programs
+from parameter_sweep import ParameterSweep
+from program_validation import validate_programs, validate_program_entries, get_program_errors
+from results_database import open_results_database, query_repetitions_per_day, query_failure_rate_per_program, query_mean_cycle_time_per_speed
+
+# Constants
+## Default address on which the control server listens - Only local connections are accepted
+CONTROL_SERVER_HOST = '127.0.0.1'
+
+## Addresses that only accept connections from the bench computer itself
+LIST_LOCAL_HOSTS = ['127.0.0.1', 'localhost', '::1']
+
+## Port on which the control server listens
+CONTROL_SERVER_PORT = 5555
+
+## Keys of the address of the control server in the profile of the bench - An address reachable from other machines lets a scheduler dispatch jobs to the bench
+PROFILE_KEY_CONTROL_SERVER_HOST = "control_server_host"
+PROFILE_KEY_CONTROL_SERVER_PORT = "control_server_port"
+
+## Key of the shared token in the profile of the bench - Required for an address reachable from other machines, since any client can move the bench
+PROFILE_KEY_CONTROL_SERVER_TOKEN = "control_server_token"
+
+## Maximal number of telemetry frames kept for a subscriber that does not read fast enough
+TELEMETRY_QUEUE_SIZE = 1000
+
+## Encoding of the messages exchanged with the clients
+MESSAGE_ENCODING = 'utf-8'
+
+## Jog commands available for every axis
+DICT_JOG_COMMANDS = {
+    "vertical"      : (ID_MOTOR_VERTICAL_LEFT, {"up" : COMMAND_MOTOR_VERTICAL_UP, "down" : COMMAND_MOTOR_VERTICAL_DOWN, "stop" : COMMAND_MOTOR_VERTICAL_STOP}),
+    "horizontal"    : (ID_MOTOR_HORIZONTAL, {"left" : COMMAND_MOTOR_HORIZONTAL_LEFT, "right" : COMMAND_MOTOR_HORIZONTAL_RIGHT, "stop" : COMMAND_MOTOR_HORIZONTAL_STOP}),
+    "adaptor"       : (ID_MOTOR_ADAPT, {"up" : COMMAND_MOTOR_ADAPT_UP, "down" : COMMAND_MOTOR_ADAPT_DOWN, "stop" : COMMAND_MOTOR_ADAPT_STOP})
+}
+
+## Speed related information for every axis : motor ID, slider information list and maximal slider value
+DICT_SPEED_AXES = {
+    "vertical"      : (ID_MOTOR_VERTICAL_LEFT, list_slider_vertical_info, SLIDER_VERTICAL_SPEED_RANGE_MAX),
+    "horizontal"    : (ID_MOTOR_HORIZONTAL, list_slider_horizontal_info, SLIDER_HORIZONTAL_SPEED_RANGE_MAX),
+    "adaptor"       : (ID_MOTOR_ADAPT, list_slider_adaptor_info, SLIDER_ADAPTOR_SPEED_RANGE_MAX)
+}
+
+# Functions
+def load_control_server_address(path_profile = path_bench_profile):
+    """! Gives the address on which the control server of the bench listens and the token its clients must send
+    @param path_profile     Path of the profile of the bench
+    @return The host, the port and the token (None if not required) - CONTROL_SERVER_HOST and CONTROL_SERVER_PORT if the profile does not give them
+    """
+    bench_profile = load_bench_profile(path_profile)
+
+    host = bench_profile.get(PROFILE_KEY_CONTROL_SERVER_HOST, CONTROL_SERVER_HOST)
+    port = int(bench_profile.get(PROFILE_KEY_CONTROL_SERVER_PORT, CONTROL_SERVER_PORT))
+    token = bench_profile.get(PROFILE_KEY_CONTROL_SERVER_TOKEN)
+
+    if (token == ""):
+        token = None
+
+    # Without a token, anyone on the network could move the bench
+    if ((host not in LIST_LOCAL_HOSTS) and (token == None)):
+        print("Control server kept on " + CONTROL_SERVER_HOST + ": the profile of the bench gives no " + PROFILE_KEY_CONTROL_SERVER_TOKEN + " for " + host)
+        host = CONTROL_SERVER_HOST
+
+    return host, port, token
+
+# Classes
+class RepetitionsCounter():
+    """! Stand-in for the repetitions label of the programs page when a program is started by an external tool\n
+    Keeps the last number of repetitions written by the automatic mode
+    """
+    def configure(self, text):
+        """! Mimics the configure function of a label object
+        @param text     Number of repetitions executed, as written by the automatic mode
+        """
+        self.text = text
+
+    def __init__(self):
+        """! Initialisation of a repetitions counter
+        """
+        self.text = "0"
+
+class ControlRequestHandler(socketserver.StreamRequestHandler):
+    """! Handles the requests of one client connected to the control server
+    """
+    def send_message(self, message):
+        """! Writes a JSON message followed by a new line to the client
+        @param message  Dictionnary to send
+        """
+        self.wfile.write((json.dumps(message) + '\n').encode(MESSAGE_ENCODING))
+        self.wfile.flush()
+
+    def handle(self):
+        """! Reads the client requests line by line until the connection is closed
+        """
+        for line in self.rfile:
+            line = line.decode(MESSAGE_ENCODING).strip()
+
+            if (line == ''):
+                continue
+
+            try:
+                request = json.loads(line)
+            except ValueError:
+                self.send_message({"status" : "error", "message" : "Invalid JSON"})
+                continue
+
+            if (self.server.control_services.is_authorized(request) != True):
+                self.send_message({"status" : "error", "message" : "Invalid token"})
+                continue
+
+            if (request.get("command") == "subscribe"):
+                self.server.control_services.stream_telemetry(self)
+                return
+
+            self.send_message(self.server.control_services.execute_request(request))
+
+class ControlServer():
+    """! Local control server exposing the connection, jog, speed, program and telemetry services of the test bench
+    """
+    def command_connect(self, request):
+        """! Connects the application to the given COM port and starts reading its data
+        @param request  Request containing the "port" to connect to
+        @return The answer to send to the client
+        """
+        self.thread_services.stop_serial_read_thread(self.connected_device)
+
+        self.connected_device[INDEX_STM32] = connect_to_port(request["port"])
+
+        if (self.connected_device[INDEX_STM32] == None):
+            return {"status" : "error", "message" : "COM port unavailable"}
+
+        self.thread_services.start_serial_read_thread(self.connected_device)
+
+        return {"status" : "ok"}
+
+    def command_jog(self, request):
+        """! Moves or stops an axis in manual control
+        @param request  Request containing the "axis" and the "direction" ("up", "down", "left", "right" or "stop")
+        @return The answer to send to the client
+        """
+        id, dict_commands = DICT_JOG_COMMANDS[request["axis"]]
+
+        transmit_serial_data(
+                                id,
+                                dict_commands[request["direction"]],
+                                MODE_MANUAL_CONTROL,
+                                DATA_NONE,
+                                self.connected_device)
+
+        notify_jog_listeners(id, dict_commands[request["direction"]])
+
+        return {"status" : "ok"}
+
+    def command_set_speed(self, request):
+        """! Changes the speed of an axis - The value is the same as the one given by the GUI sliders
+        @param request  Request containing the "axis" and the slider "value"
+        @return The answer to send to the client
+        """
+        id, list_slider_info, slider_range_max = DICT_SPEED_AXES[request["axis"]]
+        slider_value = int(request["value"])
+
+        if ((slider_value < 0) or (slider_value > slider_range_max)):
+            return {"status" : "error", "message" : "Speed value must be between 0 and " + str(slider_range_max)}
+
+        transmit_serial_data(
+                                id,
+                                COMMAND_MOTOR_CHANGE_SPEED,
+                                MODE_CHANGE_PARAMS,
+                                slider_value,
+                                self.connected_device)
+
+        # Keep the GUI sliders information up to date
+        if (id == ID_MOTOR_ADAPT):
+            list_slider_info[SLIDER_PREV_SPEED_VALUE_MM_PER_SEC_INDEX] = round(calculate_speed_turn_per_sec(slider_value), 2)
+        else:
+            list_slider_info[SLIDER_PREV_SPEED_VALUE_MM_PER_SEC_INDEX] = calculate_speed_mm_per_sec(slider_value)
+
+        list_slider_info[SLIDER_PREV_VALUE_INDEX] = slider_value
+
+        return {"status" : "ok", "speed" : list_slider_info[SLIDER_PREV_SPEED_VALUE_MM_PER_SEC_INDEX]}
+
+    def command_start_program(self, request):
+        """! Starts an automatic program
+        @param request  Request containing the "movement", the "amplitude" in mm, the number of "turns", the number of "reps",
+                        optionally "resume" to continue the last unfinished run of the same program,
+                        optionally the speed "profile" of the movements,
+                        optionally "offload" to let the microcontroler execute the repetitions by itself
+                        optionally the "tool" and "load" whose tuned speeds are applied before the start
+                        and optionally the "name" and "path" of the saved program, recorded with the results of the run
+        @return The answer to send to the client
+        """
+        if (request["movement"] not in AutomaticMode.list_movement_entries):
+            return {"status" : "error", "message" : "Unknown movement, must be one of " + str(AutomaticMode.list_movement_entries)}
+
+        if (request.get("profile", PROFILE_CONSTANT) not in LIST_PROFILE_ENTRIES):
+            return {"status" : "error", "message" : "Unknown profile, must be one of " + str(LIST_PROFILE_ENTRIES)}
+
+        # The program is checked against the limits of the bench as in the GUI, so that no corrupted frame can be sent
+        dict_masks = validate_program_entries([{
+                                                "movement"  : request["movement"],
+                                                "amplitude" : request["amplitude"],
+                                                "turns"     : request.get("turns", 0),
+                                                "reps"      : request["reps"]}])
+
+        if (len(dict_masks) != 0):
+            return {"status" : "error", "message" : "\n".join(get_program_errors(dict_masks, 0))}
+
+        if ("tool" in request):
+            apply_tuned_speeds(request["tool"], request.get("load", ""), self.connected_device)
+
+        self.repetitions_counter = RepetitionsCounter()
+        flag_is_started = self.thread_services.start_auto_mode_thread(
+                                                    int(request["amplitude"]),
+                                                    request["movement"],
+                                                    float(request.get("turns", 0)),
+                                                    int(request["reps"]),
+                                                    self.repetitions_counter,
+                                                    self.connected_device,
+                                                    bool(request.get("resume", False)),
+                                                    request.get("profile", PROFILE_CONSTANT),
+                                                    bool(request.get("offload", False)),
+                                                    request.get("name"),
+                                                    request.get("path"))
+
+        if (flag_is_started == False):
+            return {"status" : "error", "message" : "A movement is already in progress"}
+
+        return {"status" : "ok"}
+
+    def command_start_sweep(self, request):
+        """! Runs back to back the programs of every combination of the swept parameters
+        @param request  Request containing the "movement", the lists of "amplitudes" in mm, of "speeds" as slider values and of "turns", the number of "reps",
+                        and optionally the speed "profile" of the movements
+        @return The answer to send to the client, with the number of programs and their estimated duration in seconds
+        """
+        if (request["movement"] not in AutomaticMode.list_movement_entries):
+            return {"status" : "error", "message" : "Unknown movement, must be one of " + str(AutomaticMode.list_movement_entries)}
+
+        if (request.get("profile", PROFILE_CONSTANT) not in LIST_PROFILE_ENTRIES):
+            return {"status" : "error", "message" : "Unknown profile, must be one of " + str(LIST_PROFILE_ENTRIES)}
+
+        sweep = ParameterSweep(request.get("name", "sweep"), request["movement"], request["amplitudes"], request["speeds"], request.get("turns", [0]), int(request["reps"]))
+
+        dict_errors = sweep.check()
+        if (len(dict_errors) != 0):
+            return {"status" : "error", "message" : str({error : int(mask.sum()) for error, mask in dict_errors.items()})}
+
+        self.repetitions_counter = RepetitionsCounter()
+        if (self.thread_services.start_program_queue_thread(sweep.get_programs(), self.repetitions_counter, self.connected_device, request.get("profile", PROFILE_CONSTANT)) == False):
+            return {"status" : "error", "message" : "A movement is already in progress"}
+
+        return {"status" : "ok", "programs" : len(sweep.amplitudes), "duration" : float(sweep.estimate_durations().sum())}
+
+    def command_update_program(self, request):
+        """! Changes parameters of the running program without stopping it - They are applied at its next checkpoint and its repetitions are kept
+        @param request  Request containing at least one of the slider value of the "speed", the number of "reps" and the "amplitude" in mm
+        @return The answer to send to the client
+        """
+        dict_parameters = {}
+
+        if (PARAMETER_SPEED in request):
+            dict_parameters[PARAMETER_SPEED] = int(request[PARAMETER_SPEED])
+
+        if (PARAMETER_REPS in request):
+            dict_parameters[PARAMETER_REPS] = int(request[PARAMETER_REPS])
+
+        if (PARAMETER_AMPLITUDE in request):
+            dict_parameters[PARAMETER_AMPLITUDE] = int(request[PARAMETER_AMPLITUDE])
+
+        if (len(dict_parameters) == 0):
+            return {"status" : "error", "message" : "No parameter, must give at least one of " + str([PARAMETER_SPEED, PARAMETER_REPS, PARAMETER_AMPLITUDE])}
+
+        program = self.thread_services.get_auto_mode_program()
+        if (program == None):
+            return {"status" : "error", "message" : "No running program whose parameters can be changed"}
+
+        # The new values are checked with the movement of the running program, as a program started with them would be
+        dict_masks = validate_programs(
+                                        [program["movement"]],
+                                        [dict_parameters.get(PARAMETER_AMPLITUDE, program["amplitude"])],
+                                        [program["turns"]],
+                                        [dict_parameters.get(PARAMETER_REPS, program["reps"])],
+                                        [dict_parameters[PARAMETER_SPEED]] if (PARAMETER_SPEED in dict_parameters) else None)
+
+        if (len(dict_masks) != 0):
+            return {"status" : "error", "message" : "\n".join(get_program_errors(dict_masks, 0))}
+
+        if (self.thread_services.change_auto_mode_parameters(dict_parameters) == False):
+            return {"status" : "error", "message" : "No running program whose parameters can be changed"}
+
+        return {"status" : "ok"}
+
+    def command_pause_program(self, request):
+        """! Pauses the automatic program currently running
+        @param request  Request without any parameter
+        @return The answer to send to the client
+        """
+        self.thread_services.pause_auto_mode_thread()
+
+        return {"status" : "ok"}
+
+    def command_resume_program(self, request):
+        """! Resumes the automatic program currently paused
+        @param request  Request without any parameter
+        @return The answer to send to the client
+        """
+        self.thread_services.resume_auto_mode_thread()
+
+        return {"status" : "ok"}
+
+    def command_stop_program(self, request):
+        """! Stops the automatic program currently running and waits for the microcontroler to confirm the stop
+        @param request  Request without any parameter
+        @return The answer to send to the client, with the stop latency in seconds (None if not confirmed)
+        """
+        stop_latency = self.thread_services.stop_auto_mode_thread(True)
+
+        return {"status" : "ok", "stop_latency" : stop_latency}
+
+    def command_autotune(self, request):
+        """! Starts the tuning of the maximal speed of axes - The results are saved in the profile of the bench
+        @param request  Request containing the "axes" to tune, the "tool" mounted on the bench and the "load" applied
+        @return The answer to send to the client
+        """
+        list_axes = request.get("axes", list(DICT_AUTOTUNE_AXES))
+
+        for axis in list_axes:
+            if (axis not in DICT_AUTOTUNE_AXES):
+                return {"status" : "error", "message" : "Unknown axis, must be one of " + str(list(DICT_AUTOTUNE_AXES))}
+
+        if (self.thread_services.start_autotune_thread(list_axes, request["tool"], request.get("load", ""), self.connected_device) == False):
+            return {"status" : "error", "message" : "A movement is already in progress"}
+
+        return {"status" : "ok"}
+
+    def command_stop_autotune(self, request):
+        """! Stops the tuning of the maximal speed of axes - The axes are stopped immediately and their speed is restored
+        @param request  Request without any parameter
+        @return The answer to send to the client
+        """
+        self.thread_services.stop_autotune_thread(self.connected_device)
+
+        return {"status" : "ok"}
+
+    def command_go_to(self, request):
+        """! Moves the tool to an absolute position from the origin
+        @param request  Request containing the target of the axes to move: "horizontal" and "vertical" in mm, "screw" in turns
+        @return The answer to send to the client
+        """
+        dict_targets = {axis : float(request[axis]) for axis in DICT_POSITION_AXES if axis in request}
+
+        if (len(dict_targets) == 0):
+            return {"status" : "error", "message" : "No target, must give at least one of " + str(list(DICT_POSITION_AXES))}
+
+        if (self.thread_services.start_position_thread(dict_targets, self.connected_device) == False):
+            return {"status" : "error", "message" : "A movement is already in progress"}
+
+        return {"status" : "ok"}
+
+    def command_replay_taught(self, request):
+        """! Replays a program taught by recording jog commands
+        @param request  Request containing the "name" of the taught program and the number of "reps"
+        @return The answer to send to the client
+        """
+        if (request["name"] not in list_taught_programs()):
+            return {"status" : "error", "message" : "Unknown taught program, must be one of " + str(list_taught_programs())}
+
+        self.repetitions_counter = RepetitionsCounter()
+
+        if (self.thread_services.start_taught_program_thread(request["name"], int(request["reps"]), self.repetitions_counter, self.connected_device) == False):
+            return {"status" : "error", "message" : "A movement is already in progress"}
+
+        return {"status" : "ok"}
+
+    def command_set_origin(self, request):
+        """! Takes the current position of the tool as the origin of the positions
+        @param request  Request without any parameter
+        @return The answer to send to the client
+        """
+        self.thread_services.get_position_controller(self.connected_device).set_origin()
+
+        return {"status" : "ok"}
+
+    def command_results(self, request):
+        """! Gives the aggregated results of the runs recorded in the results database
+        @param request  Request containing optionally the time "since" which the repetitions per day are counted (s since epoch)
+        @return The answer to send to the client, with the repetitions per day, the failure rate per program and the mean cycle time per speed
+        """
+        connection = open_results_database()
+
+        try:
+            return {
+                    "status"                : "ok",
+                    "repetitions_per_day"   : query_repetitions_per_day(connection, float(request.get("since", 0))),
+                    "failure_rate"          : query_failure_rate_per_program(connection),
+                    "cycle_time_per_speed"  : query_mean_cycle_time_per_speed(connection)}
+        finally:
+            connection.close()
+
+    def command_status(self, request):
+        """! Gives the last message received from the microcontroler, the repetitions executed by the last program started from the server and the movements of the last run that lost steps
+        @param request  Request without any parameter
+        @return The answer to send to the client
+        """
+        return {
+                "status"        : "ok",
+                "connected"     : (self.connected_device[INDEX_STM32] not in (None, 0)),
+                "id"            : g_list_message_info[INDEX_ID],
+                "movement"      : g_list_message_info[INDEX_STATUS_MOVEMENT_MOTOR],
+                "state"         : g_list_message_info[INDEX_STATUS_MOTOR],
+                "position"      : g_list_message_info[INDEX_MOTOR_POSITION],
+                "repetitions"   : int(self.repetitions_counter.text),
+                "running"       : self.thread_services.is_auto_mode_running(),
+                "paused"        : self.thread_services.auto_mode_pause_thread_event.is_set(),
+                "stall_faults"  : len(self.thread_services.stall_detector.list_faults) if (self.thread_services.stall_detector != None) else 0}
+
+    def is_authorized(self, request):
+        """! Checks the token of a request
+        @param request  Dictionnary of the request, containing the "token" if the server requires one
+        @return True if the request can be executed
+        """
+        if (self.token == None):
+            return True
+
+        return hmac.compare_digest(str(request.get("token", "")).encode(MESSAGE_ENCODING), self.token.encode(MESSAGE_ENCODING))
+
+    def execute_request(self, request):
+        """! Dispatches a request to its command function
+        @param request  Dictionnary containing the "command" to execute and its parameters
+        @return The answer to send to the client
+        """
+        command_function = self.dict_commands.get(request.get("command"))
+
+        if (command_function == None):
+            return {"status" : "error", "message" : "Unknown command, must be one of " + str(list(self.dict_commands) + ["subscribe"])}
+
+        try:
+            return command_function(request)
+        except (KeyError, ValueError, TypeError) as error:
+            return {"status" : "error", "message" : "Invalid parameters: " + str(error)}
+
+    def stream_telemetry(self, handler):
+        """! Sends every received frame to a client until it disconnects
+        @param handler  Request handler of the subscribed client
+        """
+        telemetry_queue = queue.Queue(maxsize = TELEMETRY_QUEUE_SIZE)
+
+        def rx_listener(reception_time, list_message_info):
+            # Drops the oldest frame rather than slowing down the serial reading thread
+            if (telemetry_queue.full() == True):
+                try:
+                    telemetry_queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+            telemetry_queue.put_nowait((reception_time, list(list_message_info)))
+
+        add_rx_listener(rx_listener)
+        handler.send_message({"status" : "ok"})
+
+        try:
+            while (self.stop_event.is_set() != True):
+                try:
+                    reception_time, list_message_info = telemetry_queue.get(timeout = 0.5)
+                except queue.Empty:
+                    continue
+
+                handler.send_message({
+                                        "time"      : reception_time,
+                                        "id"        : list_message_info[INDEX_ID],
+                                        "movement"  : list_message_info[INDEX_STATUS_MOVEMENT_MOTOR],
+                                        "state"     : list_message_info[INDEX_STATUS_MOTOR],
+                                        "position"  : list_message_info[INDEX_MOTOR_POSITION]})
+        except OSError:
+            # Client disconnected
+            pass
+        finally:
+            remove_rx_listener(rx_listener)
+
+    def start(self):
+        """! Starts listening for clients in a separate thread
+        """
+        self.server = socketserver.ThreadingTCPServer((self.host, self.port), ControlRequestHandler)
+        self.server.daemon_threads = True
+        self.server.control_services = self
+
+        thread_server = Thread(target = self.server.serve_forever, daemon = True)
+        thread_server.start()
+
+        print("Control server listening on " + self.host + ":" + str(self.port))
+
+    def stop(self):
+        """! Stops the server and closes the telemetry streams
+        """
+        self.stop_event.set()
+
+        if (self.server != None):
+            self.server.shutdown()
+            self.server.server_close()
+
+    def __init__(self, thread_services, connected_device, host = CONTROL_SERVER_HOST, port = CONTROL_SERVER_PORT, token = None):
+        """! Initialisation of a control server
+        @param thread_services      All thread related services of the application
+        @param connected_device     Serial object list shared with the GUI
+        @param host                 Address on which to listen
+        @param port                 Port on which to listen
+        @param token                Shared token that every request must contain - No token required if None
+        """
+        self.thread_services = thread_services
+        self.connected_device = connected_device
+        self.host = host
+        self.port = port
+        self.token = token
+        self.server = None
+        self.stop_event = Event()
+        self.repetitions_counter = RepetitionsCounter()
+
+        self.dict_commands = {
+            "connect"           : self.command_connect,
+            "jog"               : self.command_jog,
+            "set_speed"         : self.command_set_speed,
+            "start_program"     : self.command_start_program,
+            "start_sweep"       : self.command_start_sweep,
+            "update_program"    : self.command_update_program,
+            "pause_program"     : self.command_pause_program,
+            "resume_program"    : self.command_resume_program,
+            "stop_program"      : self.command_stop_program,
+            "autotune"          : self.command_autotune,
+            "stop_autotune"     : self.command_stop_autotune,
+            "go_to"             : self.command_go_to,
+            "set_origin"        : self.command_set_origin,
+            "replay_taught"     : self.command_replay_taught,
+            "results"           : self.command_results,
+            "status"            : self.command_status
+        }
@@ -0,0 +1,302 @@
+##
+# @file
+# cycle_statistics.py
+#
+# @brief
+# Timing statistics of the repetitions executed by the automatic mode. \n
+# Running statistics are kept in constant memory while the run executes, and the timestamps of every movement are exported at the end of the run.
+
+# Imports
+import math
+import os
+import time
+from array import array
+
+import numpy
+
+from serial_funcs import add_rx_listener, remove_rx_listener, INDEX_ID, INDEX_STATUS_MOTOR, MOTOR_STATE_AUTO_IN_TRAJ, MOTOR_STATE_AUTO_END_OF_TRAJ
+from automatic_control import RunObserver, AutomaticMode, CHECKPOINT_B, determine_trajectory_parameters
+
+# Constants
+## Folder in which the timestamps of every run are exported
+path_statistics_folder = 'logs/statistics'
+
+## Quantiles estimated for every timing
+LIST_QUANTILES = [0.5, 0.9, 0.99]
+
+# Classes
+class StreamingStatistics():
+    """! Running count, mean, variance, minimum and maximum of a series of values (Welford algorithm)
+    """
+    def add(self, value):
+        """! Adds a value to the series
+        @param value    The value to add
+        """
+        self.count = self.count + 1
+
+        delta = value - self.mean
+        self.mean = self.mean + (delta / self.count)
+        self.m2 = self.m2 + (delta * (value - self.mean))
+
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def variance(self):
+        """! Gives the sample variance of the series
+        @return The variance - 0 if there are less than two values
+        """
+        if (self.count < 2):
+            return 0.0
+
+        return self.m2 / (self.count - 1)
+
+    def __init__(self):
+        """! Initialisation of an empty series
+        """
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+class StreamingQuantile():
+    """! Estimation of a quantile of a series of values in constant memory (P-square algorithm)
+    """
+    def parabolic(self, i, d):
+        """! Parabolic prediction of the height of a marker moved by d
+        """
+        q = self.heights
+        n = self.positions
+
+        return q[i] + d / (n[i + 1] - n[i - 1]) * ((n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def linear(self, i, d):
+        """! Linear prediction of the height of a marker moved by d
+        """
+        return self.heights[i] + d * (self.heights[i + d] - self.heights[i]) / (self.positions[i + d] - self.positions[i])
+
+    def add(self, value):
+        """! Adds a value to the series
+        @param value    The value to add
+        """
+        # The first five values initialize the markers
+        if (len(self.heights) < 5):
+            self.heights.append(value)
+            self.heights.sort()
+            return
+
+        if (value < self.heights[0]):
+            self.heights[0] = value
+            k = 0
+        elif (value >= self.heights[4]):
+            self.heights[4] = value
+            k = 3
+        else:
+            k = 0
+            while (value >= self.heights[k + 1]):
+                k = k + 1
+
+        for i in range(k + 1, 5):
+            self.positions[i] = self.positions[i] + 1
+
+        for i in range(5):
+            self.desired_positions[i] = self.desired_positions[i] + self.increments[i]
+
+        # Adjust the heights of the three middle markers
+        for i in range(1, 4):
+            d = self.desired_positions[i] - self.positions[i]
+
+            if (((d >= 1) and ((self.positions[i + 1] - self.positions[i]) > 1)) or ((d <= -1) and ((self.positions[i - 1] - self.positions[i]) < -1))):
+                d = int(math.copysign(1, d))
+                height = self.parabolic(i, d)
+
+                if ((self.heights[i - 1] < height) and (height < self.heights[i + 1])):
+                    self.heights[i] = height
+                else:
+                    self.heights[i] = self.linear(i, d)
+
+                self.positions[i] = self.positions[i] + d
+
+    def value(self):
+        """! Gives the current estimation of the quantile
+        @return The estimated quantile - nan if the series is empty
+        """
+        if (len(self.heights) == 0):
+            return math.nan
+
+        if (len(self.heights) < 5):
+            return self.heights[min(len(self.heights) - 1, int(self.quantile * len(self.heights)))]
+
+        return self.heights[2]
+
+    def __init__(self, quantile):
+        """! Initialisation of the estimation of a quantile
+        @param quantile     The quantile to estimate, between 0 and 1
+        """
+        self.quantile = quantile
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired_positions = [1, 1 + 2 * quantile, 1 + 4 * quantile, 3 + 2 * quantile, 5]
+        self.increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+
+class TimingStatistics():
+    """! Running statistics and quantiles of one timing of the repetitions
+    """
+    def add(self, value):
+        """! Adds a timing to the statistics
+        @param value    The timing in seconds
+        """
+        self.statistics.add(value)
+
+        for quantile in self.list_quantiles:
+            quantile.add(value)
+
+    def summary(self):
+        """! Gives the current statistics of the timing
+        @return A dictionnary of the statistics in seconds
+        """
+        dict_summary = {
+                        "count"     : self.statistics.count,
+                        "mean"      : self.statistics.mean,
+                        "std"       : math.sqrt(self.statistics.variance()),
+                        "min"       : self.statistics.minimum,
+                        "max"       : self.statistics.maximum}
+
+        for quantile in self.list_quantiles:
+            dict_summary["p" + str(round(quantile.quantile * 100))] = quantile.value()
+
+        return dict_summary
+
+    def __init__(self):
+        """! Initialisation of the statistics of a timing
+        """
+        self.statistics = StreamingStatistics()
+        self.list_quantiles = [StreamingQuantile(quantile) for quantile in LIST_QUANTILES]
+
+class CycleStatistics(RunObserver):
+    """! Timestamps every movement of an automatic run and keeps statistics on the cycle time, the movement duration and the response time of the microcontroler\n
+    The trajectory timestamps are the reception times of the frames, so they do not depend on the polling period of the automatic mode
+    """
+    def rx_listener(self, reception_time, list_message_info):
+        """! Keeps the reception time of the last trajectory state frames
+        """
+        # Only the motor of the run sends its trajectory states - Encoders send their count in place of the state
+        if (list_message_info[INDEX_ID] != self.motor_id):
+            return
+
+        if (list_message_info[INDEX_STATUS_MOTOR] == MOTOR_STATE_AUTO_IN_TRAJ):
+            if (self.time_last_in_trajectory <= self.time_last_command):
+                self.time_last_in_trajectory = reception_time
+
+        elif (list_message_info[INDEX_STATUS_MOTOR] == MOTOR_STATE_AUTO_END_OF_TRAJ):
+            # An end of trajectory received before the current movement started belongs to the previous movement
+            if ((self.time_last_end_of_trajectory <= self.time_last_command) and (self.time_last_in_trajectory > self.time_last_command)):
+                self.time_last_end_of_trajectory = reception_time
+
+    def on_run_start(self, program, counter_repetitions):
+        """! Starts following the frames received for the run
+        """
+        self.program = program
+        self.motor_id, command_a, command_b = determine_trajectory_parameters(program["movement"], AutomaticMode.list_movement_entries)
+        add_rx_listener(self.rx_listener)
+
+    def on_command_sent(self, counter_repetitions, checkpoint_to_reach):
+        """! Timestamps the movement command and measures the cycle time at the start of every repetition
+        """
+        self.time_last_command = time.time()
+
+        self.array_repetitions.append(counter_repetitions)
+        self.array_checkpoints.append(checkpoint_to_reach)
+        self.array_time_command.append(self.time_last_command)
+        self.array_time_in_trajectory.append(math.nan)
+        self.array_time_end_of_trajectory.append(math.nan)
+
+        # A repetition starts with the movement towards checkpoint B
+        if (checkpoint_to_reach == CHECKPOINT_B):
+            if (self.time_last_repetition_start != None):
+                self.cycle_time.add(self.time_last_command - self.time_last_repetition_start)
+
+            self.time_last_repetition_start = self.time_last_command
+
+    def on_trajectory_started(self, counter_repetitions):
+        """! Timestamps the confirmation of the movement
+        """
+        if (self.time_last_in_trajectory < self.time_last_command):
+            self.time_last_in_trajectory = time.time()
+
+        self.array_time_in_trajectory[-1] = self.time_last_in_trajectory
+        self.response_time.add(self.time_last_in_trajectory - self.time_last_command)
+
+    def on_trajectory_ended(self, counter_repetitions, checkpoint_reached):
+        """! Timestamps the end of the movement
+        """
+        if (self.time_last_end_of_trajectory < self.time_last_command):
+            self.time_last_end_of_trajectory = time.time()
+
+        self.array_time_end_of_trajectory[-1] = self.time_last_end_of_trajectory
+        self.movement_duration.add(self.time_last_end_of_trajectory - self.array_time_in_trajectory[-1])
+
+    def on_run_end(self, counter_repetitions, flag_is_stopped):
+        """! Stops following the frames and exports the timestamps of the run
+        """
+        remove_rx_listener(self.rx_listener)
+
+        self.path_export = self.export()
+        print("Cycle time: ", self.cycle_time.summary())
+
+    def summary(self):
+        """! Gives the current statistics of the run
+        @return A dictionnary of the cycle time, movement duration and response time statistics in seconds
+        """
+        return {
+                "cycle_time"        : self.cycle_time.summary(),
+                "movement_duration" : self.movement_duration.summary(),
+                "response_time"     : self.response_time.summary()}
+
+    def get_arrays(self):
+        """! Gives the timestamps of every movement of the run
+        @return A dictionnary of numpy arrays, one value per movement command sent
+        """
+        return {
+                "repetition"            : numpy.frombuffer(self.array_repetitions, dtype = numpy.int64).copy(),
+                "checkpoint"            : numpy.frombuffer(self.array_checkpoints, dtype = numpy.int8).copy(),
+                "time_command"          : numpy.frombuffer(self.array_time_command, dtype = numpy.float64).copy(),
+                "time_in_trajectory"    : numpy.frombuffer(self.array_time_in_trajectory, dtype = numpy.float64).copy(),
+                "time_end_of_trajectory": numpy.frombuffer(self.array_time_end_of_trajectory, dtype = numpy.float64).copy()}
+
+    def export(self):
+        """! Saves the timestamps of every movement of the run in a numpy file
+        @return The path of the exported file
+        """
+        os.makedirs(path_statistics_folder, exist_ok = True)
+
+        # The milliseconds keep apart the runs ending in the same second
+        time_now = time.time()
+        path_export = os.path.join(path_statistics_folder, 'cycles_' + time.strftime('%Y%m%d_%H%M%S', time.localtime(time_now)) + ('_%03d' % ((time_now % 1) * 1000)) + '.npz')
+
+        numpy.savez(path_export, **self.get_arrays())
+
+        return path_export
+
+    def __init__(self):
+        """! Initialisation of the statistics of a run
+        """
+        self.program = None
+        self.motor_id = None
+        self.path_export = None
+
+        self.cycle_time = TimingStatistics()
+        self.movement_duration = TimingStatistics()
+        self.response_time = TimingStatistics()
+
+        self.time_last_command = 0.0
+        self.time_last_in_trajectory = 0.0
+        self.time_last_end_of_trajectory = 0.0
+        self.time_last_repetition_start = None
+
+        # Typed arrays keep the appends cheap and compact during long runs
+        self.array_repetitions = array('q')
+        self.array_checkpoints = array('b')
+        self.array_time_command = array('d')
+        self.array_time_in_trajectory = array('d')
+        self.array_time_end_of_trajectory = array('d')
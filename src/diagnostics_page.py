@@ -0,0 +1,139 @@
+##
+# @file
+# diagnostics_page.py
+#
+# @brief
+# This file acts as the setup file for the diagnostics page of the GUI. \n
+# It shows the metrics recorded by the serial, control and GUI code.
+
+# Imports
+import customtkinter
+
+from common import *
+import metrics
+
+# Constants
+## Period of refresh of the shown metrics (ms)
+DIAGNOSTICS_REFRESH_PERIOD_MS = 1000
+
+# Classes
+class DiagnosticsPageFrame(customtkinter.CTkFrame):
+    """! Diagnostics page class for the Zimmer Test Bench\n
+    Defines the components and callback functions of the diagnostics page
+    """
+    def switch_metrics_click(self, switch_metrics):
+        """! Enables or disables the recording of the metrics
+        @param switch_metrics   The switch object
+        """
+        metrics.enable_metrics(switch_metrics.get() == 1)
+
+    def button_dump_click(self, label_status):
+        """! Writes the current metrics in the dump file
+        @param label_status     Label object to show the path of the written file
+        """
+        path_dump = metrics.dump_metrics()
+        label_status.configure(text = "Metrics written in " + path_dump)
+
+    def button_reset_click(self, label_status):
+        """! Clears the recorded metrics
+        @param label_status     Label object to show the result of the action
+        """
+        metrics.reset_metrics()
+        label_status.configure(text = "Metrics cleared")
+
+    def format_workers_health(self):
+        """! Formats the state of the threads started by the thread manager
+        @return The formatted text
+        """
+        list_lines = ["Workers"]
+
+        for health in self.thread_services.get_workers_health():
+            if (health["alive"] == True):
+                state = f"running for {health['uptime']:.0f} s"
+            else:
+                state = "stopped"
+
+            list_lines.append("    " + health["name"] + ": " + state + ", restarts=" + str(health["restarts"]) + ", last error=" + str(health["last_error"]))
+
+        return '\n'.join(list_lines)
+
+    def refresh_metrics(self, textbox_metrics):
+        """! Shows the current metrics and schedules the next refresh
+        @param textbox_metrics  Textbox object in which the metrics are written
+        """
+        # Only redraw when the page is visible
+        if (self.winfo_ismapped() == True):
+            textbox_metrics.configure(state = "normal")
+            textbox_metrics.delete("1.0", "end")
+            textbox_metrics.insert("1.0", metrics.format_metrics_snapshot(metrics.get_metrics_snapshot()) + '\n\n' + self.format_workers_health())
+            textbox_metrics.configure(state = "disabled")
+
+        self.after(DIAGNOSTICS_REFRESH_PERIOD_MS, lambda : self.refresh_metrics(textbox_metrics))
+
+    def __init__(self, master, thread_services, connected_device, **kwargs):
+        """! Initialisation of a Diagnostics Page Frame
+        """
+        super().__init__(master, **kwargs)
+
+        self.thread_services = thread_services
+
+        # Configure the grid system with specific weights
+        self.grid_rowconfigure(ROW_ONE, weight = 1)
+        self.grid_columnconfigure(COLUMN_THREE, weight = 1)
+
+        switch_metrics = customtkinter.CTkSwitch(
+                                                    master  = self,
+                                                    text    = "Record metrics")
+        switch_metrics.grid(
+                            row     = ROW_ZERO,
+                            column  = COLUMN_ZERO,
+                            padx    = PAD_X_USUAL,
+                            pady    = PAD_Y_USUAL,
+                            sticky  = 'nsew')
+        if (metrics.flag_metrics_enabled == True):
+            switch_metrics.select()
+        switch_metrics.configure(command = lambda : self.switch_metrics_click(switch_metrics))
+
+        button_dump = button_generate(
+                                        self,
+                                        ROW_ZERO,
+                                        COLUMN_ONE,
+                                        1,
+                                        1,
+                                        PAD_X_USUAL,
+                                        PAD_Y_USUAL,
+                                        "Dump to file")
+        button_reset = button_generate(
+                                        self,
+                                        ROW_ZERO,
+                                        COLUMN_TWO,
+                                        1,
+                                        1,
+                                        PAD_X_USUAL,
+                                        PAD_Y_USUAL,
+                                        "Reset")
+        label_status = label_generate(
+                                        self,
+                                        ROW_ZERO,
+                                        COLUMN_THREE,
+                                        1,
+                                        1,
+                                        PAD_X_USUAL,
+                                        PAD_Y_USUAL,
+                                        "")
+
+        button_dump.configure(command = lambda : self.button_dump_click(label_status))
+        button_reset.configure(command = lambda : self.button_reset_click(label_status))
+
+        textbox_metrics = customtkinter.CTkTextbox(
+                                                    master  = self,
+                                                    font    = ("Courier", 14))
+        textbox_metrics.grid(
+                                row         = ROW_ONE,
+                                column      = COLUMN_ZERO,
+                                columnspan  = 4,
+                                padx        = PAD_X_USUAL,
+                                pady        = PAD_Y_USUAL,
+                                sticky      = 'nsew')
+
+        self.refresh_metrics(textbox_metrics)
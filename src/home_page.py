@@ -17,8 +17,15 @@ import time
 from serial_funcs import *
 from automatic_control import AutomaticMode
 from common import *
+from position_control import DICT_POSITION_AXES
+from teach_mode import TeachRecorder, list_taught_programs
+from program_validation import validate_program_entries, get_program_errors
 import app
 
+# Constants
+## Period of refresh of the position shown in the position mode panel (ms)
+POSITION_REFRESH_PERIOD_MS = 500
+
 ## Classes
 class HomePageFrame(customtkinter.CTkFrame):
     """! Home page class for the Zimmer Test Bench\n
@@ -104,65 +111,63 @@ class HomePageFrame(customtkinter.CTkFrame):
         
         return list_buttons_manual_control
     
-    def button_back_click(self, btn_back, list_items_to_delete, thread_services, connected_device):
-        """! Clears all items that were placed on the frame and replaces the control buttons
-        @param btn_back                 The back button object
-        @param list_items_to_delete     The list of items to clear off the grid of the frame
+    def show_mode_panel(self, chosen_mode):
+        """! Places back on the grid all items of a mode panel that was already generated
+        @param chosen_mode  Manual or automatic test mode
         """
-        btn_back.grid_forget()
+        for item in self.dict_mode_panels[chosen_mode]:
+            # grid_remove keeps the grid options of the item, they are restored without any argument
+            item.grid()
 
-        for i in range(len(list_items_to_delete)):
-            # Need to check if item is a list passed in the list of items to delete
-            if (isinstance(list_items_to_delete[i], type([])) == True):
-                for j in range(len(list_items_to_delete[i])):
-                    list_items_to_delete[i][j].grid_forget()
-            else:
-                list_items_to_delete[i].grid_forget()
+        refresh_sliders(self.dict_mode_sliders[chosen_mode])
+
+    def hide_mode_panel(self, chosen_mode):
+        """! Removes from the grid all items of a mode panel without destroying them
+        @param chosen_mode  Manual or automatic test mode
+        """
+        for item in self.dict_mode_panels[chosen_mode]:
+            item.grid_remove()
+
+    def button_back_click(self, chosen_mode):
+        """! Hides the items of the current mode panel and replaces the mode selection buttons
+        @param chosen_mode  Mode of the panel to hide
+        """
+        self.hide_mode_panel(chosen_mode)
 
         self.grid_rowconfigure((ROW_ZERO, ROW_ONE), weight = 0)
         self.grid_columnconfigure(0, weight = 0)
-    
-        btn_manual_mode = button_generate(
-                                            self, 
-                                            ROW_ZERO, 
-                                            COLUMN_ONE, 
-                                            1, 
-                                            1, 
-                                            PAD_X_USUAL, 
-                                            PAD_Y_USUAL, 
-                                            "Manual Mode")
-        btn_auto_mode   = button_generate(
-                                            self, 
-                                            ROW_ONE, 
-                                            COLUMN_ZERO, 
-                                            1, 
-                                            1, 
-                                            PAD_X_USUAL, 
-                                            PAD_Y_USUAL, 
-                                            "Automatic mode")
 
-        btn_manual_mode.configure(command = lambda : self.button_manual_mode_click(btn_auto_mode, btn_manual_mode, thread_services, connected_device))
-        btn_auto_mode.configure(command = lambda : self.button_auto_mode_click(btn_auto_mode, btn_manual_mode, thread_services, connected_device))
+        self.btn_manual_mode.grid()
+        self.btn_auto_mode.grid()
+        self.btn_position_mode.grid()
 
-    def button_submit_test_click(self, button_submit, entry_position, entry_turns, combobox_direction, thread_services, connected_device):
+    def button_submit_test_click(self, button_submit, entry_position, entry_turns, combobox_direction, label_validation, thread_services, connected_device):
         """! Verifies the inputs given in the automatic mode control page and starts the appropriate thread to test the desired movement
         @param button_submit        The submit button object
         @param entry_position       Contains the number of mm of movement to be done
         @param entry_turns          Contains the number of turns to be done
         @param combobox_direction   Contains the combination of directions of the movement
+        @param label_validation     Label showing the errors of the inputs
         @param thread_services      All thread related services to be dispatched throughout the different GUI frames 
         @param connected_device     The Serial object that is currently connected to the application
         """
-        desired_position = int(entry_position.get())
-        desired_direction = combobox_direction.get()
-        desired_turns = float(entry_turns.get())
-
         error_msg = None
 
-        #error_msg = verify_test_inputs()
+        if (button_submit.cget("text") == "Test One Repetition"):
+            program = {"movement" : combobox_direction.get(), "amplitude" : entry_position.get(), "turns" : entry_turns.get(), "reps" : 1}
+            list_errors = get_program_errors(validate_program_entries([program]), 0)
+
+            if (len(list_errors) != 0):
+                error_msg = "\n".join(list_errors)
+
+            label_validation.configure(text = error_msg if (error_msg != None) else "")
         
         if (error_msg == None):
             if (button_submit.cget("text") == "Test One Repetition"):
+                desired_position = int(entry_position.get())
+                desired_direction = combobox_direction.get()
+                desired_turns = float(entry_turns.get())
+
                 button_submit.configure(text = "Stop test", fg_color = '#EE3B3B')
 
                 if (self.flag_is_auto_test_thread_stopped == True):
@@ -176,15 +181,207 @@ class HomePageFrame(customtkinter.CTkFrame):
                     self.flag_is_auto_test_thread_stopped = True
 
 
-    def button_auto_mode_click(self, button_manual_mode, button_auto_mode, thread_services, device):
-        """! Generates and places all items related to the automatic mode
-        @param button_manual_mode   Button object for the manual mode option
-        @param button_auto_mode     Button object for the automatic mode option
+    def refresh_position(self, label_position, position_controller):
+        """! Shows the current position of the axes while the position mode panel is shown
+        @param label_position       Label showing the position
+        @param position_controller  PositionController following the position of the tool
+        """
+        if (label_position.winfo_ismapped() == True):
+            list_positions = []
+            for axis in DICT_POSITION_AXES:
+                text_position = axis + ": " + str(round(position_controller.get_position(axis), 2))
+
+                if (position_controller.is_closed_loop(axis) == False):
+                    text_position = text_position + " (open loop)"
+
+                list_positions.append(text_position)
+
+            label_position.configure(text = '\n'.join(list_positions))
+
+        self.after(POSITION_REFRESH_PERIOD_MS, lambda : self.refresh_position(label_position, position_controller))
+
+    def button_go_to_click(self, list_entries_targets, thread_services, device):
+        """! Verifies the target position and starts the movement of the tool
+        @param list_entries_targets     Entries of the target of every axis, in the order of DICT_POSITION_AXES - Empty entries keep the axis in place
+        @param thread_services          All thread related services to be dispatched throughout the different GUI frames
+        @param device                   The serial object connected to the application
+        """
+        dict_targets = {}
+
+        for axis, entry_target in zip(DICT_POSITION_AXES, list_entries_targets):
+            if (entry_target.get() == ""):
+                continue
+
+            try:
+                dict_targets[axis] = float(entry_target.get())
+            except ValueError:
+                CTkMessagebox(title = "Error", message = "Invalid " + axis + " target", icon = "cancel")
+                return
+
+        if (len(dict_targets) == 0):
+            CTkMessagebox(title = "Error", message = "Missing target position", icon = "cancel")
+            return
+
+        if (thread_services.start_position_thread(dict_targets, device) == False):
+            CTkMessagebox(title = "Error", message = "A movement is already in progress", icon = "cancel")
+
+    def button_position_mode_click(self, thread_services, device):
+        """! Shows all items related to the position mode - They are generated the first time only
+        @param thread_services      All thread related services to be dispatched throughout the different GUI frames
+        @param device               The serial object connected to the application
+        """
+        self.btn_manual_mode.grid_remove()
+        self.btn_auto_mode.grid_remove()
+        self.btn_position_mode.grid_remove()
+
+        self.rowconfigure((ROW_ZERO, ROW_SIX), weight = 0)
+        self.rowconfigure(ROW_SEVEN, weight = 1)
+        self.columnconfigure((COLUMN_ZERO, COLUMN_THREE), weight = 0)
+        self.columnconfigure((COLUMN_FOUR, COLUMN_SIX), weight = 2)
+        self.columnconfigure((COLUMN_SEVEN, COLUMN_EIGHT), weight = 0)
+
+        if (MODE_POSITION in self.dict_mode_panels):
+            self.show_mode_panel(MODE_POSITION)
+            return
+
+        position_controller = thread_services.get_position_controller(device)
+
+        label_title_frame = self.generate_title_frame("POSITION MODE")
+
+        # Target of every axis: horizontal and vertical in mm, screw in turns
+        list_items_targets = []
+        list_entries_targets = []
+        list_target_texts = ["Horizontal (mm)", "Vertical (mm)", "Screw (turns)"]
+
+        for i in range(len(list_target_texts)):
+            label_target = label_generate(
+                                            self,
+                                            ROW_ONE + (2 * i),
+                                            COLUMN_ONE,
+                                            1,
+                                            1,
+                                            PAD_X_USUAL,
+                                            (PAD_Y_USUAL, 5),
+                                            list_target_texts[i])
+            entry_target = entry_generate(
+                                            self,
+                                            ROW_TWO + (2 * i),
+                                            COLUMN_ONE,
+                                            1,
+                                            1,
+                                            PAD_X_USUAL,
+                                            (0, PAD_Y_USUAL),
+                                            "Keep position")
+
+            list_items_targets.extend((label_target, entry_target))
+            list_entries_targets.append(entry_target)
+
+        label_position = label_generate(
+                                        self,
+                                        ROW_ONE,
+                                        COLUMN_TWO,
+                                        3,
+                                        1,
+                                        PAD_X_USUAL,
+                                        PAD_Y_USUAL,
+                                        "")
+
+        list_slider_items = generate_sliders(self, MODE_AUTOMATIC_TEST, device)
+
+        # Create frame for control buttons
+        control_buttons_container = customtkinter.CTkFrame(self)
+        control_buttons_container.grid(
+                                        row         = ROW_SEVEN,
+                                        column      = COLUMN_ZERO,
+                                        rowspan     = 1,
+                                        columnspan  = 9,
+                                        padx        = PAD_X_USUAL,
+                                        pady        = PAD_Y_USUAL,
+                                        sticky      = 'nsew')
+
+        control_buttons_container.grid_rowconfigure(ROW_ZERO, weight = 1)
+        control_buttons_container.grid_columnconfigure((COLUMN_ZERO, COLUMN_THREE), weight = 1)
+
+        btn_go_to = button_generate(
+                                    control_buttons_container,
+                                    ROW_ZERO,
+                                    COLUMN_ZERO,
+                                    1,
+                                    1,
+                                    PAD_X_USUAL,
+                                    PAD_Y_USUAL,
+                                    "Go to position")
+        btn_go_to.configure(
+                            command = lambda : self.button_go_to_click(list_entries_targets, thread_services, device),
+                            fg_color = '#66CD00',
+                            text_color = '#000000',
+                            height = 50)
+
+        btn_stop = button_generate(
+                                    control_buttons_container,
+                                    ROW_ZERO,
+                                    COLUMN_ONE,
+                                    1,
+                                    1,
+                                    PAD_X_USUAL,
+                                    PAD_Y_USUAL,
+                                    "Stop")
+        btn_stop.configure(
+                            command = lambda : thread_services.stop_position_thread(device),
+                            fg_color = '#EE3B3B',
+                            height = 50)
+
+        btn_set_origin = button_generate(
+                                            control_buttons_container,
+                                            ROW_ZERO,
+                                            COLUMN_TWO,
+                                            1,
+                                            1,
+                                            PAD_X_USUAL,
+                                            PAD_Y_USUAL,
+                                            "Set origin")
+        btn_set_origin.configure(command = position_controller.set_origin, height = 50)
+
+        btn_calibrate = button_generate(
+                                        control_buttons_container,
+                                        ROW_ZERO,
+                                        COLUMN_THREE,
+                                        1,
+                                        1,
+                                        PAD_X_USUAL,
+                                        PAD_Y_USUAL,
+                                        "Calibrate encoders")
+        btn_calibrate.configure(command = lambda : thread_services.start_position_calibration_thread(["horizontal", "vertical"], device), height = 50)
+
+        btn_back = button_generate(
+                                    self,
+                                    ROW_ZERO,
+                                    COLUMN_EIGHT,
+                                    1,
+                                    1,
+                                    PAD_X_USUAL,
+                                    PAD_Y_USUAL,
+                                    "Back")
+        btn_back.configure(command = lambda : self.button_back_click(MODE_POSITION))
+
+        # Keep the panel to show it again instead of generating new items
+        self.dict_mode_sliders[MODE_POSITION] = list_slider_items
+        self.dict_mode_panels[MODE_POSITION] = [
+                                                label_title_frame,
+                                                label_position,
+                                                control_buttons_container,
+                                                btn_back] + list_items_targets + list_slider_items
+
+        self.refresh_position(label_position, position_controller)
+
+    def button_auto_mode_click(self, thread_services, device):
+        """! Shows all items related to the automatic mode - They are generated the first time only
         @param thread_services      All thread related services to be dispatched throughout the different GUI frames
         @param device               The serial object connected to the application
         """
-        button_manual_mode.grid_forget()
-        button_auto_mode.grid_forget()
+        self.btn_manual_mode.grid_remove()
+        self.btn_auto_mode.grid_remove()
+        self.btn_position_mode.grid_remove()
 
         self.rowconfigure((ROW_ZERO, ROW_SIX), weight = 0)
         self.rowconfigure(ROW_SEVEN, weight = 1)
@@ -192,6 +389,10 @@ class HomePageFrame(customtkinter.CTkFrame):
         self.columnconfigure((COLUMN_FOUR, COLUMN_SIX), weight = 2)
         self.columnconfigure((COLUMN_SEVEN, COLUMN_EIGHT), weight = 0)
 
+        if (MODE_AUTOMATIC_TEST in self.dict_mode_panels):
+            self.show_mode_panel(MODE_AUTOMATIC_TEST)
+            return
+
         label_title_frame = self.generate_title_frame("AUTOMATIC MODE")
 
         # Generate position control inputs
@@ -283,25 +484,24 @@ class HomePageFrame(customtkinter.CTkFrame):
                                             PAD_Y_USUAL, 
                                             "Test One Repetition")
         btn_submit_test.configure(
-                                    command = lambda : self.button_submit_test_click(btn_submit_test, entry_desired_position, entry_desired_turns, combobox_movement, thread_services, device), 
+                                    command = lambda : self.button_submit_test_click(btn_submit_test, entry_desired_position, entry_desired_turns, combobox_movement, label_validation, thread_services, device), 
                                     fg_color = '#66CD00', 
                                     text_color = '#000000',
                                     width = 150,
                                     height = 50)
-    
-        # Generate return button and items to delete when pressed
-        list_items_to_delete = [
-                                label_desired_position,
-                                entry_desired_position,
-                                list_slider_items,
-                                combobox_movement,
-                                btn_submit_test,
-                                label_desired_turns,
-                                entry_desired_turns,
-                                label_title_frame,
-                                label_movement,
-                                control_buttons_container]
 
+        # Errors of the inputs, shown without blocking the page
+        label_validation = label_generate(
+                                            control_buttons_container,
+                                            ROW_ZERO,
+                                            COLUMN_ONE,
+                                            1,
+                                            1,
+                                            PAD_X_USUAL,
+                                            PAD_Y_USUAL,
+                                            "")
+        label_validation.configure(text_color = '#EE3B3B', justify = "left")
+    
         btn_back = button_generate(
                                     self, 
                                     ROW_ZERO, 
@@ -311,24 +511,89 @@ class HomePageFrame(customtkinter.CTkFrame):
                                     PAD_X_USUAL, 
                                     PAD_Y_USUAL, 
                                     "Back")
-        btn_back.configure(command = lambda : self.button_back_click(btn_back, list_items_to_delete, thread_services, device))
+        btn_back.configure(command = lambda : self.button_back_click(MODE_AUTOMATIC_TEST))
+
+        # Keep the panel to show it again instead of generating new items
+        self.dict_mode_sliders[MODE_AUTOMATIC_TEST] = list_slider_items
+        self.dict_mode_panels[MODE_AUTOMATIC_TEST] = [
+                                                        label_desired_position,
+                                                        entry_desired_position,
+                                                        combobox_movement,
+                                                        label_desired_turns,
+                                                        entry_desired_turns,
+                                                        label_title_frame,
+                                                        label_movement,
+                                                        control_buttons_container,
+                                                        btn_back] + list_slider_items
+
+    def button_record_path_click(self, button_record, thread_services, device):
+        """! Starts or stops the recording of the jog commands, and saves the recorded path as a taught program
+        @param button_record        The record button object
+        @param thread_services      All thread related services to be dispatched throughout the different GUI frames
+        @param device               The serial object connected to the application
+        """
+        if (self.teach_recorder == None):
+            self.teach_recorder = TeachRecorder(thread_services.get_position_controller(device))
+            self.teach_recorder.start()
+
+            button_record.configure(text = "Stop recording", fg_color = '#EE3B3B')
+            return
+
+        name = customtkinter.CTkInputDialog(text = "Name of the taught program", title = "Save path").get_input()
+        button_record.configure(text = "Record path", fg_color = '#66CD00')
+
+        if ((name == None) or (name == "")):
+            # The recording is discarded
+            self.teach_recorder.stop_recording()
+        elif (self.teach_recorder.stop(name) == None):
+            CTkMessagebox(title = "Error", message = "No movement recorded", icon = "cancel")
+
+        self.teach_recorder = None
+
+    def button_replay_path_click(self, label_reps_actual, thread_services, device):
+        """! Asks for a taught program and its number of repetitions, then replays it
+        @param label_reps_actual    Label showing the repetitions executed
+        @param thread_services      All thread related services to be dispatched throughout the different GUI frames
+        @param device               The serial object connected to the application
+        """
+        list_names = list_taught_programs()
+
+        if (len(list_names) == 0):
+            CTkMessagebox(title = "Error", message = "No taught program", icon = "cancel")
+            return
 
-    def button_manual_mode_click(self, button_manual_mode, button_auto_mode, thread_services, device):
-        """! Generates and places all items related to the manual mode
-        @param button_manual_mode   Button object for the manual mode option
-        @param button_auto_mode     Button object for the automatic mode option
-        @param thread_services
+        name = customtkinter.CTkInputDialog(text = "Taught program to replay:\n" + '\n'.join(list_names), title = "Replay path").get_input()
+        if (name not in list_names):
+            return
+
+        try:
+            number_reps = int(customtkinter.CTkInputDialog(text = "Number of repetitions", title = "Replay path").get_input())
+        except (TypeError, ValueError):
+            CTkMessagebox(title = "Error", message = "Invalid number of repetitions", icon = "cancel")
+            return
+
+        if (thread_services.start_taught_program_thread(name, number_reps, label_reps_actual, device) == False):
+            CTkMessagebox(title = "Error", message = "A movement is already in progress", icon = "cancel")
+
+    def button_manual_mode_click(self, thread_services, device):
+        """! Shows all items related to the manual mode - They are generated the first time only
+        @param thread_services      All thread related services to be dispatched throughout the different GUI frames
         @param device               Serial object currently connected to the application
         """
         # Reset the grid positioning
-        button_manual_mode.grid_forget()
-        button_auto_mode.grid_forget()
+        self.btn_manual_mode.grid_remove()
+        self.btn_auto_mode.grid_remove()
+        self.btn_position_mode.grid_remove()
 
         self.rowconfigure((ROW_ZERO, ROW_SIX), weight = 0)
         self.columnconfigure((COLUMN_ZERO, COLUMN_THREE), weight = 0)
         self.columnconfigure((COLUMN_FOUR, COLUMN_SIX), weight = 2)
         self.columnconfigure((COLUMN_SEVEN, COLUMN_EIGHT), weight = 0)
 
+        if (MODE_MANUAL in self.dict_mode_panels):
+            self.show_mode_panel(MODE_MANUAL)
+            return
+
         label_title_frame = self.generate_title_frame("MANUAL_MODE")
 
         # Generate direction buttons
@@ -336,12 +601,6 @@ class HomePageFrame(customtkinter.CTkFrame):
 
         # Generate sliders
         list_slider_items = generate_sliders(self, MODE_MANUAL, device)
-        
-        # Generate return button and items to delete when pressed
-        list_items_to_delete = [
-                                self.list_directions_buttons,
-                                list_slider_items,
-                                label_title_frame]
 
         btn_back = button_generate(
                                     self,
@@ -352,7 +611,63 @@ class HomePageFrame(customtkinter.CTkFrame):
                                     PAD_X_USUAL, 
                                     PAD_Y_USUAL, 
                                     "Back")
-        btn_back.configure(command = lambda : self.button_back_click(btn_back, list_items_to_delete, thread_services, device))
+        btn_back.configure(command = lambda : self.button_back_click(MODE_MANUAL))
+
+        # Teach mode: the jog commands are recorded as a program
+        teach_buttons_container = customtkinter.CTkFrame(self)
+        teach_buttons_container.grid(
+                                        row         = ROW_SEVEN,
+                                        column      = COLUMN_ZERO,
+                                        rowspan     = 1,
+                                        columnspan  = 9,
+                                        padx        = PAD_X_USUAL,
+                                        pady        = PAD_Y_USUAL,
+                                        sticky      = 'nsew')
+
+        teach_buttons_container.grid_rowconfigure(ROW_ZERO, weight = 1)
+        teach_buttons_container.grid_columnconfigure((COLUMN_ZERO, COLUMN_ONE), weight = 1)
+
+        btn_record_path = button_generate(
+                                            teach_buttons_container,
+                                            ROW_ZERO,
+                                            COLUMN_ZERO,
+                                            1,
+                                            1,
+                                            PAD_X_USUAL,
+                                            PAD_Y_USUAL,
+                                            "Record path")
+        btn_record_path.configure(
+                                    command = lambda : self.button_record_path_click(btn_record_path, thread_services, device),
+                                    fg_color = '#66CD00',
+                                    text_color = '#000000',
+                                    height = 50)
+
+        label_reps_replayed = label_generate(
+                                                teach_buttons_container,
+                                                ROW_ZERO,
+                                                COLUMN_TWO,
+                                                1,
+                                                1,
+                                                PAD_X_USUAL,
+                                                PAD_Y_USUAL,
+                                                "0")
+
+        btn_replay_path = button_generate(
+                                            teach_buttons_container,
+                                            ROW_ZERO,
+                                            COLUMN_ONE,
+                                            1,
+                                            1,
+                                            PAD_X_USUAL,
+                                            PAD_Y_USUAL,
+                                            "Replay path")
+        btn_replay_path.configure(
+                                    command = lambda : self.button_replay_path_click(label_reps_replayed, thread_services, device),
+                                    height = 50)
+
+        # Keep the panel to show it again instead of generating new items
+        self.dict_mode_sliders[MODE_MANUAL] = list_slider_items
+        self.dict_mode_panels[MODE_MANUAL] = [label_title_frame, btn_back, teach_buttons_container] + self.list_directions_buttons + list_slider_items
 
     def __init__(self, master, thread_services, connected_device, **kwargs):
         """! Initialisation of a Home Page Frame
@@ -363,7 +678,16 @@ class HomePageFrame(customtkinter.CTkFrame):
         self.grid_rowconfigure((ROW_ZERO, ROW_ONE), weight = 0)
         self.grid_columnconfigure(COLUMN_ZERO, weight = 0)
     
-        btn_manual_mode = button_generate(
+        # Items of every mode panel already generated, by mode
+        self.dict_mode_panels = {}
+
+        # Slider items of every mode panel already generated, by mode
+        self.dict_mode_sliders = {}
+
+        # Recorder of the jog commands while a path is taught
+        self.teach_recorder = None
+
+        self.btn_manual_mode = button_generate(
                                             self, 
                                             ROW_ZERO,
                                             COLUMN_ZERO, 
@@ -372,7 +696,7 @@ class HomePageFrame(customtkinter.CTkFrame):
                                             PAD_X_USUAL, 
                                             PAD_Y_USUAL, 
                                             "Manual Mode")
-        btn_auto_mode   = button_generate(
+        self.btn_auto_mode  = button_generate(
                                             self, 
                                             ROW_ONE, 
                                             COLUMN_ZERO, 
@@ -382,5 +706,16 @@ class HomePageFrame(customtkinter.CTkFrame):
                                             PAD_Y_USUAL, 
                                             "Automatic mode")
 
-        btn_manual_mode.configure(command = lambda : self.button_manual_mode_click(btn_auto_mode, btn_manual_mode, thread_services, connected_device))
-        btn_auto_mode.configure(command = lambda : self.button_auto_mode_click(btn_auto_mode, btn_manual_mode, thread_services, connected_device))
\ No newline at end of file
+        self.btn_position_mode = button_generate(
+                                            self,
+                                            ROW_TWO,
+                                            COLUMN_ZERO,
+                                            1,
+                                            1,
+                                            PAD_X_USUAL,
+                                            PAD_Y_USUAL,
+                                            "Position mode")
+
+        self.btn_manual_mode.configure(command = lambda : self.button_manual_mode_click(thread_services, connected_device))
+        self.btn_position_mode.configure(command = lambda : self.button_position_mode_click(thread_services, connected_device))
+        self.btn_auto_mode.configure(command = lambda : self.button_auto_mode_click(thread_services, connected_device))
\ No newline at end of file
@@ -0,0 +1,378 @@
+##
+# @file
+# job_scheduler.py
+#
+# @brief
+# Scheduling of saved programs on several test benches. \n
+# The duration of every job is estimated with the speed model of the sliders, the jobs are packed on the benches by priority, deadline and duration,
+# then dispatched to the control server of every bench. The remaining jobs are packed again when a job ends, fails or runs longer than estimated.
+
+# Imports
+import heapq
+import json
+import os
+import socket
+import sys
+import time
+from threading import Event, Thread
+
+# The common module must be imported before the serial functions
+from common import *
+from automatic_control import AutomaticMode, determine_trajectory_parameters
+from program_validation import DICT_MOTOR_PROGRAM_FILE_SPEED
+from program_files import read_program_file, get_program_path
+from control_server import CONTROL_SERVER_HOST, CONTROL_SERVER_PORT, MESSAGE_ENCODING
+
+# Constants
+## Folder of the saved programs
+path_scheduler_programs_folder = 'programs'
+
+## Period of the polling of the benches (s)
+SCHEDULER_POLL_PERIOD_SEC = 5.0
+
+## Maximal time to wait for the answer of a bench (s)
+SCHEDULER_REQUEST_TIMEOUT_SEC = 5.0
+
+## Ratio of the estimated duration after which a job is considered running long and its estimate is corrected from its progress
+SCHEDULER_OVERRUN_FACTOR = 1.2
+
+## Time without any new repetition after which a running job is stopped and considered failed (s)
+SCHEDULER_NO_PROGRESS_TIMEOUT_SEC = 600
+
+## Number of times a job is started before it is abandoned
+SCHEDULER_MAX_ATTEMPTS = 2
+
+## Possible status of a job
+JOB_STATUS_PENDING  = "pending"
+JOB_STATUS_RUNNING  = "running"
+JOB_STATUS_DONE     = "done"
+JOB_STATUS_FAILED   = "failed"
+
+## Axis of the speed request of the control server for every motor
+DICT_MOTOR_SPEED_AXIS = {
+    ID_MOTOR_VERTICAL_LEFT  : "vertical",
+    ID_MOTOR_HORIZONTAL     : "horizontal",
+    ID_MOTOR_ADAPT          : "adaptor"
+}
+
+# Functions
+def send_bench_request(host, port, request, token = None):
+    """! Sends a request to the control server of a bench and reads its answer
+    @param host     Address of the control server of the bench
+    @param port     Port of the control server of the bench
+    @param request  Dictionnary of the request
+    @param token    Shared token required by the control server of the bench - None if it requires none
+    @return The dictionnary of the answer
+    """
+    if (token != None):
+        request = dict(request, token = token)
+
+    with socket.create_connection((host, port), SCHEDULER_REQUEST_TIMEOUT_SEC) as connection:
+        connection.sendall((json.dumps(request) + '\n').encode(MESSAGE_ENCODING))
+
+        with connection.makefile("rb") as f:
+            return json.loads(f.readline().decode(MESSAGE_ENCODING))
+
+def plan_schedule(list_jobs, dict_bench_free_times):
+    """! Packs jobs on benches - The jobs are taken by priority, then by deadline, then longest first, and every job goes to the bench free first\n
+    Taking the longest jobs first keeps the end of the last job close to the shortest possible one
+    @param list_jobs                BenchJob objects to pack
+    @param dict_bench_free_times    Time (s since epoch) at which every bench is free, by bench name
+    @return The dictionnary of the list of (job, estimated start, estimated end) by bench name, and the estimated end of the last job (s since epoch)
+    """
+    dict_plan = {bench : [] for bench in dict_bench_free_times}
+    heap_benches = [(free_time, bench) for bench, free_time in dict_bench_free_times.items()]
+    heapq.heapify(heap_benches)
+
+    if (len(heap_benches) == 0):
+        return dict_plan, None
+
+    for job in sorted(list_jobs, key = lambda job : (-job.priority, job.deadline if (job.deadline != None) else float('inf'), -job.duration_estimate)):
+        free_time, bench = heapq.heappop(heap_benches)
+        time_end = free_time + job.duration_estimate
+
+        dict_plan[bench].append((job, free_time, time_end))
+        heapq.heappush(heap_benches, (time_end, bench))
+
+    return dict_plan, max(free_time for free_time, bench in heap_benches)
+
+# Classes
+class BenchJob():
+    """! Saved program to execute on one of the benches
+    """
+    def get_start_requests(self):
+        """! Gives the requests setting the speed and starting the program on a bench
+        @return The list of the request dictionnaries
+        """
+        return [
+            {"command" : "set_speed", "axis" : DICT_MOTOR_SPEED_AXIS[self.motor_id], "value" : self.slider_value},
+            {
+                "command"   : "start_program",
+                "movement"  : self.program["movement"],
+                "amplitude" : self.program["amplitude"],
+                "turns"     : self.program["turns"],
+                "reps"      : self.program["reps"],
+                "resume"    : (self.attempts > 0),
+                "name"      : self.name,
+                "path"      : os.path.abspath(get_program_path(self.folder, self.name))}]
+
+    def __init__(self, name, priority = 0, deadline = None, folder = path_scheduler_programs_folder):
+        """! Initialisation of a job from a saved program - Estimates its duration
+        @param name         Name of the saved program
+        @param priority     Priority of the job - The highest priorities are executed first
+        @param deadline     Time (s since epoch) at which the job should be done - None if there is none
+        @param folder       Folder of the saved programs
+        """
+        dict_program = read_program_file(folder, name)
+
+        self.name = name
+        self.folder = folder
+        self.priority = priority
+        self.deadline = deadline
+
+        self.program = {
+                        "movement"  : dict_program["movement"],
+                        "amplitude" : int(dict_program["amplitude"]),
+                        "turns"     : float(dict_program["turns"]),
+                        "reps"      : int(dict_program["reps"])}
+        self.motor_id, command_a, command_b = determine_trajectory_parameters(self.program["movement"], AutomaticMode.list_movement_entries)
+        self.slider_value = round(float(dict_program[DICT_MOTOR_PROGRAM_FILE_SPEED[self.motor_id]]))
+
+        ## Estimated duration of the job (s) - Corrected from its progress when it runs long
+        self.duration_estimate = float(estimate_program_duration_sec(self.program["amplitude"], self.program["turns"], self.program["reps"], self.slider_value, (self.motor_id == ID_MOTOR_ADAPT)))
+
+        self.status = JOB_STATUS_PENDING
+        self.bench = None
+        self.attempts = 0
+        self.time_start = None
+        self.time_last_progress = None
+        self.repetitions_done = 0
+
+class JobScheduler():
+    """! Dispatches jobs to the control servers of the benches following the schedule, and packs the remaining jobs again when the schedule changes
+    """
+    def get_bench_free_time(self, bench, time_now):
+        """! Estimates the time at which a bench finishes its current job
+        @param bench        Name of the bench
+        @param time_now     Current time (s since epoch)
+        @return The estimated time (s since epoch)
+        """
+        job = self.dict_running_jobs.get(bench)
+
+        if (job == None):
+            return time_now
+
+        return max(time_now, job.time_start + job.duration_estimate)
+
+    def plan(self):
+        """! Packs the pending jobs on the available benches and reports the deadlines that cannot be met
+        """
+        time_now = time.time()
+        list_pending = [job for job in self.list_jobs if (job.status == JOB_STATUS_PENDING)]
+        dict_bench_free_times = {bench : self.get_bench_free_time(bench, time_now) for bench in self.dict_benches if (bench not in self.set_unavailable_benches)}
+
+        self.dict_plan, time_end = plan_schedule(list_pending, dict_bench_free_times)
+        self.flag_replan = False
+
+        if (time_end != None):
+            print("Schedule: " + str(len(list_pending)) + " pending jobs, all done in " + str(round((time_end - time_now) / 3600, 2)) + " h")
+
+        for bench, list_planned in self.dict_plan.items():
+            for job, time_start, time_end in list_planned:
+                if ((job.deadline != None) and (time_end > job.deadline)):
+                    print("Job " + job.name + " on " + bench + " would miss its deadline by " + str(round((time_end - job.deadline) / 60)) + " min")
+
+    def dispatch(self, bench):
+        """! Starts the next job planned on a free bench
+        @param bench    Name of the bench
+        """
+        if (len(self.dict_plan.get(bench, [])) == 0):
+            return
+
+        job, time_start, time_end = self.dict_plan[bench].pop(0)
+        host, port, token = self.dict_benches[bench]
+
+        try:
+            for request in job.get_start_requests():
+                answer = send_bench_request(host, port, request, token)
+
+                if (answer["status"] != "ok"):
+                    raise ValueError(answer.get("message"))
+        except (OSError, ValueError) as error:
+            print("Job " + job.name + " could not start on " + bench + ": " + str(error))
+
+            # A bench that does not answer is not planned any more, without counting against the job
+            if (isinstance(error, OSError) == True):
+                self.set_unavailable_benches.add(bench)
+            else:
+                job.attempts = job.attempts + 1
+
+            self.end_job(bench, job, False)
+            return
+
+        job.status = JOB_STATUS_RUNNING
+        job.bench = bench
+        job.attempts = job.attempts + 1
+        job.time_start = time.time()
+        job.time_last_progress = job.time_start
+        job.repetitions_done = 0
+        self.dict_running_jobs[bench] = job
+
+        print("Job " + job.name + " started on " + bench)
+
+    def end_job(self, bench, job, flag_is_done):
+        """! Ends a job - A failed job is planned again until it has been started the maximal number of times
+        @param bench            Name of the bench of the job
+        @param job              The BenchJob object
+        @param flag_is_done     True if the job executed all of its repetitions
+        """
+        self.dict_running_jobs.pop(bench, None)
+        self.flag_replan = True
+
+        if (flag_is_done == True):
+            job.status = JOB_STATUS_DONE
+            print("Job " + job.name + " done on " + bench + " in " + str(round((time.time() - job.time_start) / 60, 1)) + " min")
+        elif (job.attempts < SCHEDULER_MAX_ATTEMPTS):
+            job.status = JOB_STATUS_PENDING
+            print("Job " + job.name + " failed on " + bench + ", planned again")
+        else:
+            job.status = JOB_STATUS_FAILED
+            print("Job " + job.name + " failed on " + bench + ", abandoned")
+
+    def stop_bench_program(self, bench):
+        """! Stops the program running on a bench - A bench that does not answer is not planned any more
+        @param bench    Name of the bench
+        """
+        host, port, token = self.dict_benches[bench]
+
+        try:
+            send_bench_request(host, port, {"command" : "stop_program"}, token)
+        except (OSError, ValueError) as error:
+            print("Bench " + bench + " could not stop its program: " + str(error))
+
+            if (isinstance(error, OSError) == True):
+                self.set_unavailable_benches.add(bench)
+
+    def poll(self, bench):
+        """! Follows the job running on a bench - Detects its end, its failure or that it runs longer than estimated
+        @param bench    Name of the bench
+        """
+        job = self.dict_running_jobs[bench]
+        host, port, token = self.dict_benches[bench]
+        time_now = time.time()
+
+        try:
+            answer = send_bench_request(host, port, {"command" : "status"}, token)
+
+            if ((answer.get("status") != "ok") or ("repetitions" not in answer) or ("running" not in answer)):
+                raise ValueError(answer.get("message", "incomplete status"))
+        except OSError as error:
+            print("Bench " + bench + " does not answer: " + str(error))
+            self.set_unavailable_benches.add(bench)
+            self.end_job(bench, job, False)
+            return
+        except ValueError as error:
+            # The job cannot be followed any more: it is stopped and planned again
+            print("Job " + job.name + " cannot be followed on " + bench + ": " + str(error))
+            self.stop_bench_program(bench)
+            self.end_job(bench, job, False)
+            return
+
+        if (answer["repetitions"] != job.repetitions_done):
+            job.repetitions_done = answer["repetitions"]
+            job.time_last_progress = time_now
+
+        if (answer["running"] == False):
+            self.end_job(bench, job, (job.repetitions_done >= job.program["reps"]))
+            return
+
+        if ((time_now - job.time_last_progress) > SCHEDULER_NO_PROGRESS_TIMEOUT_SEC):
+            print("Job " + job.name + " makes no progress on " + bench)
+            self.stop_bench_program(bench)
+            self.end_job(bench, job, False)
+            return
+
+        # The estimate of a job running long is corrected with its measured rate of repetitions
+        time_elapsed = time_now - job.time_start
+        if ((time_elapsed > (SCHEDULER_OVERRUN_FACTOR * job.duration_estimate)) and (job.repetitions_done > 0)):
+            job.duration_estimate = time_elapsed * job.program["reps"] / job.repetitions_done
+            self.flag_replan = True
+
+            print("Job " + job.name + " runs long on " + bench + ", now estimated to " + str(round(job.duration_estimate / 60, 1)) + " min")
+
+    def run(self, stop_event):
+        """! Dispatches and follows the jobs until they are all done or failed - Executed by the scheduler thread
+        @param stop_event   Thread event stopping the scheduling when set
+        """
+        self.plan()
+
+        while (stop_event.is_set() != True):
+            for bench in list(self.dict_running_jobs):
+                self.poll(bench)
+
+            if (self.flag_replan == True):
+                self.plan()
+
+            for bench in self.dict_benches:
+                if ((bench not in self.dict_running_jobs) and (bench not in self.set_unavailable_benches)):
+                    self.dispatch(bench)
+
+            if ((len(self.dict_running_jobs) == 0) and all((job.status in (JOB_STATUS_DONE, JOB_STATUS_FAILED)) for job in self.list_jobs)):
+                break
+
+            if ((len(self.dict_running_jobs) == 0) and (len(self.set_unavailable_benches) == len(self.dict_benches))):
+                print("No bench available, scheduling stopped")
+                break
+
+            stop_event.wait(SCHEDULER_POLL_PERIOD_SEC)
+
+        print("Jobs: " + str({status : sum(1 for job in self.list_jobs if (job.status == status)) for status in (JOB_STATUS_DONE, JOB_STATUS_FAILED, JOB_STATUS_PENDING)}))
+
+    def start(self):
+        """! Starts the scheduling in a separate thread
+        """
+        self.stop_event = Event()
+        self.thread_scheduler = Thread(target = self.run, args = (self.stop_event, ), daemon = True)
+        self.thread_scheduler.start()
+
+    def stop(self):
+        """! Stops the scheduling - The jobs already running continue on their bench
+        """
+        self.stop_event.set()
+
+        if (self.thread_scheduler != None):
+            self.thread_scheduler.join()
+
+    def __init__(self, dict_benches, list_jobs):
+        """! Initialisation of a scheduler
+        @param dict_benches     Address, port and token (None if not required) of the control server by bench name
+        @param list_jobs        BenchJob objects to execute
+        """
+        self.dict_benches = dict_benches
+        self.list_jobs = list_jobs
+
+        self.dict_plan = {}
+        self.dict_running_jobs = {}
+        self.set_unavailable_benches = set()
+        self.flag_replan = True
+
+        self.stop_event = Event()
+        self.thread_scheduler = None
+
+if __name__ == "__main__":
+    """! Executes the jobs of a JSON file: {"benches" : {name : [host, port, token]}, "jobs" : [{"program", "priority", "deadline" ("YYYY-mm-dd HH:MM:SS")}]} - The token is only needed by the benches that require one
+    """
+    with open(sys.argv[1], "r") as f:
+        dict_jobs_file = json.load(f)
+
+    dict_benches = {bench : (address[0], address[1], address[2] if (len(address) > 2) else None) for bench, address in dict_jobs_file.get("benches", {"local" : [CONTROL_SERVER_HOST, CONTROL_SERVER_PORT]}).items()}
+    list_jobs = []
+
+    for entry in dict_jobs_file["jobs"]:
+        deadline = None
+        if (entry.get("deadline") != None):
+            deadline = time.mktime(time.strptime(entry["deadline"], '%Y-%m-%d %H:%M:%S'))
+
+        list_jobs.append(BenchJob(entry["program"], entry.get("priority", 0), deadline))
+
+    JobScheduler(dict_benches, list_jobs).run(Event())
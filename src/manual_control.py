@@ -7,6 +7,7 @@
 
 import serial_funcs
 import home_page
+import metrics
 
 # Global constants
 INDEX_PREVIOUS_MOTOR = 0
@@ -20,6 +21,7 @@ INDEX_BUTTON_RIGHT  = 3
 previous_motor_controlled = [serial_funcs.ID_MOTOR_VERTICAL_LEFT]
 
 # Functions
+@metrics.timed("gui.key_pressed")
 def key_pressed(event, previous_motor, list_buttons, connected_device):
     """! Sends appropriate command to the uC depending on the pressed key on keyboard (WASD possible)
     @param event            Event object containing different data about the physical event that the computer recorded
@@ -34,6 +36,8 @@ def key_pressed(event, previous_motor, list_buttons, connected_device):
                                             serial_funcs.MODE_MANUAL_CONTROL,
                                             serial_funcs.DATA_NONE,
                                             connected_device)
+
+            serial_funcs.notify_jog_listeners(serial_funcs.ID_MOTOR_VERTICAL_LEFT, serial_funcs.COMMAND_MOTOR_VERTICAL_UP)
             
             list_buttons[INDEX_BUTTON_UP].configure(fg_color = '#EE1289')
             
@@ -47,6 +51,8 @@ def key_pressed(event, previous_motor, list_buttons, connected_device):
                                             serial_funcs.DATA_NONE,
                                             connected_device)
 
+            serial_funcs.notify_jog_listeners(serial_funcs.ID_MOTOR_VERTICAL_LEFT, serial_funcs.COMMAND_MOTOR_VERTICAL_DOWN)
+
             list_buttons[INDEX_BUTTON_DOWN].configure(fg_color = '#EE1289')
             
             previous_motor[INDEX_PREVIOUS_MOTOR] = serial_funcs.ID_MOTOR_VERTICAL_LEFT
@@ -59,6 +65,8 @@ def key_pressed(event, previous_motor, list_buttons, connected_device):
                                             serial_funcs.DATA_NONE,
                                             connected_device)
 
+            serial_funcs.notify_jog_listeners(serial_funcs.ID_MOTOR_HORIZONTAL, serial_funcs.COMMAND_MOTOR_HORIZONTAL_LEFT)
+
             list_buttons[INDEX_BUTTON_LEFT].configure(fg_color = '#EE1289')
 
             previous_motor[INDEX_PREVIOUS_MOTOR] = serial_funcs.ID_MOTOR_HORIZONTAL
@@ -71,6 +79,8 @@ def key_pressed(event, previous_motor, list_buttons, connected_device):
                                             serial_funcs.DATA_NONE,
                                             connected_device)
 
+            serial_funcs.notify_jog_listeners(serial_funcs.ID_MOTOR_HORIZONTAL, serial_funcs.COMMAND_MOTOR_HORIZONTAL_RIGHT)
+
             list_buttons[INDEX_BUTTON_RIGHT].configure(fg_color = '#EE1289')
 
             previous_motor[INDEX_PREVIOUS_MOTOR] = serial_funcs.ID_MOTOR_HORIZONTAL
@@ -83,6 +93,8 @@ def key_pressed(event, previous_motor, list_buttons, connected_device):
                                             serial_funcs.DATA_NONE,
                                             connected_device)
 
+            serial_funcs.notify_jog_listeners(serial_funcs.ID_MOTOR_ADAPT, serial_funcs.COMMAND_MOTOR_ADAPT_UP)
+
             previous_motor[INDEX_PREVIOUS_MOTOR] = serial_funcs.ID_MOTOR_ADAPT
 
         elif event.keysym == 'k':
@@ -93,8 +105,11 @@ def key_pressed(event, previous_motor, list_buttons, connected_device):
                                         serial_funcs.DATA_NONE,
                                         connected_device)
 
+            serial_funcs.notify_jog_listeners(serial_funcs.ID_MOTOR_ADAPT, serial_funcs.COMMAND_MOTOR_ADAPT_DOWN)
+
             previous_motor[INDEX_PREVIOUS_MOTOR] = serial_funcs.ID_MOTOR_ADAPT
 
+@metrics.timed("gui.key_released")
 def key_released(event, previous_motor, list_buttons, connected_device):
     """! Sends appropriate stop condition when a keyboard key is released
     @param event            Event object containing different data about the physical event that the computer recorded
@@ -112,6 +127,8 @@ def key_released(event, previous_motor, list_buttons, connected_device):
                                                 serial_funcs.DATA_NONE,
                                                 connected_device)
 
+        serial_funcs.notify_jog_listeners(serial_funcs.ID_MOTOR_VERTICAL_LEFT, serial_funcs.COMMAND_MOTOR_VERTICAL_STOP)
+
     elif (previous_motor[INDEX_PREVIOUS_MOTOR] == serial_funcs.ID_MOTOR_HORIZONTAL):
         serial_funcs.transmit_serial_data(
                                                 serial_funcs.ID_MOTOR_HORIZONTAL,
@@ -120,10 +137,14 @@ def key_released(event, previous_motor, list_buttons, connected_device):
                                                 serial_funcs.DATA_NONE,
                                                 connected_device)
 
+        serial_funcs.notify_jog_listeners(serial_funcs.ID_MOTOR_HORIZONTAL, serial_funcs.COMMAND_MOTOR_HORIZONTAL_STOP)
+
     elif (previous_motor[INDEX_PREVIOUS_MOTOR] == serial_funcs.ID_MOTOR_ADAPT):
         serial_funcs.transmit_serial_data(
                                                 serial_funcs.ID_MOTOR_ADAPT,
                                                 serial_funcs.COMMAND_MOTOR_ADAPT_STOP,
                                                 serial_funcs.MODE_MANUAL_CONTROL,
                                                 serial_funcs.DATA_NONE,
-                                                connected_device)
\ No newline at end of file
+                                                connected_device)
+
+        serial_funcs.notify_jog_listeners(serial_funcs.ID_MOTOR_ADAPT, serial_funcs.COMMAND_MOTOR_ADAPT_STOP)
\ No newline at end of file
@@ -0,0 +1,259 @@
+##
+# @file
+# metrics.py
+#
+# @brief
+# Lightweight counters, histograms and span timers to instrument the serial, control and GUI code. \n
+# Metrics are disabled by default: every recording function then returns immediately.
+
+# Imports
+import functools
+import json
+import math
+import os
+import time
+from threading import Lock
+
+# Constants
+## Default file in which the metrics are dumped
+path_metrics_dump = 'logs/metrics_dump.json'
+
+## Upper bound of the first histogram bucket (s) - Every next bucket doubles the bound
+HISTOGRAM_FIRST_BUCKET_SEC = 0.00001
+
+## Number of histogram buckets (the last one goes up to about 84 s)
+HISTOGRAM_NUMBER_OF_BUCKETS = 24
+
+# Global variables
+## True when the metrics are recorded
+flag_metrics_enabled = False
+
+## Lock protecting the metrics written by the different threads
+lock_metrics = Lock()
+
+## Counters by name
+dict_counters = {}
+
+## Histograms by name
+dict_histograms = {}
+
+# Classes
+class Histogram():
+    """! Distribution of durations in exponential buckets
+    """
+    def add(self, value):
+        """! Adds a duration to the histogram
+        @param value    Duration in seconds
+        """
+        self.count = self.count + 1
+        self.total = self.total + value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+        if (value <= HISTOGRAM_FIRST_BUCKET_SEC):
+            index_bucket = 0
+        else:
+            index_bucket = min(HISTOGRAM_NUMBER_OF_BUCKETS - 1, math.ceil(math.log2(value / HISTOGRAM_FIRST_BUCKET_SEC)))
+
+        self.list_buckets[index_bucket] = self.list_buckets[index_bucket] + 1
+
+    def percentile(self, fraction):
+        """! Estimates a percentile with the upper bound of the bucket in which it falls
+        @param fraction     Fraction of the values under the percentile, between 0 and 1
+        @return The estimated percentile in seconds
+        """
+        if (self.count == 0):
+            return 0.0
+
+        count_to_reach = fraction * self.count
+        count_cumulated = 0
+
+        for i in range(HISTOGRAM_NUMBER_OF_BUCKETS):
+            count_cumulated = count_cumulated + self.list_buckets[i]
+
+            if (count_cumulated >= count_to_reach):
+                return min(self.maximum, HISTOGRAM_FIRST_BUCKET_SEC * (2 ** i))
+
+        return self.maximum
+
+    def summary(self):
+        """! Gives the statistics of the histogram
+        @return A dictionnary of the statistics in seconds
+        """
+        if (self.count == 0):
+            return {"count" : 0}
+
+        return {
+                "count" : self.count,
+                "mean"  : self.total / self.count,
+                "min"   : self.minimum,
+                "max"   : self.maximum,
+                "p50"   : self.percentile(0.5),
+                "p90"   : self.percentile(0.9),
+                "p99"   : self.percentile(0.99)}
+
+    def __init__(self):
+        """! Initialisation of an empty histogram
+        """
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = 0.0
+        self.list_buckets = [0] * HISTOGRAM_NUMBER_OF_BUCKETS
+
+class Span():
+    """! Context manager measuring the duration of a block of code in a histogram
+    """
+    def __enter__(self):
+        self.time_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        record_duration(self.name, time.perf_counter() - self.time_start)
+        return False
+
+    def __init__(self, name):
+        """! Initialisation of a span
+        @param name     Name of the histogram in which the duration is recorded
+        """
+        self.name = name
+
+class DisabledSpan():
+    """! Context manager doing nothing, used when the metrics are disabled
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        return False
+
+## Shared span returned when the metrics are disabled
+disabled_span = DisabledSpan()
+
+# Functions
+def enable_metrics(flag_enable):
+    """! Enables or disables the recording of the metrics
+    @param flag_enable  True to record the metrics
+    """
+    global flag_metrics_enabled
+    flag_metrics_enabled = flag_enable
+
+def increment_counter(name, value = 1):
+    """! Increments a counter
+    @param name     Name of the counter
+    @param value    Value to add to the counter
+    """
+    if (flag_metrics_enabled != True):
+        return
+
+    with lock_metrics:
+        dict_counters[name] = dict_counters.get(name, 0) + value
+
+def record_duration(name, duration):
+    """! Adds a duration to a histogram
+    @param name         Name of the histogram
+    @param duration     Duration in seconds
+    """
+    if (flag_metrics_enabled != True):
+        return
+
+    with lock_metrics:
+        histogram = dict_histograms.get(name)
+
+        if (histogram == None):
+            histogram = Histogram()
+            dict_histograms[name] = histogram
+
+        histogram.add(duration)
+
+def span(name):
+    """! Gives a context manager measuring the duration of the code it contains
+    @param name     Name of the histogram in which the duration is recorded
+    @return The context manager to use in a with statement
+    """
+    if (flag_metrics_enabled != True):
+        return disabled_span
+
+    return Span(name)
+
+def timed(name):
+    """! Decorator measuring the duration of every call of a function
+    @param name     Name of the histogram in which the durations are recorded
+    @return The decorator
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if (flag_metrics_enabled != True):
+                return function(*args, **kwargs)
+
+            time_start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record_duration(name, time.perf_counter() - time_start)
+
+        return wrapper
+
+    return decorator
+
+def get_metrics_snapshot():
+    """! Gives the current value of every metric
+    @return A dictionnary of the counters and of the histograms statistics
+    """
+    with lock_metrics:
+        return {
+                "enabled"       : flag_metrics_enabled,
+                "time"          : time.time(),
+                "counters"      : dict(dict_counters),
+                "histograms"    : {name : histogram.summary() for name, histogram in dict_histograms.items()}}
+
+def reset_metrics():
+    """! Clears every metric
+    """
+    with lock_metrics:
+        dict_counters.clear()
+        dict_histograms.clear()
+
+def dump_metrics(path = path_metrics_dump):
+    """! Writes the current value of every metric in a JSON file
+    @param path     Path of the file to write
+    @return The path of the written file
+    """
+    folder = os.path.dirname(path)
+    if (folder != ''):
+        os.makedirs(folder, exist_ok = True)
+
+    with open(path, "w") as f:
+        json.dump(get_metrics_snapshot(), f, indent = 4)
+
+    return path
+
+def format_metrics_snapshot(snapshot):
+    """! Formats a snapshot of the metrics to be shown to the user
+    @param snapshot     Dictionnary given by get_metrics_snapshot
+    @return The formatted text, durations are written in milliseconds
+    """
+    list_lines = ["Counters"]
+
+    for name in sorted(snapshot["counters"]):
+        list_lines.append("    " + name + ": " + str(snapshot["counters"][name]))
+
+    list_lines.append("")
+    list_lines.append("Durations (ms)")
+
+    for name in sorted(snapshot["histograms"]):
+        summary = snapshot["histograms"][name]
+
+        if (summary["count"] == 0):
+            continue
+
+        list_lines.append(
+                            "    " + name + ": n=" + str(summary["count"]) +
+                            f" mean={summary['mean'] * 1000:.3f}" +
+                            f" p50={summary['p50'] * 1000:.3f}" +
+                            f" p90={summary['p90'] * 1000:.3f}" +
+                            f" p99={summary['p99'] * 1000:.3f}" +
+                            f" max={summary['max'] * 1000:.3f}")
+
+    return '\n'.join(list_lines)
@@ -0,0 +1,230 @@
+##
+# @file
+# motion_profile.py
+#
+# @brief
+# Acceleration ramps of the automatic movements. \n
+# The ramps are computed with the ARR speed model of the stepper timers and streamed to the microcontroler as speed changes while the movement executes.
+
+# Imports
+import time
+from threading import Event, Thread
+
+import numpy
+
+from common import *
+from serial_funcs import *
+from automatic_control import RunObserver, AutomaticMode, determine_trajectory_parameters, PARAMETER_SPEED
+
+# Constants
+## Available speed profiles
+PROFILE_CONSTANT    = "Constant"
+PROFILE_TRAPEZOIDAL = "Trapezoidal"
+PROFILE_S_CURVE     = "S-curve"
+
+## List of the speed profiles for the profile selector
+LIST_PROFILE_ENTRIES = [PROFILE_CONSTANT, PROFILE_TRAPEZOIDAL, PROFILE_S_CURVE]
+
+## Minimal time between two speed changes sent to the microcontroler (s)
+PROFILE_STEP_PERIOD_SEC = 0.02
+
+## Slider value at which every motor starts without stalling
+PROFILE_START_SLIDER_VALUE = 0
+
+## Default acceleration of the ramps (pulses/s²) - 50 mm/s² on the rails
+PROFILE_ACCELERATION_PULSES_PER_SEC2 = 50 * PULSE_PER_MM
+
+## Speed slider information and maximal slider value of every motor
+DICT_MOTOR_SLIDER = {
+    ID_MOTOR_VERTICAL_LEFT  : (list_slider_vertical_info, SLIDER_VERTICAL_SPEED_RANGE_MAX),
+    ID_MOTOR_HORIZONTAL     : (list_slider_horizontal_info, SLIDER_HORIZONTAL_SPEED_RANGE_MAX),
+    ID_MOTOR_ADAPT          : (list_slider_adaptor_info, SLIDER_ADAPTOR_SPEED_RANGE_MAX)
+}
+
+# Functions
+def calculate_pulse_rate(slider_value):
+    """! Converts slider values to the pulse rate of the stepper timers
+    @param slider_value     Slider value, or numpy array of slider values
+    @return The pulse rate in pulses per second
+    """
+    return CLOCK_FREQUENCY / (((ARR_MINIMUM - (SPEED_INCREMENT * slider_value)) + 1) * (PRESCALOR + 1))
+
+def calculate_slider_value(pulse_rate, slider_max):
+    """! Converts pulse rates to the highest slider values that do not exceed them
+    @param pulse_rate   numpy array of pulse rates (pulses/s)
+    @param slider_max   Maximal slider value of the motor
+    @return numpy array of slider values
+    """
+    arr = (CLOCK_FREQUENCY / ((PRESCALOR + 1) * pulse_rate)) - 1
+    slider_value = numpy.floor((ARR_MINIMUM - arr) / SPEED_INCREMENT + 1e-9)
+
+    return numpy.clip(slider_value, 0, slider_max).astype(numpy.int64)
+
+def build_ramp(profile_type, start_slider_value, max_slider_value, acceleration, slider_max):
+    """! Computes the speed steps accelerating a motor from its start speed to its maximal speed
+    @param profile_type         PROFILE_TRAPEZOIDAL for a constant acceleration, PROFILE_S_CURVE for an acceleration rising and falling smoothly
+    @param start_slider_value   Slider value of the start speed
+    @param max_slider_value     Slider value of the maximal speed
+    @param acceleration         Acceleration (pulses/s²) - Peak acceleration for the S-curve
+    @param slider_max           Maximal slider value of the motor
+    @return The list of (time (s), slider value) of the ramp, starting at the start speed and ending at the maximal speed
+    """
+    rate_start = calculate_pulse_rate(start_slider_value)
+    rate_max = calculate_pulse_rate(max_slider_value)
+
+    if (rate_max <= rate_start):
+        return [(0.0, max_slider_value)]
+
+    # The smoothstep curve reaches 1.5 times the mean acceleration at its middle
+    if (profile_type == PROFILE_S_CURVE):
+        duration = 1.5 * (rate_max - rate_start) / acceleration
+    else:
+        duration = (rate_max - rate_start) / acceleration
+
+    times = numpy.arange(0, duration, PROFILE_STEP_PERIOD_SEC)
+    progress = times / duration
+
+    if (profile_type == PROFILE_S_CURVE):
+        progress = (3 * progress ** 2) - (2 * progress ** 3)
+
+    slider_values = calculate_slider_value(rate_start + ((rate_max - rate_start) * progress), slider_max)
+    slider_values[0] = start_slider_value
+
+    # Only the changes of slider value are sent
+    mask_changes = numpy.concatenate(([True], slider_values[1:] != slider_values[:-1]))
+    list_ramp = [(float(t), int(value)) for t, value in zip(times[mask_changes], slider_values[mask_changes])]
+
+    if (list_ramp[-1][1] != max_slider_value):
+        list_ramp.append((float(duration), max_slider_value))
+
+    return list_ramp
+
+def plan_movement(list_ramp, distance_pulses):
+    """! Schedules the speed steps of a movement: acceleration ramp, constant speed, then the ramp mirrored for the deceleration\n
+    The ramp is cut if the movement is too short to reach the maximal speed
+    @param list_ramp        Ramp given by build_ramp
+    @param distance_pulses  Length of the movement (pulses)
+    @return The list of (time (s) from the start of the movement, slider value)
+    """
+    times = numpy.array([t for t, value in list_ramp])
+    rates = calculate_pulse_rate(numpy.array([value for t, value in list_ramp], dtype = numpy.float64))
+
+    # Distance covered at the end of every step of the ramp
+    distances = numpy.cumsum(rates[:-1] * numpy.diff(times))
+    counter_steps = int(numpy.searchsorted(2 * distances, distance_pulses, 'right')) + 1
+    list_ramp = list_ramp[:counter_steps]
+
+    time_peak = times[counter_steps - 1]
+    distance_ramp = distances[counter_steps - 2] if (counter_steps > 1) else 0.0
+    time_cruise_end = time_peak + max(0.0, distance_pulses - (2 * distance_ramp)) / rates[counter_steps - 1]
+
+    list_plan = list(list_ramp)
+
+    # Deceleration: every step of the ramp is held again for the same duration, in the reverse order
+    for i in range(counter_steps - 2, -1, -1):
+        list_plan.append((float(time_cruise_end + time_peak - times[i + 1]), list_ramp[i][1]))
+
+    return list_plan
+
+# Classes
+class MotionProfileStreamer(RunObserver):
+    """! Streams the speed steps of a profile to the microcontroler during every movement of an automatic run\n
+    The microcontroler has no ramp command: the ramp is applied by changing the speed of the motor while it moves
+    """
+    def send_speed(self, slider_value):
+        """! Sends a speed change to the motor of the run
+        @param slider_value     Slider value of the speed
+        """
+        transmit_serial_data(
+                                self.motor_id,
+                                COMMAND_MOTOR_CHANGE_SPEED,
+                                MODE_CHANGE_PARAMS,
+                                slider_value,
+                                self.connected_device)
+
+    def stream_plan(self, time_start, cancel_event):
+        """! Sends the speed steps of the plan once their time has come - Executed by the streaming thread of a movement
+        @param time_start       Time (perf_counter) at which the movement command was sent
+        @param cancel_event     Thread event ending the streaming when set
+        """
+        # The start speed was set before the movement command
+        for t, slider_value in self.list_plan[1:]:
+            if (cancel_event.wait(max(0.0, time_start + t - time.perf_counter())) == True):
+                return
+
+            self.send_speed(slider_value)
+
+    def cancel_streaming(self):
+        """! Ends the streaming of the current movement, if any
+        """
+        self.cancel_event.set()
+
+        if (self.thread_streaming != None):
+            self.thread_streaming.join()
+            self.thread_streaming = None
+
+    def plan(self, program):
+        """! Plans the movements of a program
+        @param program  Dictionnary of the program parameters
+        """
+        distance_pulses = AutomaticMode.calculate_movement_pulses(self.motor_id, program["amplitude"], program["turns"])
+        list_ramp = build_ramp(self.profile_type, self.start_slider_value, self.max_slider_value, self.acceleration, self.slider_max)
+        self.list_plan = plan_movement(list_ramp, distance_pulses)
+
+    def on_run_start(self, program, counter_repetitions):
+        """! Plans the movements of the run and sets the start speed
+        """
+        self.plan(program)
+        self.send_speed(self.start_slider_value)
+
+    def on_parameters_changed(self, counter_repetitions, program, dict_changes):
+        """! Plans the movements again with the new maximal speed or amplitude, and sets the start speed back for the next movement
+        """
+        if (PARAMETER_SPEED in dict_changes):
+            self.max_slider_value = min(dict_changes[PARAMETER_SPEED], self.slider_max)
+            self.start_slider_value = min(self.start_slider_value, self.max_slider_value)
+
+        self.plan(program)
+        self.send_speed(self.start_slider_value)
+
+    def on_command_sent(self, counter_repetitions, checkpoint_to_reach):
+        """! Starts streaming the plan of the movement
+        """
+        self.cancel_streaming()
+
+        self.cancel_event = Event()
+        self.thread_streaming = Thread(target = self.stream_plan, args = (time.perf_counter(), self.cancel_event, ), daemon = True)
+        self.thread_streaming.start()
+
+    def on_trajectory_ended(self, counter_repetitions, checkpoint_reached):
+        """! Ends the streaming and sets the start speed for the next movement
+        """
+        self.cancel_streaming()
+        self.send_speed(self.start_slider_value)
+
+    def on_run_end(self, counter_repetitions, flag_is_stopped):
+        """! Ends the streaming and restores the speed chosen with the slider
+        """
+        self.cancel_streaming()
+        self.send_speed(self.max_slider_value)
+
+    def __init__(self, profile_type, directions, connected_device, acceleration = PROFILE_ACCELERATION_PULSES_PER_SEC2, start_slider_value = PROFILE_START_SLIDER_VALUE):
+        """! Initialisation of the streaming of a profile - The maximal speed is the one chosen with the slider of the motor
+        @param profile_type         PROFILE_TRAPEZOIDAL or PROFILE_S_CURVE
+        @param directions           Combination of movements of the run
+        @param connected_device     The Serial object currently connected to the application
+        @param acceleration         Acceleration of the ramps (pulses/s²)
+        @param start_slider_value   Slider value of the start speed
+        """
+        self.motor_id, command_a, command_b = determine_trajectory_parameters(directions, AutomaticMode.list_movement_entries)
+        list_slider_info, self.slider_max = DICT_MOTOR_SLIDER[self.motor_id]
+
+        self.profile_type = profile_type
+        self.connected_device = connected_device
+        self.acceleration = acceleration
+        self.start_slider_value = min(start_slider_value, round(list_slider_info[SLIDER_PREV_VALUE_INDEX]))
+        self.max_slider_value = round(list_slider_info[SLIDER_PREV_VALUE_INDEX])
+
+        self.list_plan = []
+        self.cancel_event = Event()
+        self.thread_streaming = None
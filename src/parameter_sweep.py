@@ -0,0 +1,150 @@
+##
+# @file
+# parameter_sweep.py
+#
+# @brief
+# Generation of batches of automatic programs from a grid of parameters. \n
+# Every combination of amplitude, speed and number of turns becomes a program. The whole batch is checked against the limits of the bench and its duration estimated at once, then it is saved as program files or queued to run back to back.
+
+# Imports
+import numpy
+
+from common import *
+from serial_funcs import MotorStateWaiter, MOTOR_STATE_AUTO_END_OF_TRAJ
+from automatic_control import RunObserver, AutomaticMode, create_program_parameters, determine_trajectory_parameters
+from motion_profile import DICT_MOTOR_SLIDER
+from program_files import write_program_file
+from program_validation import validate_programs, DICT_MOTOR_PROGRAM_FILE_SPEED
+
+# Constants
+## Time added to the estimated duration of the last movement of a program before the next program starts anyway (s)
+SWEEP_END_TIMEOUT_MARGIN_SEC = 2.0
+
+# Functions
+def parse_sweep_values(text):
+    """! Reads the values of a swept parameter
+    @param text     Values separated by commas, or a range "start:stop:step" including its stop value
+    @return The numpy array of the values
+    """
+    if (':' in text):
+        start, stop, step = (float(value) for value in text.split(':'))
+
+        if (step <= 0):
+            raise ValueError("The step of a range must be positive")
+
+        return numpy.arange(start, stop + (step / 2), step)
+
+    return numpy.array([float(value) for value in text.split(',') if (value.strip() != "")])
+
+# Classes
+class EndOfRunWaiter(RunObserver):
+    """! Follows the last movement of an automatic run, whose end the automatic mode does not wait for, so that the next run of a batch starts as soon as the tool is back
+    """
+    def on_command_sent(self, counter_repetitions, checkpoint_to_reach):
+        """! Follows the end of the movement just commanded instead of the previous one
+        """
+        if (self.waiter != None):
+            self.waiter.wait(0)
+
+        self.waiter = MotorStateWaiter([MOTOR_STATE_AUTO_END_OF_TRAJ], self.motor_id)
+
+    def wait(self, timeout):
+        """! Waits for the end of the last movement of the run
+        @param timeout  Maximal time to wait (s)
+        @return The reception time (s since epoch) of the end of the movement - None if it was not received in time or no movement was commanded
+        """
+        if (self.waiter == None):
+            return None
+
+        return self.waiter.wait(timeout)
+
+    def __init__(self, motor_id):
+        """! Initialisation of the waiter of a run
+        @param motor_id     The ID of the motor of the run
+        """
+        self.motor_id = motor_id
+        self.waiter = None
+
+class ParameterSweep():
+    """! Batch of programs of one movement covering every combination of the swept amplitudes, speeds and numbers of turns\n
+    The combinations are kept as numpy arrays so that the batch is checked and estimated in one pass
+    """
+    def check(self, max_vertical = MAX_VERTICAL, max_horizontal = MAX_HORIZONTAL):
+        """! Checks every combination against the limits of the bench
+        @param max_vertical     Largest amplitude of the vertical movements (mm)
+        @param max_horizontal   Largest amplitude of the horizontal movements (mm)
+        @return The dictionnary of the masks of the faulty combinations by error - Only the errors found are given
+        """
+        return validate_programs(
+                                    numpy.full(len(self.amplitudes), self.movement),
+                                    self.amplitudes,
+                                    self.turns,
+                                    numpy.full(len(self.amplitudes), self.number_reps),
+                                    self.slider_values,
+                                    max_vertical,
+                                    max_horizontal)
+
+    def estimate_durations(self):
+        """! Estimates the duration of every program of the batch
+        @return The numpy array of the durations (s)
+        """
+        return estimate_program_duration_sec(self.amplitudes, self.turns, self.number_reps, self.slider_values, (self.motor_id == ID_MOTOR_ADAPT))
+
+    def get_programs(self):
+        """! Gives the programs of the batch
+        @return The list of the dictionnaries of the program parameters, with the slider value of the "speed" and the "name" of every program
+        """
+        list_programs = []
+
+        for amplitude, slider_value, turns in zip(self.amplitudes.tolist(), self.slider_values.tolist(), self.turns.tolist()):
+            program = create_program_parameters(amplitude, self.movement, turns, self.number_reps)
+            program["speed"] = slider_value
+            program["name"] = self.name + "_" + str(amplitude) + "mm_speed" + str(slider_value) + "_" + str(turns) + "turns"
+
+            list_programs.append(program)
+
+        return list_programs
+
+    def save(self, folder):
+        """! Writes a program file for every program of the batch - The other motors keep the speed chosen with their slider
+        @param folder   Folder of the programs
+        @return The list of the names of the programs written
+        """
+        list_names = []
+
+        for program in self.get_programs():
+            dict_program = dict(program)
+
+            for motor_id, key in DICT_MOTOR_PROGRAM_FILE_SPEED.items():
+                dict_program[key] = DICT_MOTOR_SLIDER[motor_id][0][SLIDER_PREV_VALUE_INDEX]
+            dict_program[DICT_MOTOR_PROGRAM_FILE_SPEED[self.motor_id]] = program["speed"]
+
+            write_program_file(folder, dict_program)
+            list_names.append(program["name"])
+
+        return list_names
+
+    def __init__(self, name, movement, amplitudes, slider_values, turns, number_reps):
+        """! Initialisation of a sweep - Expands the grid of the swept values
+        @param name             Name of the sweep, prefix of the names of its programs
+        @param movement         Combination of movements of the programs
+        @param amplitudes       Swept amplitudes (mm) - Rounded to whole millimeters
+        @param slider_values    Swept slider values of the speed - Rounded to whole slider steps
+        @param turns            Swept numbers of turns of the adaptor
+        @param number_reps      Number of repetitions of every program
+        """
+        self.name = name
+        self.movement = movement
+        self.motor_id, command_a, command_b = determine_trajectory_parameters(movement, AutomaticMode.list_movement_entries)
+        self.number_reps = number_reps
+
+        grid_amplitudes, grid_slider_values, grid_turns = numpy.meshgrid(
+                                                                            numpy.rint(numpy.asarray(amplitudes, dtype = numpy.float64)).astype(numpy.int64),
+                                                                            numpy.rint(numpy.asarray(slider_values, dtype = numpy.float64)).astype(numpy.int64),
+                                                                            numpy.asarray(turns, dtype = numpy.float64),
+                                                                            indexing = 'ij')
+
+        ## Parameters of every combination
+        self.amplitudes = grid_amplitudes.ravel()
+        self.slider_values = grid_slider_values.ravel()
+        self.turns = grid_turns.ravel()
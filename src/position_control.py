@@ -0,0 +1,269 @@
+##
+# @file
+# position_control.py
+#
+# @brief
+# Movement of the tool to an absolute position. \n
+# The axes move simultaneously, each at its highest allowed speed, and the position reached is corrected with the encoders until it is within the resolution of the movement commands.
+
+# Imports
+import time
+
+from common import *
+from serial_funcs import *
+from speed_autotune import load_bench_profile, save_bench_profile, path_bench_profile
+
+# Constants
+## Axes that can be positioned: motor, encoder (None if open loop), commands towards the positive and the negative direction, and slider information
+# The positive directions are right, up and screwing up - Positions are in mm, in turns for the screw
+DICT_POSITION_AXES = {
+    "horizontal"    : (ID_MOTOR_HORIZONTAL, ID_ENCODER_HORIZONTAL, COMMAND_MOTOR_HORIZONTAL_RIGHT, COMMAND_MOTOR_HORIZONTAL_LEFT, list_slider_horizontal_info),
+    "vertical"      : (ID_MOTOR_VERTICAL_LEFT, ID_ENCODER_VERTICAL_LEFT, COMMAND_MOTOR_VERTICAL_UP, COMMAND_MOTOR_VERTICAL_DOWN, list_slider_vertical_info),
+    "screw"         : (ID_MOTOR_ADAPT, None, COMMAND_MOTOR_ADAPT_UP, COMMAND_MOTOR_ADAPT_DOWN, list_slider_adaptor_info)
+}
+
+## Key of the encoder resolutions in the profile of the bench
+PROFILE_KEY_COUNTS_PER_MM = "encoder_counts_per_mm"
+
+## Smallest movement that can be commanded (mm) - Also the tolerance of the closed loop
+POSITION_RESOLUTION_MM = 1
+
+## Smallest rotation of the screw that can be commanded (turns)
+POSITION_RESOLUTION_TURNS = 0.01
+
+## Maximal number of corrections after the first movement
+POSITION_MAX_CORRECTIONS = 3
+
+## Amplitude of the movement measuring the resolution of an encoder (mm)
+POSITION_CALIBRATION_MM = 20
+
+## Time to wait after a movement for the last encoder frames (s)
+POSITION_SETTLE_TIME_SEC = 0.2
+
+## Time added to the planned duration of a movement before it is considered failed (s)
+POSITION_TIMEOUT_MARGIN_SEC = 2.0
+
+## Period of verification of the stop of the positioning while a movement is waited for (s)
+POSITION_STOP_POLL_SEC = 0.05
+
+# Functions
+def calculate_axis_speed(axis, slider_value):
+    """! Gives the speed of an axis with the speed model of the sliders
+    @param axis             Name of the axis, key of DICT_POSITION_AXES
+    @param slider_value     Slider value of the speed
+    @return The speed in mm/s, in turns/s for the screw
+    """
+    if (axis == "screw"):
+        return calculate_speed_turn_per_sec(slider_value)
+
+    return calculate_speed_mm_per_sec(slider_value)
+
+def plan_move(dict_distances, dict_slider_values):
+    """! Plans the simultaneous movement of axes - Every axis moves at its own highest speed, which gives the shortest total time
+    @param dict_distances       Signed distance to cover by axis (mm, turns for the screw)
+    @param dict_slider_values   Slider value of the highest allowed speed by axis
+    @return The dictionnary of (command, data, duration (s)) by axis, and the duration of the whole movement (s)
+    """
+    dict_moves = {}
+
+    for axis, distance in dict_distances.items():
+        motor_id, encoder_id, command_positive, command_negative, list_slider_info = DICT_POSITION_AXES[axis]
+
+        # The movement commands take whole millimeters, or hundredths of turn for the screw
+        if (axis == "screw"):
+            data = int(round(abs(distance) / POSITION_RESOLUTION_TURNS))
+        else:
+            data = int(round(abs(distance) / POSITION_RESOLUTION_MM))
+
+        if (data == 0):
+            continue
+
+        if (distance > 0):
+            command = command_positive
+        else:
+            command = command_negative
+
+        duration = abs(distance) / max(calculate_axis_speed(axis, dict_slider_values[axis]), 1e-3)
+        dict_moves[axis] = (command, min(data, MASK_DATA), duration)
+
+    duration_total = max([duration for command, data, duration in dict_moves.values()], default = 0.0)
+
+    return dict_moves, duration_total
+
+# Classes
+class PositionController():
+    """! Follows the position of the axes from the encoders and moves the tool to absolute positions\n
+    The positions are relative to the origin set by the operator. The axes without encoder, or whose encoder resolution was not measured, are followed from the movements commanded
+    """
+    def rx_listener(self, reception_time, list_message_info):
+        """! Accumulates the counts of the encoders - Constant time per frame
+        """
+        encoder_id = list_message_info[INDEX_ID]
+
+        if (encoder_id in LIST_ENCODER_IDS):
+            if (encoder_id in self.dict_last_counts):
+                self.dict_counts[encoder_id] = self.dict_counts[encoder_id] + calculate_encoder_delta(self.dict_last_counts[encoder_id], list_message_info[INDEX_MOTOR_POSITION])
+            else:
+                self.dict_counts[encoder_id] = 0
+
+            self.dict_last_counts[encoder_id] = list_message_info[INDEX_MOTOR_POSITION]
+
+    def is_closed_loop(self, axis):
+        """! Tells if the position of an axis is measured by its encoder
+        @param axis     Name of the axis, key of DICT_POSITION_AXES
+        @return True if the encoder of the axis sent frames and its resolution is known
+        """
+        encoder_id = DICT_POSITION_AXES[axis][1]
+
+        return ((encoder_id in self.dict_counts) and (self.dict_counts_per_mm.get(axis) not in (None, 0)))
+
+    def get_position(self, axis):
+        """! Gives the position of an axis
+        @param axis     Name of the axis, key of DICT_POSITION_AXES
+        @return The position from the origin (mm, turns for the screw)
+        """
+        if (self.is_closed_loop(axis) == True):
+            encoder_id = DICT_POSITION_AXES[axis][1]
+            return (self.dict_counts[encoder_id] - self.dict_origin_counts.get(encoder_id, 0)) / self.dict_counts_per_mm[axis]
+
+        return self.dict_open_loop_positions[axis]
+
+    def set_origin(self):
+        """! Takes the current position of every axis as the origin
+        """
+        self.dict_origin_counts = dict(self.dict_counts)
+
+        for axis in self.dict_open_loop_positions:
+            self.dict_open_loop_positions[axis] = 0.0
+
+    def get_slider_values(self):
+        """! Gives the highest allowed speed of every axis - The speed chosen with the slider of the axis
+        @return The dictionnary of slider values by axis
+        """
+        return {axis : round(DICT_POSITION_AXES[axis][4][SLIDER_PREV_VALUE_INDEX]) for axis in DICT_POSITION_AXES}
+
+    def execute_moves(self, dict_moves, duration_total, stop_event):
+        """! Sends the movements of every axis at once and waits for all of them to end
+        @param dict_moves       Movements by axis, as given by plan_move
+        @param duration_total   Planned duration of the whole movement (s)
+        @param stop_event       Thread event stopping the wait when set
+        @return True if every axis ended its movement in time - False if it did not or if the positioning was stopped
+        """
+        dict_waiters = {}
+
+        # The waiters are created before the commands so that no end of trajectory can be missed
+        for axis in dict_moves:
+            dict_waiters[axis] = MotorStateWaiter([MOTOR_STATE_AUTO_END_OF_TRAJ], DICT_POSITION_AXES[axis][0])
+
+        for axis, (command, data, duration) in dict_moves.items():
+            transmit_serial_data(DICT_POSITION_AXES[axis][0], command, MODE_POSITION_CONTROL, data, self.connected_device)
+
+        time_limit = time.perf_counter() + duration_total + POSITION_TIMEOUT_MARGIN_SEC
+        flag_is_completed = True
+
+        for axis, waiter in dict_waiters.items():
+            # The wait is given up as soon as the positioning is stopped
+            while ((waiter.event_received.wait(POSITION_STOP_POLL_SEC) != True) and (stop_event.is_set() != True) and (time.perf_counter() < time_limit)):
+                pass
+
+            if (waiter.wait(0) == None):
+                if (stop_event.is_set() != True):
+                    print("Axis " + axis + " did not reach its position in time")
+                flag_is_completed = False
+
+        stop_event.wait(POSITION_SETTLE_TIME_SEC)
+
+        return (flag_is_completed and (stop_event.is_set() != True))
+
+    def go_to(self, dict_targets, stop_event):
+        """! Moves the axes to a position, then corrects the position of the closed loop axes until it is within the resolution
+        @param dict_targets     Target position by axis (mm, turns for the screw) - The axes missing keep their position
+        @param stop_event       Thread event stopping the movement when set
+        @return The dictionnary of the remaining error by axis
+        """
+        dict_slider_values = self.get_slider_values()
+        list_axes = list(dict_targets)
+
+        for i in range(1 + POSITION_MAX_CORRECTIONS):
+            if (stop_event.is_set() == True):
+                break
+
+            dict_distances = {axis : dict_targets[axis] - self.get_position(axis) for axis in list_axes}
+            dict_moves, duration_total = plan_move(dict_distances, dict_slider_values)
+
+            if (len(dict_moves) == 0):
+                break
+
+            print("Moving " + str(list(dict_moves)) + " in " + str(round(duration_total, 2)) + " s")
+
+            if (self.execute_moves(dict_moves, duration_total, stop_event) == False):
+                break
+
+            # The axes followed in open loop are assumed to have executed their command and are not corrected
+            for axis in dict_moves:
+                if (self.is_closed_loop(axis) == False):
+                    self.dict_open_loop_positions[axis] = self.dict_open_loop_positions[axis] + dict_distances[axis]
+                    list_axes.remove(axis)
+
+        return {axis : dict_targets[axis] - self.get_position(axis) for axis in dict_targets}
+
+    def calibrate_axis(self, axis, stop_event):
+        """! Measures the resolution of the encoder of an axis with a movement out and back, and saves it in the profile of the bench
+        @param axis         Name of the axis, key of DICT_POSITION_AXES
+        @param stop_event   Thread event stopping the calibration when set
+        @return The encoder counts per mm - None if no displacement was measured
+        """
+        motor_id, encoder_id, command_positive, command_negative, list_slider_info = DICT_POSITION_AXES[axis]
+
+        if (encoder_id not in self.dict_counts):
+            print("Axis " + axis + " cannot be calibrated: no frame received from its encoder")
+            return None
+
+        dict_slider_values = self.get_slider_values()
+        dict_moves, duration_total = plan_move({axis : POSITION_CALIBRATION_MM}, dict_slider_values)
+
+        count_start = self.dict_counts[encoder_id]
+        flag_is_completed = self.execute_moves(dict_moves, duration_total, stop_event)
+        count_end = self.dict_counts[encoder_id]
+
+        # The axis was stopped by the operator: it must not move again
+        if (stop_event.is_set() == True):
+            print("Axis " + axis + " calibration stopped")
+            return None
+
+        dict_moves, duration_total = plan_move({axis : -POSITION_CALIBRATION_MM}, dict_slider_values)
+        self.execute_moves(dict_moves, duration_total, stop_event)
+
+        if ((flag_is_completed == False) or (count_end == count_start)):
+            print("Axis " + axis + " cannot be calibrated: no displacement measured by its encoder")
+            return None
+
+        # The sign gives the direction of the encoder counts
+        self.dict_counts_per_mm[axis] = (count_end - count_start) / POSITION_CALIBRATION_MM
+
+        bench_profile = load_bench_profile(self.path_profile)
+        bench_profile[PROFILE_KEY_COUNTS_PER_MM] = self.dict_counts_per_mm
+        save_bench_profile(bench_profile, self.path_profile)
+
+        return self.dict_counts_per_mm[axis]
+
+    def close(self):
+        """! Stops following the encoders
+        """
+        remove_rx_listener(self.rx_listener)
+
+    def __init__(self, connected_device, path_profile = path_bench_profile):
+        """! Initialisation of the controller - Starts following the encoders, with the origin at their first count
+        @param connected_device     The Serial object currently connected to the application
+        @param path_profile         Path of the profile of the bench containing the resolution of the encoders
+        """
+        self.connected_device = connected_device
+        self.path_profile = path_profile
+
+        self.dict_counts = {}
+        self.dict_last_counts = {}
+        self.dict_origin_counts = {}
+        self.dict_open_loop_positions = {axis : 0.0 for axis in DICT_POSITION_AXES}
+        self.dict_counts_per_mm = load_bench_profile(path_profile).get(PROFILE_KEY_COUNTS_PER_MM, {})
+
+        add_rx_listener(self.rx_listener)
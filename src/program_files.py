@@ -0,0 +1,59 @@
+##
+# @file
+# program_files.py
+#
+# @brief
+# Reading and writing of the program files saved from the programs page. \n
+# A program file alternates a description line and a value line for every parameter of an automatic test.
+
+# Imports
+import os
+
+# Constants
+## Description lines of the parameters, in the order of the file
+LIST_PROGRAM_FILE_LINES = [
+    ("movement",                "Movement sequence"),
+    ("amplitude",               "Amplitude (mm)"),
+    ("turns",                   "Number of turns to do"),
+    ("vertical_speed",          "Vertical speed (mm/s)"),
+    ("horizontal_speed",        "Horizontal speed (mm/s)"),
+    ("adaptor_speed",           "Adaptor speed (turn/s)"),
+    ("reps",                    "Number of repetitions to execute"),
+    ("name",                    "Name given to test")
+]
+
+# Functions
+def get_program_path(folder, name):
+    """! Gives the path of a program file
+    @param folder   Folder of the programs
+    @param name     Name of the program
+    @return The path of the program file
+    """
+    return os.path.join(folder, name + '.txt')
+
+def write_program_file(folder, dict_program):
+    """! Writes a program file
+    @param folder           Folder of the programs
+    @param dict_program     Dictionnary of the values of the parameters by key of LIST_PROGRAM_FILE_LINES - The values are written as given
+    @return The path of the program file
+    """
+    path_program = get_program_path(folder, str(dict_program["name"]))
+
+    with open(path_program, "w") as f:
+        for key, description in LIST_PROGRAM_FILE_LINES:
+            f.write(description + '\n')
+            f.write(str(dict_program[key]) + '\n')
+
+    return path_program
+
+def read_program_file(folder, name):
+    """! Reads a program file
+    @param folder   Folder of the programs
+    @param name     Name of the program
+    @return The dictionnary of the values of the parameters, as strings, by key of LIST_PROGRAM_FILE_LINES
+    """
+    with open(get_program_path(folder, name), "r") as f:
+        list_lines = f.read().splitlines()
+
+    # The values are on every second line, after their description
+    return {key : value for (key, description), value in zip(LIST_PROGRAM_FILE_LINES, list_lines[1::2])}
@@ -0,0 +1,163 @@
+##
+# @file
+# program_validation.py
+#
+# @brief
+# Validation of the parameters of automatic programs against the limits of the bench. \n
+# The programs are checked as numpy arrays, so that one program, a library of program files or a whole sweep is validated in a single pass. \n
+# The errors are given as masks of the faulty programs by error message, to be shown by the caller without blocking.
+
+# Imports
+import numpy
+
+from common import *
+from serial_funcs import *
+from automatic_control import AutomaticMode, determine_trajectory_parameters
+from motion_profile import DICT_MOTOR_SLIDER
+from program_files import read_program_file
+
+# Constants
+## Errors of the programs
+VALIDATION_ERROR_VALUE          = "Value is not a number"
+VALIDATION_ERROR_MOVEMENT       = "Missing desired direction"
+VALIDATION_ERROR_AMPLITUDE      = "Amplitude out of the limits of the bench"
+VALIDATION_ERROR_AMPLITUDE_DATA = "Amplitude too large for a movement command"
+VALIDATION_ERROR_TURNS          = "Negative number of turns"
+VALIDATION_ERROR_TURNS_DATA     = "Number of turns too large for a movement command"
+VALIDATION_ERROR_SPEED          = "Speed out of the range of the slider"
+VALIDATION_ERROR_REPS           = "Negative number of repetitions"
+
+## Motor of every movement
+DICT_MOVEMENT_MOTOR = {movement : determine_trajectory_parameters(movement, AutomaticMode.list_movement_entries)[0] for movement in AutomaticMode.list_movement_entries}
+
+## Key of the speed of every motor in the program files
+DICT_MOTOR_PROGRAM_FILE_SPEED = {
+    ID_MOTOR_VERTICAL_LEFT  : "vertical_speed",
+    ID_MOTOR_HORIZONTAL     : "horizontal_speed",
+    ID_MOTOR_ADAPT          : "adaptor_speed"
+}
+
+# Functions
+def parse_program_values(list_values, value_type):
+    """! Reads values entered as text
+    @param list_values  Values to read, as text or numbers
+    @param value_type   Type of the values: int or float
+    @return The numpy array of the values, 0 where they cannot be read, and the mask of the values that cannot be read
+    """
+    values = numpy.zeros(len(list_values), dtype = numpy.float64)
+    mask_invalid = numpy.zeros(len(list_values), dtype = bool)
+
+    for i, value in enumerate(list_values):
+        try:
+            values[i] = value_type(value)
+        except (TypeError, ValueError):
+            mask_invalid[i] = True
+
+    return values, mask_invalid
+
+def validate_programs(movements, amplitudes, turns, number_reps, slider_values = None, max_vertical = MAX_VERTICAL, max_horizontal = MAX_HORIZONTAL):
+    """! Checks programs against the limits of the bench\n
+    The amplitude of the movements of the adaptor is given by its number of turns, so only the turns of these movements are limited. \n
+    The data of a movement command holds 16 bits: the amplitude in mm, or the number of turns in hundredths of turn
+    @param movements        Combination of movements of every program
+    @param amplitudes       Amplitude of every program (mm)
+    @param turns            Number of turns of the adaptor of every program
+    @param number_reps      Number of repetitions of every program
+    @param slider_values    Slider value of the speed of the motor of every program - The speeds are not checked if None
+    @param max_vertical     Largest amplitude of the vertical movements (mm)
+    @param max_horizontal   Largest amplitude of the horizontal movements (mm)
+    @return The dictionnary of the masks of the faulty programs by error - Only the errors found are given
+    """
+    amplitudes = numpy.asarray(amplitudes, dtype = numpy.float64)
+    turns = numpy.asarray(turns, dtype = numpy.float64)
+    number_reps = numpy.asarray(number_reps, dtype = numpy.float64)
+
+    if (len(amplitudes) == 0):
+        return {}
+
+    # The motor is found once for every distinct movement
+    list_distinct_movements, index_movements = numpy.unique(numpy.asarray(movements, dtype = str), return_inverse = True)
+    motor_ids = numpy.array([DICT_MOVEMENT_MOTOR.get(movement, ID_RESERVED) for movement in list_distinct_movements])[index_movements]
+
+    mask_vertical = (motor_ids == ID_MOTOR_VERTICAL_LEFT)
+    mask_horizontal = (motor_ids == ID_MOTOR_HORIZONTAL)
+    mask_adaptor = (motor_ids == ID_MOTOR_ADAPT)
+    amplitudes_max = numpy.select([mask_vertical, mask_horizontal], [max_vertical, max_horizontal], default = numpy.inf)
+
+    dict_masks = {
+        VALIDATION_ERROR_MOVEMENT       : (motor_ids == ID_RESERVED),
+        VALIDATION_ERROR_AMPLITUDE      : (~mask_adaptor & ((amplitudes < 0) | (amplitudes > amplitudes_max))),
+        VALIDATION_ERROR_AMPLITUDE_DATA : (~mask_adaptor & (amplitudes > MASK_DATA)),
+        VALIDATION_ERROR_TURNS          : (turns < 0),
+        VALIDATION_ERROR_TURNS_DATA     : (mask_adaptor & (numpy.trunc(turns * 100) > MASK_DATA)),
+        VALIDATION_ERROR_REPS           : (number_reps < 0)
+    }
+
+    if (slider_values is not None):
+        slider_values = numpy.asarray(slider_values, dtype = numpy.float64)
+        sliders_max = numpy.select(
+                                    [motor_ids == motor_id for motor_id in DICT_MOTOR_SLIDER],
+                                    [slider_max for list_slider_info, slider_max in DICT_MOTOR_SLIDER.values()],
+                                    default = numpy.inf)
+
+        dict_masks[VALIDATION_ERROR_SPEED] = ((slider_values < 0) | (slider_values > sliders_max))
+
+    return {error : mask for error, mask in dict_masks.items() if (mask.any() == True)}
+
+def validate_program_entries(list_programs, max_vertical = MAX_VERTICAL, max_horizontal = MAX_HORIZONTAL):
+    """! Checks programs entered as text, as read from the entries of the GUI or from program files
+    @param list_programs    Dictionnaries of the "movement", "amplitude", "turns", "reps" and optionally "speed" slider value of the programs
+    @param max_vertical     Largest amplitude of the vertical movements (mm)
+    @param max_horizontal   Largest amplitude of the horizontal movements (mm)
+    @return The dictionnary of the masks of the faulty programs by error - Only the errors found are given
+    """
+    amplitudes, mask_invalid_amplitudes = parse_program_values([program.get("amplitude") for program in list_programs], int)
+    turns, mask_invalid_turns = parse_program_values([program.get("turns") for program in list_programs], float)
+    number_reps, mask_invalid_reps = parse_program_values([program.get("reps") for program in list_programs], int)
+    slider_values, mask_invalid_speeds = parse_program_values([program.get("speed", 0) for program in list_programs], float)
+
+    dict_masks = validate_programs(
+                                    [program.get("movement") for program in list_programs],
+                                    amplitudes,
+                                    turns,
+                                    number_reps,
+                                    slider_values,
+                                    max_vertical,
+                                    max_horizontal)
+
+    mask_invalid = (mask_invalid_amplitudes | mask_invalid_turns | mask_invalid_reps | mask_invalid_speeds)
+    if (mask_invalid.any() == True):
+        dict_masks[VALIDATION_ERROR_VALUE] = mask_invalid
+
+    return dict_masks
+
+def validate_program_library(folder, list_names, max_vertical = MAX_VERTICAL, max_horizontal = MAX_HORIZONTAL):
+    """! Checks saved programs - The speed of every program is the one saved for the motor of its movement
+    @param folder           Folder of the programs
+    @param list_names       Names of the programs
+    @param max_vertical     Largest amplitude of the vertical movements (mm)
+    @param max_horizontal   Largest amplitude of the horizontal movements (mm)
+    @return The dictionnary of the list of errors by program name - Empty lists for the valid programs
+    """
+    list_programs = []
+
+    for name in list_names:
+        dict_program = read_program_file(folder, name)
+        motor_id = DICT_MOVEMENT_MOTOR.get(dict_program.get("movement"))
+
+        if (motor_id != None):
+            dict_program["speed"] = dict_program.get(DICT_MOTOR_PROGRAM_FILE_SPEED[motor_id])
+
+        list_programs.append(dict_program)
+
+    dict_masks = validate_program_entries(list_programs, max_vertical, max_horizontal)
+
+    return {name : get_program_errors(dict_masks, i) for i, name in enumerate(list_names)}
+
+def get_program_errors(dict_masks, index):
+    """! Gives the errors of one of the programs checked
+    @param dict_masks   Masks of the faulty programs by error, as given by validate_programs
+    @param index        Index of the program
+    @return The list of the error messages of the program
+    """
+    return [error for error, mask in dict_masks.items() if (mask[index] == True)]
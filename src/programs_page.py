@@ -7,6 +7,7 @@
 # All its components and callback functions will be defined here.
 
 # Imports
+import os
 import tkinter
 import customtkinter
 from threading import Thread
@@ -15,12 +16,13 @@ from glob import glob
 
 from serial_funcs import *
 from common import *
-from automatic_control import AutomaticMode
+from automatic_control import AutomaticMode, determine_trajectory_parameters, PARAMETER_SPEED, PARAMETER_REPS, PARAMETER_AMPLITUDE
+from motion_profile import LIST_PROFILE_ENTRIES, PROFILE_CONSTANT
+from program_files import write_program_file, get_program_path
+from parameter_sweep import ParameterSweep, parse_sweep_values
+from program_validation import validate_program_entries, validate_program_library, get_program_errors
 
 # Constants
-MAX_HORIZONTAL  = 300
-MAX_VERTICAL    = 300
-
 INDEX_COMBOBOX_MOVEMENTS        = 0
 INDEX_ENTRY_DESIRED_POSITION    = 1
 INDEX_ENTRY_DESIRED_TURNS       = 2
@@ -33,6 +35,16 @@ INDEX_SLIDER_ADAPTOR_SPEED      = 8
 INDEX_ENTRY_NUMBER_REPS_TO_DO   = 9
 INDEX_LABEL_NUMBER_REPS_ACTUAL  = 10
 INDEX_ENTRY_FILENAME            = 11
+INDEX_OPTIONMENU_SPEED_PROFILE  = 12
+INDEX_CHECKBOX_OFFLOAD          = 13
+INDEX_LABEL_VALIDATION          = 14
+
+## Index of the speed slider of every motor in the list of objects of the page
+DICT_MOTOR_SLIDER_INDEX = {
+    ID_MOTOR_VERTICAL_LEFT  : INDEX_SLIDER_VERTICAL_SPEED,
+    ID_MOTOR_HORIZONTAL     : INDEX_SLIDER_HORIZONTAL_SPEED,
+    ID_MOTOR_ADAPT          : INDEX_SLIDER_ADAPTOR_SPEED
+}
 
 INDEX_LIST_SLIDER_LABEL_VERTICAL_SPEED      = 0
 INDEX_LIST_SLIDER_LABEL_HORIZONTAL_SPEED    = 1
@@ -83,6 +95,15 @@ class ProgramsList(customtkinter.CTkScrollableFrame):
 
                 self.counter_programs = self.counter_programs + 1
 
+            # The whole library is checked at once and the faulty programs are marked
+            dict_program_errors = validate_program_library(path_to_programs_folder, self.list_buttons_programs_names)
+            for i in range(len(self.list_buttons_programs_names)):
+                list_errors = dict_program_errors[self.list_buttons_programs_names[i]]
+
+                if (len(list_errors) != 0):
+                    self.list_buttons_programs_objects[i].configure(fg_color = '#EE3B3B')
+                    print(self.list_buttons_programs_names[i] + ": " + ", ".join(list_errors))
+
     def add_individual_program(self, name_program):
         """! Upon creation of a program by the user after the creation of the programs page, generates and places a button corresponding to the saved settings
         @param name_program     Name of the program given by the user
@@ -149,22 +170,49 @@ class ProgramsPageFrame(customtkinter.CTkFrame):
         @param thread_services      All thread related services to be dispatched throughout the different GUI frames
         @param connected_device     The serial object connected to the application
         """
-        desired_position = int(list_objects[INDEX_ENTRY_DESIRED_POSITION].get())
-        desired_direction = list_objects[INDEX_COMBOBOX_MOVEMENTS].get()
-        
-        desired_turns = float(list_objects[INDEX_ENTRY_DESIRED_TURNS].get())
-        desired_reps = int(list_objects[INDEX_ENTRY_NUMBER_REPS_TO_DO].get())
+        error_msg = None
 
-        error_msg = self.verify_automatic_mode_parameters(list_objects)
+        # The parameters are only needed, and only readable, to start a program
+        if (button_submit.cget("text") == "Start Program"):
+            error_msg = self.verify_automatic_mode_parameters(list_objects)
 
         if (error_msg == None):
             if (button_submit.cget("text") == "Start Program"): 
+                desired_position = int(list_objects[INDEX_ENTRY_DESIRED_POSITION].get())
+                desired_direction = list_objects[INDEX_COMBOBOX_MOVEMENTS].get()
+                desired_turns = float(list_objects[INDEX_ENTRY_DESIRED_TURNS].get())
+                desired_reps = int(list_objects[INDEX_ENTRY_NUMBER_REPS_TO_DO].get())
+
                 button_submit.configure(text = "Stop Program", fg_color = '#EE3B3B')
                 button_pause.configure(text = "Pause Program", fg_color = '#FFFF00', state = "normal")
 
                 if (self.flag_is_auto_thread_stopped == True):
-                    thread_services.start_auto_mode_thread(desired_position, desired_direction, desired_turns, desired_reps, list_objects[INDEX_LABEL_NUMBER_REPS_ACTUAL], connected_device)
-                    self.flag_is_auto_thread_stopped = False
+                    flag_resume = False
+
+                    # Propose to continue an unfinished run of the same program instead of executing all of its repetitions again
+                    resumable_repetitions = thread_services.get_resumable_repetitions(desired_position, desired_direction, desired_turns, desired_reps)
+                    if (resumable_repetitions > 0):
+                        message_resume = CTkMessagebox(
+                                                        title       = "Unfinished run",
+                                                        message     = "A previous run of this program stopped after " + str(resumable_repetitions) + " repetitions. Resume it?",
+                                                        icon        = "question",
+                                                        option_1    = "Restart",
+                                                        option_2    = "Resume")
+                        flag_resume = (message_resume.get() == "Resume")
+
+                    # The run is linked to its saved program in the results, if it was saved
+                    program_name = list_objects[INDEX_ENTRY_FILENAME].get()
+                    path_program = get_program_path(path_to_programs_folder, program_name)
+                    if (os.path.isfile(path_program) == False):
+                        program_name = None
+                        path_program = None
+
+                    if (thread_services.start_auto_mode_thread(desired_position, desired_direction, desired_turns, desired_reps, list_objects[INDEX_LABEL_NUMBER_REPS_ACTUAL], connected_device, flag_resume, list_objects[INDEX_OPTIONMENU_SPEED_PROFILE].get(), (list_objects[INDEX_CHECKBOX_OFFLOAD].get() == 1), program_name, path_program) == True):
+                        self.flag_is_auto_thread_stopped = False
+                    else:
+                        button_submit.configure(text = "Start Program", fg_color = '#66CD00', text_color = '#000000')
+                        button_pause.configure(text = "Pause Program", fg_color = '#66CD00', text_color = '#000000', state = "disabled")
+                        list_objects[INDEX_LABEL_VALIDATION].configure(text = "A movement is already in progress")
             else:
                 button_submit.configure(text = "Start Program", fg_color = '#66CD00', text_color = '#000000')
                 button_pause.configure(text = "Pause Program", fg_color = '#66CD00', text_color = '#000000', state = "disabled")
@@ -173,39 +221,46 @@ class ProgramsPageFrame(customtkinter.CTkFrame):
                     thread_services.stop_auto_mode_thread()
                     self.flag_is_auto_thread_stopped = True
 
+    def button_apply_click(self, list_objects, thread_services):
+        """! Applies the amplitude, the number of repetitions and the speed of the movement to the running program at its next checkpoint
+        @param list_objects         List of the different parameters for the tests
+        @param thread_services      All thread related services to be dispatched throughout the different GUI frames
+        """
+        if (self.verify_automatic_mode_parameters(list_objects) != None):
+            return
+
+        motor_id, command_a, command_b = determine_trajectory_parameters(list_objects[INDEX_COMBOBOX_MOVEMENTS].get(), AutomaticMode.list_movement_entries)
+
+        dict_parameters = {
+                            PARAMETER_AMPLITUDE : int(list_objects[INDEX_ENTRY_DESIRED_POSITION].get()),
+                            PARAMETER_REPS      : int(list_objects[INDEX_ENTRY_NUMBER_REPS_TO_DO].get()),
+                            PARAMETER_SPEED     : round(list_objects[DICT_MOTOR_SLIDER_INDEX[motor_id]].get())}
+
+        if (thread_services.change_auto_mode_parameters(dict_parameters) == False):
+            list_objects[INDEX_LABEL_VALIDATION].configure(text = "No running program whose parameters can be changed")
+
     def verify_automatic_mode_parameters(self, list_objects):
-        """! Verifies the parameters of the automatic movement submission
+        """! Verifies the parameters of the automatic movement submission and shows the errors found below the movement
         @param list_objects List of the different parameters for the tests
-        @return Returns an empty error message if no errors are detected, non-null otherwise
+        @return Returns None if no errors are detected, the text of the errors otherwise
         """
-        desired_position = int(list_objects[INDEX_ENTRY_DESIRED_POSITION].get())
-        desired_direction = list_objects[INDEX_COMBOBOX_MOVEMENTS].get()
-        
-        desired_turns = float(list_objects[INDEX_ENTRY_DESIRED_TURNS].get())
-        desired_reps = int(list_objects[INDEX_ENTRY_NUMBER_REPS_TO_DO].get())
+        program = {
+                    "movement"  : list_objects[INDEX_COMBOBOX_MOVEMENTS].get(),
+                    "amplitude" : list_objects[INDEX_ENTRY_DESIRED_POSITION].get(),
+                    "turns"     : list_objects[INDEX_ENTRY_DESIRED_TURNS].get(),
+                    "reps"      : list_objects[INDEX_ENTRY_NUMBER_REPS_TO_DO].get()}
 
-        error_msg = None
+        if (program["movement"] in AutomaticMode.list_movement_entries):
+            motor_id, command_a, command_b = determine_trajectory_parameters(program["movement"], AutomaticMode.list_movement_entries)
+            program["speed"] = list_objects[DICT_MOTOR_SLIDER_INDEX[motor_id]].get()
 
-        if desired_direction == AutomaticMode.list_movement_entries[0] or desired_direction == AutomaticMode.list_movement_entries[1]:
-            if ((desired_position > MAX_VERTICAL) or (desired_position < 0)): 
-                error_msg = CTkMessagebox(title="Error", message="Exceeds maximum value", icon="cancel")
-            
-        # For any horizontal movement
-        if desired_direction == AutomaticMode.list_movement_entries[2] or desired_direction == AutomaticMode.list_movement_entries[3]:
-            if ((desired_position > MAX_VERTICAL) or (desired_position < 0)):
-                error_msg = CTkMessagebox(title="Error", message="Exceeds maximum value", icon="cancel")
-        
-        # Combobox cannot be empty
-        if desired_direction == "Choose movement":
-            error_msg = CTkMessagebox(title="Error", message="Missing desired direction", icon="cancel")
+        list_errors = get_program_errors(validate_program_entries([program]), 0)
+        error_msg = None
 
-        # Turns cannot be negative
-        if desired_turns < 0:
-            error_msg = CTkMessagebox(title="Error", message="Number of turns cannot be negative", icon="cancel")
+        if (len(list_errors) != 0):
+            error_msg = "\n".join(list_errors)
 
-        # Number of reps cannot be negative
-        if desired_reps < 0:
-            error_msg = CTkMessagebox(title="Error", message="Number of repetitions cannot be negative", icon="cancel")
+        list_objects[INDEX_LABEL_VALIDATION].configure(text = error_msg if (error_msg != None) else "")
 
         return error_msg
 
@@ -214,43 +269,136 @@ class ProgramsPageFrame(customtkinter.CTkFrame):
         @param filename             Name of the file to be created
         @param frame_programs_list  List of all the created automatic programs
         """
-        complete_path_new_file = path_to_programs_folder + '\\' + filename + '.txt'
-        name_file_to_show = filename.replace(path_to_programs_folder + '\\', '') + ".txt"
+        if (self.verify_automatic_mode_parameters(self.list_objects_programs_page) != None):
+            return
+
+        dict_program = {
+                        "movement"          : self.list_objects_programs_page[INDEX_COMBOBOX_MOVEMENTS].get(),
+                        "amplitude"         : self.list_objects_programs_page[INDEX_ENTRY_DESIRED_POSITION].get(),
+                        "turns"             : self.list_objects_programs_page[INDEX_ENTRY_DESIRED_TURNS].get(),
+                        "vertical_speed"    : list_slider_vertical_info[SLIDER_PREV_VALUE_INDEX],
+                        "horizontal_speed"  : list_slider_horizontal_info[SLIDER_PREV_VALUE_INDEX],
+                        "adaptor_speed"     : list_slider_adaptor_info[SLIDER_PREV_VALUE_INDEX],
+                        "reps"              : self.list_objects_programs_page[INDEX_ENTRY_NUMBER_REPS_TO_DO].get(),
+                        "name"              : filename}
+
+        write_program_file(path_to_programs_folder, dict_program)
+
+        frame_programs_list.add_individual_program(filename)
+        frame_programs_list.list_buttons_programs_objects[-1].configure(command = lambda : self.button_select_program_callback(filename))
+        print(filename)
+
+    def build_sweep(self, dict_sweep_entries, label_result):
+        """! Creates the sweep of the values entered for the movement and the number of repetitions of the page
+        @param dict_sweep_entries   Entries of the swept values by parameter ("amplitudes", "speeds" and "turns")
+        @param label_result         Label showing the result of the sweep
+        @return The ParameterSweep object - None if the values cannot be read
+        """
+        movement = self.list_objects_programs_page[INDEX_COMBOBOX_MOVEMENTS].get()
+
+        if (movement not in AutomaticMode.list_movement_entries):
+            label_result.configure(text = "Missing desired direction")
+            return None
+
+        try:
+            sweep = ParameterSweep(
+                                    self.list_objects_programs_page[INDEX_ENTRY_FILENAME].get(),
+                                    movement,
+                                    parse_sweep_values(dict_sweep_entries["amplitudes"].get()),
+                                    parse_sweep_values(dict_sweep_entries["speeds"].get()),
+                                    parse_sweep_values(dict_sweep_entries["turns"].get()),
+                                    int(self.list_objects_programs_page[INDEX_ENTRY_NUMBER_REPS_TO_DO].get()))
+        except ValueError as error:
+            label_result.configure(text = "Invalid values: " + str(error))
+            return None
+
+        # The whole batch is checked at once and its errors are shown without blocking
+        dict_errors = sweep.check()
+        duration_total = float(sweep.estimate_durations().sum())
+
+        text_result = str(len(sweep.amplitudes)) + " programs - Estimated duration: " + str(round(duration_total / 3600, 2)) + " h"
+        for error, mask in dict_errors.items():
+            text_result = text_result + "\n" + error + ": " + str(int(mask.sum())) + " programs"
+
+        label_result.configure(text = text_result)
+
+        if ((len(dict_errors) != 0) or (len(sweep.amplitudes) == 0)):
+            return None
+
+        return sweep
+
+    def button_sweep_save_click(self, dict_sweep_entries, label_result, frame_programs_list):
+        """! Saves every program of the sweep as a program file
+        @param dict_sweep_entries   Entries of the swept values by parameter
+        @param label_result         Label showing the result of the sweep
+        @param frame_programs_list  List of all the created automatic programs
+        """
+        sweep = self.build_sweep(dict_sweep_entries, label_result)
 
-        vertical_speed      = list_slider_vertical_info[SLIDER_PREV_VALUE_INDEX]
-        horizontal_speed    = list_slider_horizontal_info[SLIDER_PREV_VALUE_INDEX]
-        adaptor_speed       = list_slider_adaptor_info[SLIDER_PREV_VALUE_INDEX]
+        if (sweep == None):
+            return
 
-        with open(complete_path_new_file, "w") as f:
-            f.write('Movement sequence\n')
-            f.write(self.list_objects_programs_page[INDEX_COMBOBOX_MOVEMENTS].get() + '\n')
+        for name_program in sweep.save(path_to_programs_folder):
+            frame_programs_list.add_individual_program(name_program)
+            frame_programs_list.list_buttons_programs_objects[-1].configure(command = lambda name_program = name_program : self.button_select_program_callback(name_program))
+
+    def button_sweep_run_click(self, dict_sweep_entries, label_result, button_submit, button_pause, thread_services, connected_device):
+        """! Queues every program of the sweep to run back to back
+        @param dict_sweep_entries   Entries of the swept values by parameter
+        @param label_result         Label showing the result of the sweep
+        @param button_submit        The entry button object
+        @param button_pause         The pause button object
+        @param thread_services      All thread related services to be dispatched throughout the different GUI frames
+        @param connected_device     The serial object connected to the application
+        """
+        sweep = self.build_sweep(dict_sweep_entries, label_result)
 
-            f.write('Amplitude (mm)\n')
-            f.write(self.list_objects_programs_page[INDEX_ENTRY_DESIRED_POSITION].get() + '\n')
+        if (sweep == None):
+            return
 
-            f.write('Number of turns to do\n')
-            f.write(self.list_objects_programs_page[INDEX_ENTRY_DESIRED_TURNS].get() + '\n')
+        if (thread_services.start_program_queue_thread(sweep.get_programs(), self.list_objects_programs_page[INDEX_LABEL_NUMBER_REPS_ACTUAL], connected_device, self.list_objects_programs_page[INDEX_OPTIONMENU_SPEED_PROFILE].get()) == False):
+            label_result.configure(text = "A movement is already in progress")
+            return
 
-            f.write('Vertical speed (mm/s)\n')
-            f.write(str(vertical_speed) + '\n')
+        # The queue is stopped and paused as a single program
+        button_submit.configure(text = "Stop Program", fg_color = '#EE3B3B')
+        button_pause.configure(text = "Pause Program", fg_color = '#FFFF00', state = "normal")
+        self.flag_is_auto_thread_stopped = False
 
-            f.write('Horizontal speed (mm/s)\n')
-            f.write(str(horizontal_speed) + '\n')
+    def button_sweep_click(self, button_submit, button_pause, frame_programs_list, thread_services, connected_device):
+        """! Opens the window of the parameter sweeps of the movement selected in the page
+        @param button_submit        The entry button object
+        @param button_pause         The pause button object
+        @param frame_programs_list  List of all the created automatic programs
+        @param thread_services      All thread related services to be dispatched throughout the different GUI frames
+        @param connected_device     The serial object connected to the application
+        """
+        window_sweep = customtkinter.CTkToplevel(self)
+        window_sweep.title("Parameter sweep")
+        window_sweep.grid_columnconfigure((COLUMN_ZERO, COLUMN_TWO), weight = 1)
 
-            f.write('Adaptor speed (turn/s)\n')
-            f.write(str(adaptor_speed) + '\n')
+        dict_sweep_entries = {}
 
-            f.write('Number of repetitions to execute\n')
-            f.write(self.list_objects_programs_page[INDEX_ENTRY_NUMBER_REPS_TO_DO].get() + '\n')
+        for row, (key, text) in enumerate([("amplitudes", "Amplitudes (mm)"), ("speeds", "Speeds (slider values)"), ("turns", "Numbers of turns")]):
+            label_generate(window_sweep, row, COLUMN_ZERO, 1, 1, PAD_X_USUAL, (PAD_Y_USUAL, 5), text)
+            dict_sweep_entries[key] = entry_generate(window_sweep, row, COLUMN_ONE, 1, 2, PAD_X_USUAL, (PAD_Y_USUAL, 5), "10, 20 or 10:50:10")
 
-            f.write('Name given to test\n')
-            f.write(filename + '\n')
+        label_result = label_generate(window_sweep, ROW_THREE, COLUMN_ZERO, 1, 3, PAD_X_USUAL, PAD_Y_USUAL, "")
 
-            f.close()
-        
-            frame_programs_list.add_individual_program(filename)
-            frame_programs_list.list_buttons_programs_objects[-1].configure(command = lambda : self.button_select_program_callback(filename))
-            print(filename)
+        button_check = button_generate(window_sweep, ROW_FOUR, COLUMN_ZERO, 1, 1, PAD_X_USUAL, PAD_Y_USUAL, "Check")
+        button_check.configure(command = lambda : self.build_sweep(dict_sweep_entries, label_result))
+
+        button_save = button_generate(window_sweep, ROW_FOUR, COLUMN_ONE, 1, 1, PAD_X_USUAL, PAD_Y_USUAL, "Save programs")
+        button_save.configure(
+                                command = lambda : self.button_sweep_save_click(dict_sweep_entries, label_result, frame_programs_list),
+                                fg_color = '#FFC0CB',
+                                text_color = '#000000')
+
+        button_run = button_generate(window_sweep, ROW_FOUR, COLUMN_TWO, 1, 1, PAD_X_USUAL, PAD_Y_USUAL, "Run batch")
+        button_run.configure(
+                                command = lambda : self.button_sweep_run_click(dict_sweep_entries, label_result, button_submit, button_pause, thread_services, connected_device),
+                                fg_color = '#66CD00',
+                                text_color = '#000000')
 
     def button_select_program_callback(self, filename):
         """! Callback function when selecting a program from the scrollable frame\n
@@ -321,7 +469,7 @@ class ProgramsPageFrame(customtkinter.CTkFrame):
                                         sticky      = 'nsew')
         
         control_buttons_container.grid_rowconfigure(0, weight = 1)
-        control_buttons_container.grid_columnconfigure((0, 3), weight = 1)
+        control_buttons_container.grid_columnconfigure((0, 4), weight = 1)
 
         # Generate scrollable frame containing all programs available on computer with corresponding callback functions for buttons
         programs_list_frame = ProgramsList(
@@ -364,6 +512,53 @@ class ProgramsPageFrame(customtkinter.CTkFrame):
                                     pady        = (0, PAD_Y_USUAL),
                                     sticky      = 'nsew')
 
+        label_speed_profile = label_generate(
+                                                self,
+                                                ROW_TWO,
+                                                COLUMN_ZERO,
+                                                1,
+                                                1,
+                                                PAD_X_USUAL,
+                                                (PAD_Y_USUAL, 5),
+                                                "Speed profile")
+        optionmenu_speed_profile = customtkinter.CTkOptionMenu(
+                                                                master = self,
+                                                                values = LIST_PROFILE_ENTRIES,
+                                                                dynamic_resizing = False)
+        optionmenu_speed_profile.set(PROFILE_CONSTANT)
+        optionmenu_speed_profile.grid(
+                                        row         = ROW_THREE,
+                                        column      = COLUMN_ZERO,
+                                        rowspan     = 1,
+                                        columnspan  = 1,
+                                        padx        = PAD_X_USUAL,
+                                        pady        = (0, PAD_Y_USUAL),
+                                        sticky      = 'nsew')
+
+        checkbox_offload = customtkinter.CTkCheckBox(
+                                                        master = self,
+                                                        text = "Run on microcontroler")
+        checkbox_offload.grid(
+                                row         = ROW_FOUR,
+                                column      = COLUMN_ZERO,
+                                rowspan     = 1,
+                                columnspan  = 1,
+                                padx        = PAD_X_USUAL,
+                                pady        = (PAD_Y_USUAL, PAD_Y_USUAL),
+                                sticky      = 'nsew')
+
+        # Errors of the parameters entered, shown without blocking the page
+        label_validation = label_generate(
+                                            self,
+                                            ROW_FIVE,
+                                            COLUMN_ZERO,
+                                            3,
+                                            1,
+                                            PAD_X_USUAL,
+                                            PAD_Y_USUAL,
+                                            "")
+        label_validation.configure(text_color = '#EE3B3B', wraplength = 150, justify = "left")
+
         list_slider_items = generate_sliders(self, MODE_AUTOMATIC, connected_device)
 
         label_desired_position = label_generate(
@@ -475,7 +670,10 @@ class ProgramsPageFrame(customtkinter.CTkFrame):
                                             list_slider_items[INDEX__LIST_SLIDER_SLIDER_ADAPTOR_SPEED],
                                             entry_number_reps_to_do,
                                             label_number_reps_actual,
-                                            entry_filename))
+                                            entry_filename,
+                                            optionmenu_speed_profile,
+                                            checkbox_offload,
+                                            label_validation))
 
         # Generate buttons
         button_save_settings  = button_generate(
@@ -514,6 +712,23 @@ class ProgramsPageFrame(customtkinter.CTkFrame):
                                         PAD_Y_USUAL,
                                         "Start Program")
 
+        btn_apply = button_generate(
+                                        control_buttons_container,
+                                        ROW_ZERO,
+                                        COLUMN_FOUR,
+                                        1,
+                                        1,
+                                        PAD_X_USUAL,
+                                        PAD_Y_USUAL,
+                                        "Apply to run")
+        btn_apply.configure(command = lambda : self.button_apply_click(
+                                                                            self.list_objects_programs_page,
+                                                                            thread_services),
+                                                                            fg_color = '#FFC0CB',
+                                                                            text_color = '#000000',
+                                                                            width = 100,
+                                                                            height = 50)
+
         btn_pause.configure(command = lambda : self.button_pause_click(
                                                                             btn_pause,
                                                                             thread_services), 
@@ -531,4 +746,24 @@ class ProgramsPageFrame(customtkinter.CTkFrame):
                                                                             fg_color = '#66CD00', 
                                                                             text_color = '#000000',
                                                                             width = 100,
+                                                                            height = 50)
+
+        button_sweep = button_generate(
+                                        self,
+                                        ROW_SEVEN,
+                                        COLUMN_FOUR,
+                                        1,
+                                        1,
+                                        PAD_X_USUAL,
+                                        PAD_Y_USUAL,
+                                        "Parameter sweep")
+        button_sweep.configure(command = lambda : self.button_sweep_click(
+                                                                            btn_submit,
+                                                                            btn_pause,
+                                                                            programs_list_frame,
+                                                                            thread_services,
+                                                                            connected_device),
+                                                                            fg_color = '#FFC0CB',
+                                                                            text_color = '#000000',
+                                                                            width = 150,
                                                                             height = 50)
\ No newline at end of file
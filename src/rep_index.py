@@ -0,0 +1,217 @@
+##
+# @file
+# rep_index.py
+#
+# @brief
+# Index of the repetitions of the archived runs. \n
+# The index is written while the run is recorded and maps every movement of a repetition to its frames in the archive, so that a repetition is analysed without scanning the whole run.
+
+# Imports
+import os
+import time
+
+import numpy
+
+from serial_funcs import DICT_MOTOR_ENCODER, MOTOR_STATE_AUTO_IN_TRAJ, MOTOR_STATE_AUTO_END_OF_TRAJ, calculate_encoder_delta
+from automatic_control import RunObserver, AutomaticMode, CHECKPOINT_B, determine_trajectory_parameters
+from archive_compaction import open_run_archive
+
+# Constants
+## Name of the index file of a run
+REP_INDEX_FILE = 'rep_index.bin'
+
+## One row per movement of a repetition - The frames of the movement are [frame_start, frame_end[ in the archive
+REP_INDEX_DTYPE = numpy.dtype([
+    ("repetition",      '<i8'),
+    ("checkpoint",      'u1'),
+    ("frame_start",     '<i8'),
+    ("frame_end",       '<i8'),
+    ("time_command",    '<f8')
+])
+
+# Classes
+class RepIndexWriter(RunObserver):
+    """! Writes the index of the repetitions of a run next to its archive\n
+    Repetitions are numbered from 1: repetition n is the movement towards checkpoint B followed by the movement back to checkpoint A
+    """
+    def write_row(self, frame_end):
+        """! Appends the movement in progress to the index
+        @param frame_end    Index of the frame following the movement in the archive
+        """
+        if (self.row_in_progress == None):
+            return
+
+        row = numpy.array((
+                            self.row_in_progress["repetition"],
+                            self.row_in_progress["checkpoint"],
+                            self.row_in_progress["frame_start"],
+                            frame_end,
+                            self.row_in_progress["time_command"]), dtype = REP_INDEX_DTYPE)
+
+        self.file.write(row.tobytes())
+        self.file.flush()
+
+        self.row_in_progress = None
+
+    def on_run_start(self, program, counter_repetitions):
+        """! Opens the index in the archive folder of the run
+        """
+        self.file = open(os.path.join(self.run_recorder.path_run, REP_INDEX_FILE), "ab")
+
+    def on_command_sent(self, counter_repetitions, checkpoint_to_reach):
+        """! Starts a new movement at the current end of the archive
+        """
+        frame_count = self.run_recorder.get_frame_count()
+        self.write_row(frame_count)
+
+        # The counter is incremented when the movement back to checkpoint A is sent
+        if (checkpoint_to_reach == CHECKPOINT_B):
+            repetition = counter_repetitions + 1
+        else:
+            repetition = counter_repetitions
+
+        self.row_in_progress = {
+                                "repetition"    : repetition,
+                                "checkpoint"    : checkpoint_to_reach,
+                                "frame_start"   : frame_count,
+                                "time_command"  : time.time()}
+
+    def on_trajectory_ended(self, counter_repetitions, checkpoint_reached):
+        """! Ends the movement in progress at the current end of the archive
+        """
+        self.write_row(self.run_recorder.get_frame_count())
+
+    def on_run_end(self, counter_repetitions, flag_is_stopped):
+        """! Ends the movement in progress, if any, and closes the index
+        """
+        self.write_row(self.run_recorder.get_frame_count())
+        self.file.close()
+
+    def __init__(self, run_recorder):
+        """! Initialisation of the index of a run
+        @param run_recorder     RunRecorder of the run - Must be notified before the index
+        """
+        self.run_recorder = run_recorder
+        self.file = None
+        self.row_in_progress = None
+
+class RepIndex():
+    """! Read access to the index of the repetitions of a run
+    """
+    def find_repetition(self, repetition):
+        """! Finds the movements of a repetition with a binary search of the index
+        @param repetition   Number of the repetition, from 1
+        @return The rows of the index of the repetition, one per movement
+        """
+        index_start = numpy.searchsorted(self.rows["repetition"], repetition, 'left')
+        index_end = numpy.searchsorted(self.rows["repetition"], repetition, 'right')
+
+        return self.rows[index_start:index_end]
+
+    def get_repetition_frames(self, repetition):
+        """! Gives the frames of a repetition
+        @param repetition   Number of the repetition, from 1
+        @return A dictionnary of arrays, one per column of the archive
+        """
+        rows = self.find_repetition(repetition)
+
+        if (len(rows) == 0):
+            return self.archive.slice_frames(0, 0)
+
+        return self.archive.slice_frames(int(rows["frame_start"].min()), int(rows["frame_end"].max()))
+
+    def get_features(self, list_repetitions = None):
+        """! Computes the features of every movement of the given repetitions from their frames only
+        @param list_repetitions     Numbers of the repetitions to analyse - Every repetition if None
+        @return A dictionnary of arrays with one value per movement: repetition, checkpoint, duration (s), peak speed (counts/s) and overshoot (counts)
+        """
+        if (list_repetitions is None):
+            rows = self.rows[:]
+        else:
+            rows = numpy.concatenate([self.find_repetition(repetition) for repetition in list_repetitions] + [self.rows[:0]])
+
+        counter_movements = len(rows)
+        lengths = (rows["frame_end"] - rows["frame_start"]).astype(numpy.int64)
+
+        # Indexes of the frames of every movement, and the movement each frame belongs to
+        frames = numpy.repeat(rows["frame_start"] - numpy.cumsum(lengths) + lengths, lengths) + numpy.arange(lengths.sum())
+        movements = numpy.repeat(numpy.arange(counter_movements), lengths)
+
+        timestamps = numpy.asarray(self.archive.dict_columns["timestamp"][frames], dtype = numpy.float64)
+        states = numpy.asarray(self.archive.dict_columns["state"][frames])
+        ids = numpy.asarray(self.archive.dict_columns["id"][frames])
+
+        # Only the frames of the motor of the run carry its state - Encoders send their count in place of the state
+        mask_motor = (ids == self.motor_id)
+
+        # Start of movement: first trajectory state of every movement - An end of trajectory state before it belongs to the previous movement
+        frame_in_trajectory = numpy.full(counter_movements, numpy.iinfo(numpy.int64).max)
+        mask_in_trajectory = mask_motor & (states == MOTOR_STATE_AUTO_IN_TRAJ)
+        numpy.minimum.at(frame_in_trajectory, movements[mask_in_trajectory], frames[mask_in_trajectory])
+
+        # End of movement: first end of trajectory state of every movement once it started
+        time_end = numpy.full(counter_movements, numpy.inf)
+        mask_end = mask_motor & (states == MOTOR_STATE_AUTO_END_OF_TRAJ) & (frames > frame_in_trajectory[movements])
+        numpy.minimum.at(time_end, movements[mask_end], timestamps[mask_end])
+        duration = numpy.where(numpy.isfinite(time_end), time_end - rows["time_command"], numpy.nan)
+
+        peak_speed = numpy.full(counter_movements, numpy.nan)
+        overshoot = numpy.full(counter_movements, numpy.nan)
+
+        if (self.encoder_id != None):
+            mask_encoder = (ids == self.encoder_id)
+            timestamps = timestamps[mask_encoder]
+            positions = numpy.asarray(self.archive.dict_columns["position"][frames], dtype = numpy.int64)[mask_encoder]
+            movements = movements[mask_encoder]
+
+            # The counts wrap around on 16 bits: positions are rebuilt from the displacements between consecutive frames
+            if (len(positions) != 0):
+                positions = (positions[0] + numpy.concatenate(([0], numpy.cumsum(calculate_encoder_delta(positions[:-1], positions[1:]))))).astype(numpy.float64)
+            else:
+                positions = positions.astype(numpy.float64)
+
+            # Speed between consecutive encoder frames of the same movement
+            delta_time = numpy.diff(timestamps)
+            mask_speed = (movements[1:] == movements[:-1]) & (delta_time > 0)
+            speed = numpy.abs(numpy.diff(positions)[mask_speed] / delta_time[mask_speed])
+            numpy.fmax.at(peak_speed, movements[1:][mask_speed], speed)
+
+            # Overshoot: farthest position past the final position, in the direction of the movement
+            first = numpy.searchsorted(movements, numpy.arange(counter_movements), 'left')
+            last = numpy.searchsorted(movements, numpy.arange(counter_movements), 'right') - 1
+            mask_valid = (last >= first)
+
+            position_first = numpy.full(counter_movements, numpy.nan)
+            position_last = numpy.full(counter_movements, numpy.nan)
+            position_first[mask_valid] = positions[first[mask_valid]]
+            position_last[mask_valid] = positions[last[mask_valid]]
+            direction = numpy.sign(position_last - position_first)
+
+            overshoot[mask_valid] = 0.0
+            numpy.fmax.at(overshoot, movements, direction[movements] * (positions - position_last[movements]))
+
+        return {
+                "repetition"    : rows["repetition"].copy(),
+                "checkpoint"    : rows["checkpoint"].copy(),
+                "duration"      : duration,
+                "peak_speed"    : peak_speed,
+                "overshoot"     : overshoot}
+
+    def __init__(self, path_run):
+        """! Opens the index and the archive of a run
+        @param path_run     Folder of the archive of the run
+        """
+        self.path_run = path_run
+        self.archive = open_run_archive(path_run)
+
+        path_index = os.path.join(path_run, REP_INDEX_FILE)
+        counter_rows = os.path.getsize(path_index) // REP_INDEX_DTYPE.itemsize
+
+        if (counter_rows == 0):
+            self.rows = numpy.zeros(0, dtype = REP_INDEX_DTYPE)
+        else:
+            self.rows = numpy.memmap(path_index, dtype = REP_INDEX_DTYPE, mode = 'r', shape = (counter_rows,))
+
+        # Motor of the program of the run and encoder measuring its movement
+        self.motor_id, command_a, command_b = determine_trajectory_parameters(self.archive.header["program"]["movement"], AutomaticMode.list_movement_entries)
+        self.encoder_id = DICT_MOTOR_ENCODER.get(self.motor_id)
@@ -0,0 +1,368 @@
+##
+# @file
+# results_database.py
+#
+# @brief
+# Database of the results of the automatic runs. \n
+# Every run gets a row with its program, its bench, how it ended and the paths of its saved program, journal and telemetry archive, and every repetition gets a summary row. \n
+# The rows are written by a separate worker in batched transactions, and the indexes cover the aggregated queries so that they stay fast as the campaigns grow.
+
+# Imports
+import os
+import queue
+import socket
+import sqlite3
+import sys
+import time
+
+# The common module must be imported before the serial functions
+from common import SLIDER_PREV_VALUE_INDEX
+from automatic_control import RunObserver, AutomaticMode, determine_trajectory_parameters, CHECKPOINT_A, CHECKPOINT_B, PARAMETER_SPEED, PARAMETER_AMPLITUDE
+from motion_profile import DICT_MOTOR_SLIDER
+
+# Constants
+## Path of the results database
+path_results_database = 'logs/results.db'
+
+## Name of the bench written in the runs
+RESULTS_BENCH_NAME = socket.gethostname()
+
+## Maximal number of rows written in one transaction
+RESULTS_BATCH_ROWS = 500
+
+## Maximal time (s) a row waits for the other rows of its transaction
+RESULTS_COMMIT_PERIOD_SEC = 1.0
+
+## Possible status of a run - A run still running when the application closed is interrupted
+RESULTS_STATUS_RUNNING      = "running"
+RESULTS_STATUS_COMPLETED    = "completed"
+RESULTS_STATUS_STOPPED      = "stopped"
+RESULTS_STATUS_INTERRUPTED  = "interrupted"
+
+## Tables and indexes of the database
+# The movement and the speed are repeated in the repetitions so that the cycle times per speed are read from an index only
+LIST_RESULTS_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS runs (
+        id                  INTEGER PRIMARY KEY,
+        bench               TEXT NOT NULL,
+        program_name        TEXT,
+        program_path        TEXT,
+        movement            TEXT NOT NULL,
+        amplitude           INTEGER NOT NULL,
+        turns               REAL NOT NULL,
+        reps                INTEGER NOT NULL,
+        speed               INTEGER NOT NULL,
+        speed_profile       TEXT,
+        start_repetition    INTEGER NOT NULL,
+        start_time          REAL NOT NULL,
+        end_time            REAL,
+        reps_done           INTEGER,
+        stall_faults        INTEGER NOT NULL DEFAULT 0,
+        status              TEXT NOT NULL,
+        journal_path        TEXT,
+        archive_path        TEXT)""",
+    """CREATE TABLE IF NOT EXISTS repetitions (
+        run_id              INTEGER NOT NULL REFERENCES runs(id),
+        repetition          INTEGER NOT NULL,
+        start_time          REAL NOT NULL,
+        duration            REAL NOT NULL,
+        movement            TEXT NOT NULL,
+        amplitude           INTEGER NOT NULL,
+        speed               INTEGER NOT NULL,
+        stall_faults        INTEGER NOT NULL,
+        PRIMARY KEY (run_id, repetition)) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS index_runs_start_time ON runs (start_time)",
+    "CREATE INDEX IF NOT EXISTS index_runs_program ON runs (program_name, movement, status, stall_faults)",
+    "CREATE INDEX IF NOT EXISTS index_repetitions_start_time ON repetitions (start_time)",
+    "CREATE INDEX IF NOT EXISTS index_repetitions_speed ON repetitions (movement, speed, duration)"
+]
+
+# Functions
+def open_results_database(path_database = path_results_database):
+    """! Opens the results database, creating its tables if needed - A connection can only be used by the thread that opened it
+    @param path_database    Path of the database
+    @return The sqlite3 connection
+    """
+    os.makedirs(os.path.dirname(path_database) or '.', exist_ok = True)
+    connection = sqlite3.connect(path_database, timeout = 10)
+
+    # The readers of the dashboard do not block the writer
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = NORMAL")
+
+    with connection:
+        for statement in LIST_RESULTS_SCHEMA:
+            connection.execute(statement)
+
+    return connection
+
+def insert_run(connection, results_recorder, dict_run):
+    """! Writes the row of a run and gives its ID to its recorder - Executed by the results writer
+    @param connection           Connection to the results database
+    @param results_recorder     ResultsRecorder of the run
+    @param dict_run             Values of the columns of the run
+    """
+    cursor = connection.execute(
+                                "INSERT INTO runs (" + ", ".join(dict_run) + ") VALUES (" + ", ".join("?" * len(dict_run)) + ")",
+                                tuple(dict_run.values()))
+
+    results_recorder.run_id = cursor.lastrowid
+
+def insert_repetition(connection, results_recorder, row_repetition):
+    """! Writes the summary of a repetition - Executed by the results writer
+    @param connection           Connection to the results database
+    @param results_recorder     ResultsRecorder of the run
+    @param row_repetition       Repetition, start time, duration, movement, amplitude, speed and stall faults of the repetition
+    """
+    connection.execute("INSERT OR REPLACE INTO repetitions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (results_recorder.run_id, ) + row_repetition)
+
+def update_run_end(connection, results_recorder, dict_end):
+    """! Writes how a run ended - Executed by the results writer
+    @param connection           Connection to the results database
+    @param results_recorder     ResultsRecorder of the run
+    @param dict_end             Values of the columns of the end of the run
+    """
+    connection.execute(
+                        "UPDATE runs SET " + ", ".join(column + " = ?" for column in dict_end) + " WHERE id = ?",
+                        tuple(dict_end.values()) + (results_recorder.run_id, ))
+
+def query_repetitions_per_day(connection, time_start = 0.0):
+    """! Counts the repetitions executed every day
+    @param connection   Connection to the results database
+    @param time_start   Time (s since epoch) of the first repetition counted
+    @return The list of (day "YYYY-MM-DD", number of repetitions)
+    """
+    return connection.execute(
+                                """SELECT date(start_time, 'unixepoch', 'localtime') AS day, COUNT(*)
+                                FROM repetitions WHERE start_time >= ? GROUP BY day ORDER BY day""",
+                                (time_start, )).fetchall()
+
+def query_failure_rate_per_program(connection):
+    """! Gives the proportion of the ended runs of every program that did not complete or lost steps
+    @param connection   Connection to the results database
+    @return The list of (program name - None if the run was not started from a saved program, movement, number of ended runs, failure rate)
+    """
+    return connection.execute(
+                                """SELECT program_name, movement, COUNT(*), AVG((status != ?) OR (stall_faults > 0))
+                                FROM runs WHERE status != ? GROUP BY program_name, movement ORDER BY program_name, movement""",
+                                (RESULTS_STATUS_COMPLETED, RESULTS_STATUS_RUNNING)).fetchall()
+
+def query_mean_cycle_time_per_speed(connection, movement = None):
+    """! Gives the mean duration of the repetitions of every movement at every speed
+    @param connection   Connection to the results database
+    @param movement     Movement to give - Every movement if None
+    @return The list of (movement, slider value of the speed, number of repetitions, mean duration (s))
+    """
+    if (movement == None):
+        return connection.execute(
+                                    """SELECT movement, speed, COUNT(*), AVG(duration)
+                                    FROM repetitions GROUP BY movement, speed ORDER BY movement, speed""").fetchall()
+
+    return connection.execute(
+                                """SELECT movement, speed, COUNT(*), AVG(duration)
+                                FROM repetitions WHERE movement = ? GROUP BY speed ORDER BY speed""",
+                                (movement, )).fetchall()
+
+def query_run(connection, run_id):
+    """! Gives the row of a run, with the paths of its saved program, journal and telemetry archive
+    @param connection   Connection to the results database
+    @param run_id       ID of the run
+    @return The dictionnary of the columns of the run - None if there is no such run
+    """
+    cursor = connection.execute("SELECT * FROM runs WHERE id = ?", (run_id, ))
+    row = cursor.fetchone()
+
+    if (row == None):
+        return None
+
+    return {description[0] : value for description, value in zip(cursor.description, row)}
+
+# Classes
+class ResultsWriter():
+    """! Writes the rows queued by the recorders of the runs in batched transactions, so that the automatic mode never waits for the disk
+    """
+    def submit(self, function, *args):
+        """! Queues a write - Executed in the order of submission
+        @param function     Function writing the rows, called with the connection followed by the arguments
+        @param args         Arguments of the function
+        """
+        self.queue_writes.put((function, args))
+
+    def write_batch(self, connection, list_writes):
+        """! Executes writes in one transaction - A failed write is reported and does not cancel the others
+        @param connection   Connection to the results database
+        @param list_writes  Writes to execute: (function, arguments)
+        """
+        with connection:
+            for function, args in list_writes:
+                try:
+                    function(connection, *args)
+                except sqlite3.Error as error:
+                    print("Results database: " + str(error))
+
+    def run(self, stop_event):
+        """! Writes the queued rows until stopped, then writes the remaining ones - Executed by the results writer worker
+        @param stop_event   Thread event stopping the writer when set
+        """
+        connection = open_results_database(self.path_database)
+
+        # The runs left running by a previous session cannot end anymore - Not done again when the worker is restarted
+        if (self.flag_is_recovered == False):
+            with connection:
+                connection.execute("UPDATE runs SET status = ? WHERE status = ?", (RESULTS_STATUS_INTERRUPTED, RESULTS_STATUS_RUNNING))
+
+            self.flag_is_recovered = True
+
+        while True:
+            try:
+                list_writes = [self.queue_writes.get(timeout = RESULTS_COMMIT_PERIOD_SEC)]
+            except queue.Empty:
+                if (stop_event.is_set() == True):
+                    break
+                continue
+
+            time_limit = time.time() + RESULTS_COMMIT_PERIOD_SEC
+
+            while ((len(list_writes) < RESULTS_BATCH_ROWS) and (stop_event.is_set() != True)):
+                try:
+                    list_writes.append(self.queue_writes.get(timeout = max(0.0, time_limit - time.time())))
+                except queue.Empty:
+                    break
+
+            self.write_batch(connection, list_writes)
+
+        connection.close()
+
+    def __init__(self, path_database = path_results_database):
+        """! Initialisation of the writer
+        @param path_database    Path of the results database
+        """
+        self.path_database = path_database
+        self.queue_writes = queue.Queue()
+        self.flag_is_recovered = False
+
+class ResultsRecorder(RunObserver):
+    """! Records an automatic run and the summary of its repetitions in the results database\n
+    Repetition n starts with the movement towards checkpoint B and ends when the tool is back to checkpoint A
+    """
+    def get_stall_faults(self):
+        """! Gives the number of movements of the run that lost steps so far
+        @return The number of faults
+        """
+        if (self.stall_detector == None):
+            return 0
+
+        return len(self.stall_detector.list_faults)
+
+    def on_run_start(self, program, counter_repetitions):
+        """! Writes the row of the run
+        """
+        motor_id, command_a, command_b = determine_trajectory_parameters(program["movement"], AutomaticMode.list_movement_entries)
+        list_slider_info, slider_max = DICT_MOTOR_SLIDER[motor_id]
+
+        self.movement = program["movement"]
+        self.amplitude = program["amplitude"]
+        self.speed = round(list_slider_info[SLIDER_PREV_VALUE_INDEX])
+
+        self.results_writer.submit(insert_run, self, {
+                                                        "bench"             : RESULTS_BENCH_NAME,
+                                                        "program_name"      : self.program_name,
+                                                        "program_path"      : self.path_program,
+                                                        "movement"          : program["movement"],
+                                                        "amplitude"         : program["amplitude"],
+                                                        "turns"             : program["turns"],
+                                                        "reps"              : program["reps"],
+                                                        "speed"             : self.speed,
+                                                        "speed_profile"     : self.speed_profile,
+                                                        "start_repetition"  : counter_repetitions,
+                                                        "start_time"        : time.time(),
+                                                        "status"            : RESULTS_STATUS_RUNNING,
+                                                        "journal_path"      : self.path_journal,
+                                                        "archive_path"      : self.path_archive})
+
+    def on_command_sent(self, counter_repetitions, checkpoint_to_reach):
+        """! Starts a repetition with the movement towards checkpoint B
+        """
+        if (checkpoint_to_reach == CHECKPOINT_B):
+            self.time_repetition_start = time.time()
+            self.stall_faults_repetition_start = self.get_stall_faults()
+
+    def on_trajectory_ended(self, counter_repetitions, checkpoint_reached):
+        """! Writes the summary of the repetition ended by the return to checkpoint A
+        """
+        if ((checkpoint_reached != CHECKPOINT_A) or (self.time_repetition_start == None)):
+            return
+
+        self.results_writer.submit(insert_repetition, self, (
+                                                                counter_repetitions,
+                                                                self.time_repetition_start,
+                                                                time.time() - self.time_repetition_start,
+                                                                self.movement,
+                                                                self.amplitude,
+                                                                self.speed,
+                                                                self.get_stall_faults() - self.stall_faults_repetition_start))
+        self.time_repetition_start = None
+
+    def on_parameters_changed(self, counter_repetitions, program, dict_changes):
+        """! Keeps the amplitude and the speed of the next repetitions
+        """
+        self.amplitude = dict_changes.get(PARAMETER_AMPLITUDE, self.amplitude)
+        self.speed = dict_changes.get(PARAMETER_SPEED, self.speed)
+
+    def on_run_end(self, counter_repetitions, flag_is_stopped):
+        """! Writes how the run ended
+        """
+        if (flag_is_stopped == True):
+            status = RESULTS_STATUS_STOPPED
+        else:
+            status = RESULTS_STATUS_COMPLETED
+
+        self.results_writer.submit(update_run_end, self, {
+                                                            "end_time"      : time.time(),
+                                                            "reps_done"     : counter_repetitions,
+                                                            "stall_faults"  : self.get_stall_faults(),
+                                                            "status"        : status})
+
+    def __init__(self, results_writer, program_name = None, path_program = None, path_journal = None, path_archive = None, stall_detector = None, speed_profile = None):
+        """! Initialisation of the recorder of a run
+        @param results_writer   ResultsWriter writing the rows
+        @param program_name     Name of the saved program of the run - None if it was not started from a saved program
+        @param path_program     Path of the saved program of the run
+        @param path_journal     Path of the journal of the run
+        @param path_archive     Folder of the telemetry archive of the run
+        @param stall_detector   StallDetector of the run, counting its faulty movements - Must be notified before the recorder
+        @param speed_profile    Speed profile of the movements
+        """
+        self.results_writer = results_writer
+        self.program_name = program_name
+        self.path_program = path_program
+        self.path_journal = path_journal
+        self.path_archive = path_archive
+        self.stall_detector = stall_detector
+        self.speed_profile = speed_profile
+
+        ## ID of the run in the database, given by the results writer
+        self.run_id = None
+
+        self.movement = None
+        self.amplitude = 0
+        self.speed = 0
+        self.time_repetition_start = None
+        self.stall_faults_repetition_start = 0
+
+if __name__ == "__main__":
+    """! Shows the aggregated results of the given database, or of the default one
+    """
+    connection = open_results_database(sys.argv[1] if (len(sys.argv) > 1) else path_results_database)
+
+    print("Repetitions per day:")
+    for day, counter_repetitions in query_repetitions_per_day(connection):
+        print("    " + day + ": " + str(counter_repetitions))
+
+    print("Failure rate per program:")
+    for program_name, movement, counter_runs, failure_rate in query_failure_rate_per_program(connection):
+        print("    " + str(program_name) + " (" + movement + "): " + str(round(100 * failure_rate, 1)) + " % of " + str(counter_runs) + " runs")
+
+    print("Mean cycle time per speed:")
+    for movement, speed, counter_repetitions, mean_duration in query_mean_cycle_time_per_speed(connection):
+        print("    " + movement + " at " + str(speed) + ": " + str(round(mean_duration, 3)) + " s over " + str(counter_repetitions) + " repetitions")
@@ -0,0 +1,228 @@
+##
+# @file
+# run_archive.py
+#
+# @brief
+# Columnar archive of the telemetry received during the automatic runs. \n
+# Every run is a folder holding one raw binary file per column and a JSON header. The columns are memory-mapped for reading, so a run of any size opens instantly and is sliced by time range without being loaded in memory.
+
+# Imports
+import json
+import os
+import time
+from glob import glob
+from threading import Lock
+
+import numpy
+
+from serial_funcs import add_rx_listener, remove_rx_listener, INDEX_ID, INDEX_STATUS_MOVEMENT_MOTOR, INDEX_STATUS_MOTOR, INDEX_MOTOR_POSITION
+from automatic_control import RunObserver
+
+# Constants
+## Folder containing the archived runs
+path_archive_folder = 'logs/archive'
+
+## Name of the header file of a run
+ARCHIVE_HEADER_FILE = 'header.json'
+
+## Columns of the archive and their fixed-width type - One file per column
+DICT_ARCHIVE_COLUMNS = {
+    "timestamp" : numpy.dtype('<f8'),
+    "id"        : numpy.dtype('u1'),
+    "movement"  : numpy.dtype('u1'),
+    "state"     : numpy.dtype('u1'),
+    "position"  : numpy.dtype('<i4')
+}
+
+## Number of frames kept in memory before being appended to the column files
+ARCHIVE_BLOCK_FRAMES = 4096
+
+## Maximal time (s) between two writes of the buffered frames
+ARCHIVE_FLUSH_PERIOD_SEC = 1.0
+
+# Functions
+def get_column_path(path_run, column):
+    """! Gives the path of the file of a column
+    @param path_run     Folder of the run
+    @param column       Name of the column
+    @return The path of the column file
+    """
+    return os.path.join(path_run, column + '.bin')
+
+def list_archived_runs():
+    """! Lists the archived runs from the oldest to the most recent
+    @return The list of the folders of the runs
+    """
+    return sorted(path for path in glob(os.path.join(path_archive_folder, 'run_*')) if os.path.isdir(path))
+
+# Classes
+class RunRecorder(RunObserver):
+    """! Appends every frame received during an automatic run to the columns of its archive\n
+    Frames are buffered in fixed-width arrays and written by blocks to keep the serial reading thread fast
+    """
+    def rx_listener(self, reception_time, list_message_info):
+        """! Adds a received frame to the buffer - Executed by the serial reading thread
+        """
+        with self.lock_recording:
+            # The reading thread can still call the listener with a frame received just before the end of the run
+            if (self.flag_is_recording != True):
+                return
+
+            i = self.counter_buffered_frames
+            self.dict_buffers["timestamp"][i]   = reception_time
+            self.dict_buffers["id"][i]          = list_message_info[INDEX_ID]
+            self.dict_buffers["movement"][i]    = list_message_info[INDEX_STATUS_MOVEMENT_MOTOR]
+            self.dict_buffers["state"][i]       = list_message_info[INDEX_STATUS_MOTOR]
+            self.dict_buffers["position"][i]    = list_message_info[INDEX_MOTOR_POSITION]
+            self.counter_buffered_frames = i + 1
+
+            if ((self.counter_buffered_frames == ARCHIVE_BLOCK_FRAMES) or ((reception_time - self.time_last_flush) >= ARCHIVE_FLUSH_PERIOD_SEC)):
+                self.flush()
+
+    def flush(self):
+        """! Appends the buffered frames to the column files
+        """
+        if (self.counter_buffered_frames != 0):
+            for column, file in self.dict_files.items():
+                file.write(self.dict_buffers[column][:self.counter_buffered_frames].tobytes())
+                file.flush()
+
+            self.counter_frames = self.counter_frames + self.counter_buffered_frames
+            self.counter_buffered_frames = 0
+
+        self.time_last_flush = time.time()
+
+    def get_frame_count(self):
+        """! Gives the number of frames recorded so far, including the buffered ones
+        @return The index that the next received frame will have in the archive
+        """
+        return self.counter_frames + self.counter_buffered_frames
+
+    def write_header(self, status):
+        """! Writes the header of the run
+        @param status   State of the run ("recording", "completed" or "stopped")
+        """
+        header = {
+                    "program"       : self.program,
+                    "start_time"    : self.time_start,
+                    "status"        : status,
+                    "frames"        : self.counter_frames,
+                    "columns"       : {column : dtype.str for column, dtype in DICT_ARCHIVE_COLUMNS.items()}}
+
+        with open(os.path.join(self.path_run, ARCHIVE_HEADER_FILE), "w") as f:
+            json.dump(header, f, indent = 4)
+
+    def on_run_start(self, program, counter_repetitions):
+        """! Creates the archive of the run and starts recording the received frames
+        """
+        self.program = program
+        self.time_start = time.time()
+
+        os.makedirs(self.path_run, exist_ok = True)
+        self.dict_files = {column : open(get_column_path(self.path_run, column), "ab") for column in DICT_ARCHIVE_COLUMNS}
+        self.write_header("recording")
+
+        self.flag_is_recording = True
+        add_rx_listener(self.rx_listener)
+
+    def on_run_end(self, counter_repetitions, flag_is_stopped):
+        """! Stops recording, writes the last frames and closes the archive
+        """
+        # Shared with the listener so that no frame is written in a closed file
+        with self.lock_recording:
+            remove_rx_listener(self.rx_listener)
+            self.flag_is_recording = False
+
+            self.flush()
+            for file in self.dict_files.values():
+                file.close()
+
+        if (flag_is_stopped == True):
+            self.write_header("stopped")
+        else:
+            self.write_header("completed")
+
+    def __init__(self, path_run = None):
+        """! Initialisation of the recorder of a run
+        @param path_run     Folder of the archive of the run - A new folder is named after the current time if None
+        """
+        if (path_run == None):
+            time_now = time.time()
+            path_run = os.path.join(path_archive_folder, 'run_' + time.strftime('%Y%m%d_%H%M%S', time.localtime(time_now)) + ('_%03d' % ((time_now % 1) * 1000)))
+
+        self.path_run = path_run
+        self.program = None
+        self.time_start = 0.0
+        self.dict_files = {}
+        self.dict_buffers = {column : numpy.zeros(ARCHIVE_BLOCK_FRAMES, dtype = dtype) for column, dtype in DICT_ARCHIVE_COLUMNS.items()}
+        self.counter_buffered_frames = 0
+        self.counter_frames = 0
+        self.time_last_flush = time.time()
+        self.flag_is_recording = False
+        self.lock_recording = Lock()
+
+class RunArchive():
+    """! Read access to the archive of a run - Columns are memory-mapped and only the sliced parts are read from the disk
+    """
+    def open_column(self, column):
+        """! Memory-maps a column file
+        @param column   Name of the column
+        @return The read-only column array
+        """
+        dtype = DICT_ARCHIVE_COLUMNS[column]
+
+        # A file cannot be mapped when empty
+        if (self.counter_frames == 0):
+            return numpy.zeros(0, dtype = dtype)
+
+        return numpy.memmap(get_column_path(self.path_run, column), dtype = dtype, mode = 'r', shape = (self.counter_frames,))
+
+    def get_time_range(self):
+        """! Gives the reception time of the first and last frames of the run
+        @return The first and last timestamps (s since epoch) - (None, None) if the run is empty
+        """
+        if (self.counter_frames == 0):
+            return None, None
+
+        return float(self.dict_columns["timestamp"][0]), float(self.dict_columns["timestamp"][-1])
+
+    def find_frames(self, time_start, time_end):
+        """! Finds the frames received in a time range with a binary search of the timestamps
+        @param time_start   Start of the range (s since epoch) - Included
+        @param time_end     End of the range (s since epoch) - Excluded
+        @return The index of the first frame and the index after the last frame of the range
+        """
+        timestamps = self.dict_columns["timestamp"]
+
+        return int(numpy.searchsorted(timestamps, time_start, 'left')), int(numpy.searchsorted(timestamps, time_end, 'left'))
+
+    def slice_frames(self, index_start, index_end):
+        """! Gives the frames between two indexes
+        @param index_start  Index of the first frame - Included
+        @param index_end    Index of the last frame - Excluded
+        @return A dictionnary of memory-mapped arrays, one per column
+        """
+        return {column : array[index_start:index_end] for column, array in self.dict_columns.items()}
+
+    def slice_time(self, time_start, time_end):
+        """! Gives the frames received in a time range
+        @param time_start   Start of the range (s since epoch) - Included
+        @param time_end     End of the range (s since epoch) - Excluded
+        @return A dictionnary of memory-mapped arrays, one per column
+        """
+        index_start, index_end = self.find_frames(time_start, time_end)
+
+        return self.slice_frames(index_start, index_end)
+
+    def __init__(self, path_run):
+        """! Opens the archive of a run
+        @param path_run     Folder of the archive of the run
+        """
+        self.path_run = path_run
+
+        with open(os.path.join(path_run, ARCHIVE_HEADER_FILE), "r") as f:
+            self.header = json.load(f)
+
+        # The frames are counted from the file sizes: a run interrupted before its end is still readable
+        self.counter_frames = min(os.path.getsize(get_column_path(path_run, column)) // dtype.itemsize for column, dtype in DICT_ARCHIVE_COLUMNS.items())
+        self.dict_columns = {column : self.open_column(column) for column in DICT_ARCHIVE_COLUMNS}
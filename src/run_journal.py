@@ -0,0 +1,203 @@
+##
+# @file
+# run_journal.py
+#
+# @brief
+# Append-only journal of the automatic runs to resume them after a crash, a disconnection or a stop. \n
+# Every run has its own journal file where one JSON record is written per line.
+
+# Imports
+import json
+import os
+import time
+from glob import glob
+from threading import Event, Thread
+
+from automatic_control import RunObserver, CHECKPOINT_A
+
+# Constants
+## Folder containing the journal files of the runs
+path_journal_folder = 'logs/journal'
+
+## Number of records written before forcing them on the disk
+JOURNAL_SYNC_RECORDS = 20
+
+## Maximal time (s) between two writes on the disk of the pending records
+JOURNAL_SYNC_PERIOD_SEC = 1.0
+
+## Number of bytes read at the end of a journal to find its last confirmed repetition
+JOURNAL_TAIL_SIZE = 65536
+
+## Record types
+RECORD_START        = "start"
+RECORD_RESUME       = "resume"
+RECORD_CHECKPOINT   = "checkpoint"
+RECORD_PARAMETERS   = "parameters"
+RECORD_END          = "end"
+
+## Possible status of an ended run
+RUN_STATUS_COMPLETED    = "completed"
+RUN_STATUS_STOPPED      = "stopped"
+RUN_STATUS_ABANDONED    = "abandoned"
+
+# Functions
+def read_journal_boundaries(path_journal):
+    """! Reads the first record and the last records of a journal without reading the whole file
+    @param path_journal     Path of the journal file
+    @return The first record (None if unreadable) and the list of the last complete records
+    """
+    with open(path_journal, "rb") as f:
+        first_line = f.readline()
+
+        f.seek(0, os.SEEK_END)
+        size_file = f.tell()
+        f.seek(max(0, size_file - JOURNAL_TAIL_SIZE))
+        tail_lines = f.read().splitlines()
+
+    # The first line of the tail can be cut and the last one can be incomplete after a crash
+    list_records = []
+    for line in tail_lines:
+        try:
+            list_records.append(json.loads(line))
+        except ValueError:
+            pass
+
+    try:
+        first_record = json.loads(first_line)
+    except ValueError:
+        first_record = None
+
+    return first_record, list_records
+
+def find_resumable_run(program):
+    """! Searches the journals for the most recent run of a program that did not complete all of its repetitions
+    @param program  Dictionnary of the program parameters, as given by create_program_parameters
+    @return The path of the journal of the run and its number of confirmed repetitions - (None, 0) if no run can be resumed
+    """
+    list_journals = sorted(glob(os.path.join(path_journal_folder, '*.txt')), reverse = True)
+
+    for path_journal in list_journals:
+        first_record, list_records = read_journal_boundaries(path_journal)
+
+        if ((first_record == None) or (first_record.get("type") != RECORD_START) or (first_record.get("program") != program)):
+            continue
+
+        if ((len(list_records) != 0) and (list_records[-1]["type"] == RECORD_END) and (list_records[-1]["status"] != RUN_STATUS_STOPPED)):
+            # Most recent run of this program is over
+            return None, 0
+
+        # A repetition is confirmed once the tool is back to its first checkpoint
+        confirmed_repetitions = 0
+        for record in reversed(list_records):
+            if ((record["type"] == RECORD_CHECKPOINT) and (record["checkpoint"] == CHECKPOINT_A)) or (record["type"] == RECORD_RESUME):
+                confirmed_repetitions = record["repetitions"]
+                break
+
+        return path_journal, confirmed_repetitions
+
+    return None, 0
+
+def abandon_run(path_journal):
+    """! Marks a journal as ended so that its run will not be proposed for resuming anymore
+    @param path_journal     Path of the journal file
+    """
+    with open(path_journal, "a") as f:
+        f.write(json.dumps({"type" : RECORD_END, "time" : time.time(), "status" : RUN_STATUS_ABANDONED}) + '\n')
+
+# Classes
+class RunJournal(RunObserver):
+    """! Writes the progress of an automatic run in its journal\n
+    Checkpoints are written in batches, and forced on the disk by a thread of the journal to keep the disk accesses away from the control loop timing
+    """
+    def write_record(self, record, flag_sync_now = False):
+        """! Appends a record to the journal
+        @param record           Dictionnary to write
+        @param flag_sync_now    If true, forces the record on the disk immediately
+        """
+        record["time"] = time.time()
+        self.file.write(json.dumps(record) + '\n')
+        self.counter_pending_records = self.counter_pending_records + 1
+
+        if ((flag_sync_now == True) or
+            (self.counter_pending_records >= JOURNAL_SYNC_RECORDS) or
+            ((record["time"] - self.time_last_sync) >= JOURNAL_SYNC_PERIOD_SEC)):
+            self.sync()
+
+    def sync(self):
+        """! Gives all pending records to the operating system and asks the sync thread to force them on the disk
+        """
+        self.file.flush()
+
+        self.counter_pending_records = 0
+        self.time_last_sync = time.time()
+        self.event_sync_requested.set()
+
+    def sync_to_disk(self):
+        """! Forces the records given to the operating system on the disk every time it is asked, until the journal is closed - Executed by the sync thread
+        """
+        while True:
+            self.event_sync_requested.wait()
+            self.event_sync_requested.clear()
+
+            # Read before forcing the records so that the last ones are always covered by this write
+            flag_is_closing = self.flag_is_closing
+            os.fsync(self.file.fileno())
+
+            if (flag_is_closing == True):
+                return
+
+    def on_run_start(self, program, counter_repetitions):
+        """! Writes the program of the run, or the number of repetitions it restarts from if it is resumed
+        """
+        if (self.flag_is_resumed == True):
+            self.write_record({"type" : RECORD_RESUME, "repetitions" : counter_repetitions}, True)
+        else:
+            self.write_record({"type" : RECORD_START, "program" : program}, True)
+
+    def on_trajectory_ended(self, counter_repetitions, checkpoint_reached):
+        """! Writes the checkpoint confirmed by the microcontroler
+        """
+        self.write_record({"type" : RECORD_CHECKPOINT, "repetitions" : counter_repetitions, "checkpoint" : checkpoint_reached})
+
+    def on_parameters_changed(self, counter_repetitions, program, dict_changes):
+        """! Writes the parameters changed during the run
+        """
+        self.write_record({"type" : RECORD_PARAMETERS, "repetitions" : counter_repetitions, "changes" : dict_changes}, True)
+
+    def on_run_end(self, counter_repetitions, flag_is_stopped):
+        """! Writes the end of the run and closes the journal
+        """
+        if (flag_is_stopped == True):
+            status = RUN_STATUS_STOPPED
+        else:
+            status = RUN_STATUS_COMPLETED
+
+        self.write_record({"type" : RECORD_END, "repetitions" : counter_repetitions, "status" : status})
+        self.file.flush()
+
+        # The journal is closed once its last records are on the disk
+        self.flag_is_closing = True
+        self.event_sync_requested.set()
+        self.thread_sync.join()
+        self.file.close()
+
+    def __init__(self, path_journal = None):
+        """! Initialisation of the journal of a run
+        @param path_journal     Journal of the run to resume - A new journal is created if None
+        """
+        self.flag_is_resumed = (path_journal != None)
+
+        if (path_journal == None):
+            os.makedirs(path_journal_folder, exist_ok = True)
+            time_now = time.time()
+            path_journal = os.path.join(path_journal_folder, 'run_' + time.strftime('%Y%m%d_%H%M%S', time.localtime(time_now)) + ('_%03d' % ((time_now % 1) * 1000)) + '.txt')
+
+        self.path_journal = path_journal
+        self.file = open(path_journal, "a")
+        self.counter_pending_records = 0
+        self.time_last_sync = time.time()
+
+        self.flag_is_closing = False
+        self.event_sync_requested = Event()
+        self.thread_sync = Thread(target = self.sync_to_disk, name = "journal_sync", daemon = True)
+        self.thread_sync.start()
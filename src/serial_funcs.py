@@ -8,8 +8,11 @@
 # Imports
 import serial
 import time
+import traceback
+from threading import Event, Lock
 
 from common import *
+import metrics
 
 path_logs = 'logs/encoder_logs.txt'
 
@@ -38,6 +41,7 @@ ID_MOTOR_VERTICAL_LEFT      = 4
 ID_MOTOR_VERTICAL_RIGHT     = 5
 ID_MOTOR_HORIZONTAL         = 6
 ID_MOTOR_ADAPT              = 7
+ID_PROGRAM                  = 8
 
 ## Commands of Test Bench comoponents - Must be the same as the ones found in Serial_Communication/serial_com.h
 COMMAND_RESERVED                    = 0
@@ -52,6 +56,16 @@ COMMAND_MOTOR_ADAPT_UP              = 8
 COMMAND_MOTOR_ADAPT_DOWN            = 9
 COMMAND_MOTOR_ADAPT_STOP            = 10
 COMMAND_SOFT_RESET                  = 11
+COMMAND_PROGRAM_BEGIN               = 12
+COMMAND_PROGRAM_COMMAND_A           = 13
+COMMAND_PROGRAM_COMMAND_B           = 14
+COMMAND_PROGRAM_DISTANCE            = 15
+COMMAND_PROGRAM_REPS_LOW            = 16
+COMMAND_PROGRAM_REPS_HIGH           = 17
+COMMAND_PROGRAM_SPEED               = 18
+COMMAND_PROGRAM_VERIFY              = 19
+COMMAND_PROGRAM_RUN                 = 20
+COMMAND_PROGRAM_HOLD                = 21
 
 ## Motor possible states
 MOTOR_STATE_RESERVED            = 0
@@ -67,6 +81,10 @@ MOTOR_STATE_CHANGE_PARAMS       = 9
 MOTOR_STATE_ADAPT_UP            = 10
 MOTOR_STATE_ADAPT_DOWN          = 11
 MOTOR_STATE_ADAPT_STOP          = 12
+MOTOR_STATE_PROGRAM_LOADED      = 13
+MOTOR_STATE_PROGRAM_REJECTED    = 14
+MOTOR_STATE_PROGRAM_RUNNING     = 15
+MOTOR_STATE_PROGRAM_DONE        = 16
 
 ## Motor possible faults
 MOTOR_FAULT_NONE         = 0
@@ -78,6 +96,17 @@ MODE_MANUAL_CONTROL     = 1
 MODE_POSITION_CONTROL   = 2
 MODE_RESET              = 3
 MODE_CHANGE_PARAMS      = 4
+MODE_PROGRAM            = 5
+
+## Stop command and stopped state of every motor
+DICT_MOTOR_STOP = {
+    ID_MOTOR_VERTICAL_LEFT  : (COMMAND_MOTOR_VERTICAL_STOP, MOTOR_STATE_VERTICAL_STOP),
+    ID_MOTOR_HORIZONTAL     : (COMMAND_MOTOR_HORIZONTAL_STOP, MOTOR_STATE_HORIZONTAL_STOP),
+    ID_MOTOR_ADAPT          : (COMMAND_MOTOR_ADAPT_STOP, MOTOR_STATE_ADAPT_STOP)
+}
+
+## Stop commands of the motors - Still sent while a priority frame is being handled
+LIST_STOP_COMMANDS = [COMMAND_MOTOR_VERTICAL_STOP, COMMAND_MOTOR_HORIZONTAL_STOP, COMMAND_MOTOR_ADAPT_STOP]
 
 ## Masks to retrieve information from the data received
 MASK_ID         = 0xFF000000
@@ -99,10 +128,44 @@ INDEX_MOTOR_POSITION            = 3
 
 DATA_NONE = 0
 
+## Position recorded for the frames that carry no count in their data part - Counts are unsigned
+POSITION_NONE = -1
+
+## IDs of the components sending their encoder count in the data part of the frame
+LIST_ENCODER_IDS = [ID_ENCODER_VERTICAL_LEFT, ID_ENCODER_VERTICAL_RIGHT, ID_ENCODER_HORIZONTAL]
+
+## IDs of the components sending a count in the data part of the frame - The program sends the number of movements it executed
+LIST_DATA_IDS = LIST_ENCODER_IDS + [ID_PROGRAM]
+
+## Encoder measuring the movement of each motor - The adaptor motor has no encoder
+DICT_MOTOR_ENCODER = {
+    ID_MOTOR_VERTICAL_LEFT  : ID_ENCODER_VERTICAL_LEFT,
+    ID_MOTOR_VERTICAL_RIGHT : ID_ENCODER_VERTICAL_RIGHT,
+    ID_MOTOR_HORIZONTAL     : ID_ENCODER_HORIZONTAL
+}
+
 # Global variables
 g_list_connected_device_info = [0]
 g_list_message_info = [0, 0, 0, 0]
 
+## Functions called with the reception time and the decoded message every time a frame is received
+g_list_rx_listeners = []
+
+## Lock protecting the list of rx listeners, which other threads change while frames are received
+g_lock_rx_listeners = Lock()
+
+## Functions called with the time, the motor ID and the command of every jog command sent
+g_list_jog_listeners = []
+
+## Lock serializing the writes to the connected device
+g_lock_transmit = Lock()
+
+## Token of the priority frame (such as a stop) being handled, and last token given - Other frames are dropped while the first is not 0
+g_list_priority_lane = [0, 0]
+
+## Lock protecting the tokens of the priority lane
+g_lock_priority_lane = Lock()
+
 # Functions
 def read_rx_buffer(stop_event, connected_device):
     """! Reads serial data in a continuous stream\n
@@ -110,12 +173,70 @@ def read_rx_buffer(stop_event, connected_device):
     @param stop_event      When set (true), stops the data reception
     """
     while (stop_event.is_set() != True):
+        # A closed port gives nothing more: the reading ends instead of failing
+        if (is_port_open(connected_device) == False):
+            print("Serial port closed, reading stopped")
+            return
+
         receive_serial_data(
                             g_list_message_info,
                             connected_device)
 
+        metrics.increment_counter("serial.rx_loop_iterations")
+
         time.sleep(0.05)
 
+def is_port_open(connected_device):
+    """! Tells if the connected device can still be read
+    @param connected_device     The serial object list shared with the GUI
+    @return True if a device is connected and its port is open
+    """
+    device = connected_device[INDEX_STM32]
+
+    return ((device not in (None, 0)) and (getattr(device, "is_open", True) == True))
+
+def add_rx_listener(listener):
+    """! Registers a function to be called every time a frame is received\n
+    The listener is called from the serial reading thread and must return quickly
+    @param listener     Function taking the reception time (s) and the list of message information as arguments
+    """
+    with g_lock_rx_listeners:
+        if (listener not in g_list_rx_listeners):
+            g_list_rx_listeners.append(listener)
+
+def remove_rx_listener(listener):
+    """! Unregisters a function previously added with add_rx_listener
+    @param listener     The function to unregister
+    """
+    with g_lock_rx_listeners:
+        if (listener in g_list_rx_listeners):
+            g_list_rx_listeners.remove(listener)
+
+def add_jog_listener(listener):
+    """! Registers a function to be called every time a jog command is sent\n
+    The listener is called from the GUI thread and must return quickly
+    @param listener     Function taking the time of the command (perf_counter), the motor ID and the command as arguments
+    """
+    if (listener not in g_list_jog_listeners):
+        g_list_jog_listeners.append(listener)
+
+def remove_jog_listener(listener):
+    """! Unregisters a function previously added with add_jog_listener
+    @param listener     The function to unregister
+    """
+    if (listener in g_list_jog_listeners):
+        g_list_jog_listeners.remove(listener)
+
+def notify_jog_listeners(motor_id, command):
+    """! Gives a jog command that was sent to every jog listener
+    @param motor_id     The ID of the motor commanded
+    @param command      The command sent
+    """
+    time_command = time.perf_counter()
+
+    for listener in g_list_jog_listeners:
+        listener(time_command, motor_id, command)
+
 def connect_to_port(selected_com_port):
     """! Establishes connection with selected COM port
     @param selected_com_port   The selected communication port on the computer
@@ -154,34 +275,265 @@ def receive_serial_data(list_message_info, list_com_device_info):
     rx_buffer = [0]
 
     if (list_com_device_info[0] != None):
-        rx_buffer[0] = list_com_device_info[0].read(NUM_BYTES_TO_READ)
+        with metrics.span("serial.read_wait"):
+            rx_buffer[0] = list_com_device_info[0].read(NUM_BYTES_TO_READ)
+
+        reception_time = time.time()
+        time_start_processing = time.perf_counter()
+
+        # A cancelled read or a closed port gives no frame, or an incomplete one
+        if (len(rx_buffer[0]) != NUM_BYTES_TO_READ):
+            metrics.increment_counter("serial.incomplete_reads")
+            return
+
         rx_buffer[0] = int.from_bytes(rx_buffer[0], ENDIANNESS)
 
         list_message_info[INDEX_ID]                     = ((rx_buffer[0] & 0x00FF0000) >> 16)
         list_message_info[INDEX_STATUS_MOVEMENT_MOTOR]  = ((rx_buffer[0] & 0x0000FF00) >> 8)
         list_message_info[INDEX_STATUS_MOTOR]           = (rx_buffer[0] & 0x000000FF)
+
+        # Encoders and the program send their count in place of the status bytes - The other frames carry no count
+        if (list_message_info[INDEX_ID] in LIST_DATA_IDS):
+            list_message_info[INDEX_MOTOR_POSITION]     = (rx_buffer[0] & MASK_DATA)
+        else:
+            list_message_info[INDEX_MOTOR_POSITION]     = POSITION_NONE
+
         print(
                 "ID: "                  + str(list_message_info[INDEX_ID]) +
                 " Status movement: "     + str(list_message_info[INDEX_STATUS_MOVEMENT_MOTOR]) +
                 " State: "               + str(list_message_info[INDEX_STATUS_MOTOR])
             )
 
+        with g_lock_rx_listeners:
+            list_listeners = list(g_list_rx_listeners)
+
+        # A failing listener must not stop the reception of the frames for the others
+        for listener in list_listeners:
+            try:
+                listener(reception_time, list_message_info)
+            except Exception:
+                metrics.increment_counter("serial.rx_listener_errors")
+                print("Rx listener " + repr(listener) + " failed:")
+                traceback.print_exc()
+
+        metrics.increment_counter("serial.frames_received")
+        metrics.record_duration("serial.receive_processing", time.perf_counter() - time_start_processing)
+
+def build_frame(id, command, mode, data):
+    """! Builds the bytes of a message to transmit
+    @param id               The ID of the component to write to
+    @param command          The command to write to the component
+    @param mode             The mode in which the test bench is functionning
+    @param data             The data to transmit to the component
+    @return The bytes to write to the microcontroler
+    """
+    # Create message with appropriate positioning of bytes
+    message_to_send = data + (command << 16) + (mode << 21) + (id << 24)
+
+    return message_to_send.to_bytes(NUM_BYTES_TO_SEND, ENDIANNESS)
+
 def transmit_serial_data(id, command, mode, data, connected_device):
-    """! Builds the desired message to transmit and writes it to the microcontroler
+    """! Builds the desired message to transmit and writes it to the microcontroler\n
+    The message is dropped while a priority frame is being handled, unless it stops a motor
     @param id               The ID of the component to write to
     @param command          The command to write to the component
     @param mode             The mode in which the test bench is functionning
     @param data             The data to transmit to the component
     @connected_device       The serial object currently connected to the application
     """
-    if (connected_device[INDEX_STM32] != None):
-        # Create message with appropriate positioning of bytes
-        message_to_send = data + (command << 16) + (mode << 21) + (id << 24)
+    if ((g_list_priority_lane[0] != 0) and ((mode != MODE_MANUAL_CONTROL) or (command not in LIST_STOP_COMMANDS))):
+        metrics.increment_counter("serial.frames_dropped")
+        print("Message dropped: priority frame in progress")
 
-        bytes_to_send = message_to_send.to_bytes(NUM_BYTES_TO_SEND, ENDIANNESS)
-        connected_device[INDEX_STM32].write(bytes_to_send)
+    elif (connected_device[INDEX_STM32] != None):
+        bytes_to_send = build_frame(id, command, mode, data)
+
+        with metrics.span("serial.transmit"):
+            with g_lock_transmit:
+                connected_device[INDEX_STM32].write(bytes_to_send)
+
+        metrics.increment_counter("serial.frames_sent")
 
         print("Message sent: ", bytes_to_send.hex())
     else:
+        metrics.increment_counter("serial.frames_not_sent")
         print("Could not send data")
-        
\ No newline at end of file
+
+def transmit_priority_serial_data(id, command, mode, data, connected_device):
+    """! Writes a message to the microcontroler ahead of any other traffic\n
+    Discards the bytes still waiting in the output buffer - The other messages must have been blocked with open_priority_lane
+    @param id               The ID of the component to write to
+    @param command          The command to write to the component
+    @param mode             The mode in which the test bench is functionning
+    @param data             The data to transmit to the component
+    @connected_device       The serial object currently connected to the application
+    @return The time (s since epoch) at which the message was written - None if it could not be sent
+    """
+    if (connected_device[INDEX_STM32] in (None, 0)):
+        print("Could not send priority data")
+        return None
+
+    bytes_to_send = build_frame(id, command, mode, data)
+
+    with g_lock_transmit:
+        if (hasattr(connected_device[INDEX_STM32], "reset_output_buffer") == True):
+            connected_device[INDEX_STM32].reset_output_buffer()
+
+        connected_device[INDEX_STM32].write(bytes_to_send)
+        time_sent = time.time()
+
+    metrics.increment_counter("serial.priority_frames_sent")
+    print("Priority message sent: ", bytes_to_send.hex())
+
+    return time_sent
+
+def open_priority_lane():
+    """! Blocks the messages other than the stops until the lane is released with the token given\n
+    A new priority frame replaces the token of the previous one, which cannot release the lane anymore
+    @return The token of the priority frame
+    """
+    with g_lock_priority_lane:
+        g_list_priority_lane[1] = g_list_priority_lane[1] + 1
+        g_list_priority_lane[0] = g_list_priority_lane[1]
+
+        return g_list_priority_lane[0]
+
+def release_priority_lane(token):
+    """! Allows the other messages to be sent again after a priority frame
+    @param token    Token given by open_priority_lane for the priority frame - Does nothing if another priority frame took the lane since
+    """
+    with g_lock_priority_lane:
+        if (g_list_priority_lane[0] == token):
+            g_list_priority_lane[0] = 0
+
+def calculate_encoder_delta(position_start, position_end):
+    """! Gives the signed displacement between two encoder counts, which wrap around on 16 bits
+    @param position_start   Encoder count at the start of the movement
+    @param position_end     Encoder count at the end of the movement
+    @return The displacement in encoder counts
+    """
+    return ((position_end - position_start + ((MASK_DATA + 1) // 2)) % (MASK_DATA + 1)) - ((MASK_DATA + 1) // 2)
+
+def build_program_frames(motor_id, command_a, command_b, distance, number_reps, slider_value):
+    """! Gives the commands uploading a repetition program to the microcontroler\n
+    The last frame carries the checksum of the data of the upload, so that the microcontroler can verify it before answering MOTOR_STATE_PROGRAM_LOADED
+    @param motor_id         The ID of the motor executing the program
+    @param command_a        Movement command towards the first checkpoint
+    @param command_b        Movement command towards the second checkpoint
+    @param distance         Data of the movement commands (mm or hundredths of turn)
+    @param number_reps      Number of repetitions to execute
+    @param slider_value     Slider value of the speed of the movements
+    @return The list of (command, data) to send with MODE_PROGRAM
+    """
+    list_frames = [
+                    (COMMAND_PROGRAM_BEGIN,     motor_id),
+                    (COMMAND_PROGRAM_COMMAND_A, command_a),
+                    (COMMAND_PROGRAM_COMMAND_B, command_b),
+                    (COMMAND_PROGRAM_DISTANCE,  distance),
+                    (COMMAND_PROGRAM_REPS_LOW,  number_reps & MASK_DATA),
+                    (COMMAND_PROGRAM_REPS_HIGH, (number_reps >> 16) & MASK_DATA),
+                    (COMMAND_PROGRAM_SPEED,     slider_value)]
+
+    checksum = sum(data for command, data in list_frames) & MASK_DATA
+    list_frames.append((COMMAND_PROGRAM_VERIFY, checksum))
+
+    return list_frames
+
+# Classes
+class EncoderTracker():
+    """! Keeps the last count received from every encoder
+    """
+    def rx_listener(self, reception_time, list_message_info):
+        """! Keeps the count of the encoder frames
+        """
+        if (list_message_info[INDEX_ID] in LIST_ENCODER_IDS):
+            self.dict_positions[list_message_info[INDEX_ID]] = list_message_info[INDEX_MOTOR_POSITION]
+            self.dict_reception_times[list_message_info[INDEX_ID]] = reception_time
+
+    def get_position(self, encoder_id):
+        """! Gives the last count of an encoder
+        @param encoder_id   ID of the encoder
+        @return The last count received - None if the encoder did not send any frame yet
+        """
+        return self.dict_positions.get(encoder_id)
+
+    def close(self):
+        """! Stops following the received frames
+        """
+        remove_rx_listener(self.rx_listener)
+
+    def __init__(self):
+        """! Initialisation of a tracker - Starts following the received frames
+        """
+        self.dict_positions = {}
+        self.dict_reception_times = {}
+
+        add_rx_listener(self.rx_listener)
+
+class ProgramProgressTracker():
+    """! Counts the movements executed by the program running on the microcontroler from its progress frames
+    """
+    def rx_listener(self, reception_time, list_message_info):
+        """! Updates the number of movements executed - The count sent by the microcontroler wraps around on 16 bits
+        """
+        if (list_message_info[INDEX_ID] == ID_PROGRAM):
+            self.counter_movements = self.counter_movements + calculate_encoder_delta(self.last_count, list_message_info[INDEX_MOTOR_POSITION])
+            self.last_count = list_message_info[INDEX_MOTOR_POSITION]
+
+        # Only the motor of the program reports its end - The other components send their count in place of the state
+        elif ((list_message_info[INDEX_ID] == self.motor_id) and (list_message_info[INDEX_STATUS_MOTOR] == MOTOR_STATE_PROGRAM_DONE)):
+            self.event_done.set()
+
+    def close(self):
+        """! Stops following the received frames
+        """
+        remove_rx_listener(self.rx_listener)
+
+    def __init__(self, motor_id):
+        """! Initialisation of a tracker - Must be created before the program is run
+        @param motor_id     ID of the motor executing the program
+        """
+        self.motor_id = motor_id
+        self.counter_movements = 0
+        self.last_count = 0
+        self.event_done = Event()
+
+        add_rx_listener(self.rx_listener)
+
+class MotorStateWaiter():
+    """! Waits for the reception of one of the given motor states\n
+    Must be created before the command that will produce the state is sent, so that no frame can be missed
+    """
+    def rx_listener(self, reception_time, list_message_info):
+        """! Keeps the reception time of the first awaited state
+        """
+        if ((self.motor_id != None) and (list_message_info[INDEX_ID] != self.motor_id)):
+            return
+
+        if ((self.event_received.is_set() != True) and (list_message_info[INDEX_STATUS_MOTOR] in self.list_states)):
+            self.reception_time = reception_time
+            self.state_received = list_message_info[INDEX_STATUS_MOTOR]
+            self.event_received.set()
+
+    def wait(self, timeout):
+        """! Waits for one of the states
+        @param timeout  Maximal time to wait (s)
+        @return The reception time (s since epoch) of the state - None if it was not received in time
+        """
+        self.event_received.wait(timeout)
+        remove_rx_listener(self.rx_listener)
+
+        return self.reception_time
+
+    def __init__(self, list_states, motor_id = None):
+        """! Initialisation of a waiter - Starts following the received frames
+        @param list_states  Motor states to wait for
+        @param motor_id     ID of the motor whose frames are followed - Frames of every component if None
+        """
+        self.list_states = list_states
+        self.motor_id = motor_id
+        self.reception_time = None
+        self.state_received = None
+        self.event_received = Event()
+
+        add_rx_listener(self.rx_listener)
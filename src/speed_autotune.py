@@ -0,0 +1,270 @@
+##
+# @file
+# speed_autotune.py
+#
+# @brief
+# Search of the highest reliable speed of every axis. \n
+# Test movements are executed at different speeds and the displacement measured by the encoder is compared with the displacement at the lowest speed to detect missed steps. The results are saved in a profile of the bench by tool and load.
+
+# Imports
+import json
+import os
+import socket
+import time
+
+from common import *
+from serial_funcs import *
+from automatic_control import AutomaticMode
+from motion_profile import calculate_pulse_rate
+
+# Constants
+## File containing the tuned speeds of the bench
+path_bench_profile = 'bench_profile.json'
+
+## Axes that can be tuned: motor, encoder, commands of the test movement and its return, and slider information
+DICT_AUTOTUNE_AXES = {
+    "Vertical"      : (ID_MOTOR_VERTICAL_LEFT, ID_ENCODER_VERTICAL_LEFT, COMMAND_MOTOR_VERTICAL_DOWN, COMMAND_MOTOR_VERTICAL_UP, list_slider_vertical_info, SLIDER_VERTICAL_SPEED_RANGE_MAX),
+    "Horizontal"    : (ID_MOTOR_HORIZONTAL, ID_ENCODER_HORIZONTAL, COMMAND_MOTOR_HORIZONTAL_RIGHT, COMMAND_MOTOR_HORIZONTAL_LEFT, list_slider_horizontal_info, SLIDER_HORIZONTAL_SPEED_RANGE_MAX)
+}
+
+## Amplitude of the test movements (mm)
+AUTOTUNE_AMPLITUDE_MM = 20
+
+## Number of test movements that must all succeed for a speed to be reliable
+AUTOTUNE_TRIALS_PER_SPEED = 3
+
+## Maximal difference between the displacement measured at a speed and at the lowest speed (fraction)
+AUTOTUNE_TOLERANCE = 0.02
+
+## Number of slider steps kept under the highest reliable speed
+AUTOTUNE_MARGIN_SLIDER_STEPS = 2
+
+## Time to wait after a movement for the last encoder frames (s)
+AUTOTUNE_SETTLE_TIME_SEC = 0.2
+
+## Period of verification of the stop of the tuning while a test movement is waited for (s)
+AUTOTUNE_STOP_POLL_SEC = 0.05
+
+# Functions
+def get_profile_key(tool, load):
+    """! Gives the key of the tuned speeds of a tool and a load in the profile
+    @param tool     Name of the tool mounted on the bench
+    @param load     Description of the load applied
+    @return The key of the profile entry
+    """
+    return str(tool) + "/" + str(load)
+
+def load_bench_profile(path_profile = path_bench_profile):
+    """! Reads the profile of the bench
+    @param path_profile     Path of the profile file
+    @return The dictionnary of the profile - A new profile if there is none
+    """
+    if (os.path.exists(path_profile) == False):
+        return {"bench" : socket.gethostname(), "profiles" : {}}
+
+    with open(path_profile, "r") as f:
+        return json.load(f)
+
+def save_bench_profile(bench_profile, path_profile = path_bench_profile):
+    """! Writes the profile of the bench
+    @param bench_profile    Dictionnary of the profile
+    @param path_profile     Path of the profile file
+    """
+    with open(path_profile, "w") as f:
+        json.dump(bench_profile, f, indent = 4)
+
+def get_tuned_slider_value(axis, tool, load, path_profile = path_bench_profile):
+    """! Gives the tuned speed of an axis for a tool and a load
+    @param axis             Name of the axis, key of DICT_AUTOTUNE_AXES
+    @param tool             Name of the tool mounted on the bench
+    @param load             Description of the load applied
+    @param path_profile     Path of the profile file
+    @return The slider value of the tuned speed - None if the axis was not tuned for this tool and load
+    """
+    entry = load_bench_profile(path_profile)["profiles"].get(get_profile_key(tool, load), {})
+
+    return entry.get(axis, {}).get("slider_value")
+
+def apply_tuned_speeds(tool, load, connected_device, path_profile = path_bench_profile):
+    """! Sets the speed of every tuned axis to its tuned value for a tool and a load
+    @param tool                 Name of the tool mounted on the bench
+    @param load                 Description of the load applied
+    @param connected_device     The Serial object currently connected to the application
+    @param path_profile         Path of the profile file
+    @return The list of the axes whose speed was set
+    """
+    list_axes_set = []
+
+    for axis, (motor_id, encoder_id, command_out, command_back, list_slider_info, slider_max) in DICT_AUTOTUNE_AXES.items():
+        slider_value = get_tuned_slider_value(axis, tool, load, path_profile)
+
+        if (slider_value != None):
+            transmit_serial_data(motor_id, COMMAND_MOTOR_CHANGE_SPEED, MODE_CHANGE_PARAMS, slider_value, connected_device)
+
+            # The slider shows the tuned speed the next time it is refreshed
+            list_slider_info[SLIDER_PREV_VALUE_INDEX] = slider_value
+            list_slider_info[SLIDER_PREV_SPEED_VALUE_MM_PER_SEC_INDEX] = calculate_speed_mm_per_sec(slider_value)
+            list_axes_set.append(axis)
+
+    return list_axes_set
+
+def autotune_axes(list_axes, tool, load, connected_device, stop_event, path_profile = path_bench_profile):
+    """! Tunes the speed of axes and saves the results in the profile of the bench - Executed by the auto-tune worker
+    @param list_axes            Names of the axes to tune, keys of DICT_AUTOTUNE_AXES
+    @param tool                 Name of the tool mounted on the bench
+    @param load                 Description of the load applied
+    @param connected_device     The Serial object currently connected to the application
+    @param stop_event           Thread event stopping the tuning when set
+    @param path_profile         Path of the profile file
+    @return A dictionnary of the tuned slider value by axis
+    """
+    dict_results = {}
+    encoder_tracker = EncoderTracker()
+
+    try:
+        for axis in list_axes:
+            if (stop_event.is_set() == True):
+                break
+
+            autotuner = SpeedAutotuner(axis, connected_device, stop_event, encoder_tracker)
+
+            try:
+                slider_value = autotuner.run()
+                if (slider_value == None):
+                    continue
+
+                dict_results[axis] = slider_value
+                print("Axis " + axis + " tuned at speed " + str(slider_value) + " (" + str(calculate_speed_mm_per_sec(slider_value)) + " mm/s)")
+
+                # Every tuned axis is saved at once so that a stopped tuning keeps its results
+                bench_profile = load_bench_profile(path_profile)
+                entry = bench_profile["profiles"].setdefault(get_profile_key(tool, load), {})
+                entry[axis] = {
+                                "slider_value"      : slider_value,
+                                "speed_mm_per_sec"  : calculate_speed_mm_per_sec(slider_value),
+                                "tuned_at"          : time.strftime('%Y-%m-%d %H:%M:%S')}
+                save_bench_profile(bench_profile, path_profile)
+            finally:
+                # The speed chosen with the slider is restored after the tests, also when the axis failed or the tuning was stopped
+                transmit_serial_data(autotuner.motor_id, COMMAND_MOTOR_CHANGE_SPEED, MODE_CHANGE_PARAMS, round(autotuner.list_slider_info[SLIDER_PREV_VALUE_INDEX]), connected_device)
+    finally:
+        encoder_tracker.close()
+
+    return dict_results
+
+# Classes
+class SpeedAutotuner():
+    """! Searches the highest speed at which an axis executes its movements without missing steps
+    """
+    def execute_movement(self, command, slider_value):
+        """! Executes a test movement at a speed and measures it with the encoder
+        @param command          Movement command
+        @param slider_value     Slider value of the speed
+        @return The displacement measured by the encoder (counts) - None if the movement did not end in time
+        """
+        transmit_serial_data(self.motor_id, COMMAND_MOTOR_CHANGE_SPEED, MODE_CHANGE_PARAMS, slider_value, self.connected_device)
+
+        position_start = self.encoder_tracker.get_position(self.encoder_id)
+
+        # A movement is given twice its theoretical duration to end
+        timeout = 1.0 + 2 * AutomaticMode.calculate_movement_pulses(self.motor_id, self.amplitude, 0) / calculate_pulse_rate(slider_value)
+        time_limit = time.perf_counter() + timeout
+        waiter = MotorStateWaiter([MOTOR_STATE_AUTO_END_OF_TRAJ], self.motor_id)
+        transmit_serial_data(self.motor_id, command, MODE_POSITION_CONTROL, self.amplitude, self.connected_device)
+
+        # The wait is given up as soon as the tuning is stopped
+        while ((waiter.event_received.wait(AUTOTUNE_STOP_POLL_SEC) != True) and (self.stop_event.is_set() != True) and (time.perf_counter() < time_limit)):
+            pass
+
+        if (waiter.wait(0) == None):
+            stop_command, stop_state = DICT_MOTOR_STOP[self.motor_id]
+            transmit_serial_data(self.motor_id, stop_command, MODE_MANUAL_CONTROL, DATA_NONE, self.connected_device)
+
+            if (self.stop_event.is_set() != True):
+                print("Test movement at speed " + str(slider_value) + " did not end in time")
+            return None
+
+        self.stop_event.wait(AUTOTUNE_SETTLE_TIME_SEC)
+        position_end = self.encoder_tracker.get_position(self.encoder_id)
+
+        if ((position_start == None) or (position_end == None)):
+            return None
+
+        return calculate_encoder_delta(position_start, position_end)
+
+    def is_displacement_correct(self, delta, reference):
+        """! Compares a measured displacement with the reference displacement
+        @param delta        Displacement measured by the encoder (counts) - None if the movement did not end
+        @param reference    Displacement measured at the lowest speed (counts)
+        @return True if the displacement is within the tolerance of the reference
+        """
+        return ((delta != None) and (abs(delta - reference) <= (AUTOTUNE_TOLERANCE * abs(reference))))
+
+    def is_speed_reliable(self, slider_value):
+        """! Executes the test movements out and back at a speed and compares their displacements with the reference
+        @param slider_value     Slider value of the speed
+        @return True if every displacement is within the tolerance of the reference
+        """
+        for i in range(AUTOTUNE_TRIALS_PER_SPEED):
+            if (self.stop_event.is_set() == True):
+                return False
+
+            delta_out = self.execute_movement(self.command_out, slider_value)
+            flag_is_out_correct = self.is_displacement_correct(delta_out, self.reference_out)
+
+            # After missed steps, the return is done at the lowest speed to come back near the start position
+            if (flag_is_out_correct == True):
+                delta_back = self.execute_movement(self.command_back, slider_value)
+            else:
+                delta_back = self.execute_movement(self.command_back, 0)
+
+            if ((flag_is_out_correct != True) or (self.is_displacement_correct(delta_back, self.reference_back) != True)):
+                print("Speed " + str(slider_value) + " missed steps: " + str(delta_out) + " and " + str(delta_back) + " counts instead of " + str(self.reference_out) + " and " + str(self.reference_back))
+                return False
+
+        return True
+
+    def run(self):
+        """! Searches the highest reliable speed by dichotomy between the lowest and the highest slider values
+        @return The tuned slider value - None if the axis cannot be tuned
+        """
+        # The lowest speed gives the reference displacement of the test movements
+        self.reference_out = self.execute_movement(self.command_out, 0)
+        self.reference_back = self.execute_movement(self.command_back, 0)
+
+        if ((self.reference_out in (None, 0)) or (self.reference_back in (None, 0))):
+            print("Axis " + self.axis + " cannot be tuned: no displacement measured by its encoder")
+            return None
+
+        slider_reliable = 0
+        slider_unreliable = self.slider_max + 1
+
+        while (((slider_unreliable - slider_reliable) > 1) and (self.stop_event.is_set() != True)):
+            slider_value = (slider_reliable + slider_unreliable) // 2
+
+            if (self.is_speed_reliable(slider_value) == True):
+                slider_reliable = slider_value
+            else:
+                slider_unreliable = slider_value
+
+        if (self.stop_event.is_set() == True):
+            return None
+
+        return max(0, slider_reliable - AUTOTUNE_MARGIN_SLIDER_STEPS)
+
+    def __init__(self, axis, connected_device, stop_event, encoder_tracker, amplitude = AUTOTUNE_AMPLITUDE_MM):
+        """! Initialisation of the tuning of an axis
+        @param axis                 Name of the axis, key of DICT_AUTOTUNE_AXES
+        @param connected_device     The Serial object currently connected to the application
+        @param stop_event           Thread event stopping the tuning when set
+        @param encoder_tracker      EncoderTracker following the encoder counts
+        @param amplitude            Amplitude of the test movements (mm)
+        """
+        self.axis = axis
+        self.motor_id, self.encoder_id, self.command_out, self.command_back, self.list_slider_info, self.slider_max = DICT_AUTOTUNE_AXES[axis]
+        self.connected_device = connected_device
+        self.stop_event = stop_event
+        self.amplitude = amplitude
+        self.reference_out = None
+        self.reference_back = None
+        self.encoder_tracker = encoder_tracker
@@ -0,0 +1,200 @@
+##
+# @file
+# stall_detector.py
+#
+# @brief
+# Detection of the steps lost and of the stalls of the motors during the automatic runs. \n
+# The displacement measured by the encoder is accumulated frame by frame and compared at the end of every movement with the displacement commanded to the motor.
+
+# Imports
+import metrics
+from common import PULSE_PER_MM
+from serial_funcs import add_rx_listener, remove_rx_listener, calculate_encoder_delta, DICT_MOTOR_ENCODER, INDEX_ID, INDEX_MOTOR_POSITION, ID_ENCODER_VERTICAL_LEFT, ID_ENCODER_VERTICAL_RIGHT, ID_ENCODER_HORIZONTAL
+from automatic_control import RunObserver, AutomaticMode, determine_trajectory_parameters, PARAMETER_AMPLITUDE
+from speed_autotune import load_bench_profile, path_bench_profile
+from position_control import PROFILE_KEY_COUNTS_PER_MM
+
+# Constants
+## Maximal difference between the measured and the expected displacement of a movement (fraction of the expected displacement)
+STALL_TOLERANCE = 0.05
+
+## Number of faulty movements in a row after which the run is paused
+STALL_MAX_CONSECUTIVE_FAULTS = 2
+
+## Number of movements measured at the start of a run to calibrate the encoder counts per motor pulse
+STALL_CALIBRATION_MOVEMENTS = 4
+
+## Maximal difference between the calibrated counts per pulse and the resolution of the encoder in the profile of the bench (fraction)
+STALL_CALIBRATION_TOLERANCE = 0.10
+
+## Axis of the profile of the bench giving the resolution of each encoder - Both vertical rails have the same mechanics
+DICT_ENCODER_PROFILE_AXIS = {
+    ID_ENCODER_VERTICAL_LEFT    : "vertical",
+    ID_ENCODER_VERTICAL_RIGHT   : "vertical",
+    ID_ENCODER_HORIZONTAL       : "horizontal"
+}
+
+# Functions
+def load_reference_counts_per_pulse(encoder_id, path_profile = path_bench_profile):
+    """! Gives the encoder counts per motor pulse expected from the resolution of the encoder measured on the bench
+    @param encoder_id       ID of the encoder
+    @param path_profile     Path of the profile of the bench
+    @return The counts per pulse - None if the resolution of the encoder was not measured
+    """
+    counts_per_mm = load_bench_profile(path_profile).get(PROFILE_KEY_COUNTS_PER_MM, {}).get(DICT_ENCODER_PROFILE_AXIS.get(encoder_id))
+
+    if (counts_per_mm in (None, 0)):
+        return None
+
+    # The sign of the resolution only gives the direction of the counts
+    return abs(counts_per_mm) / PULSE_PER_MM
+
+# Classes
+class StallDetector(RunObserver):
+    """! Compares the displacement of every movement of a run with the displacement measured by the encoder of its motor\n
+    The encoder counts per motor pulse are calibrated on the first movements of the run, and the calibration is rejected if it is too far from the resolution of the encoder in the profile of the bench.
+    A movement is faulty when its displacement differs from the expected one by more than the tolerance, and the run is paused after a number of faulty movements in a row
+    """
+    def rx_listener(self, reception_time, list_message_info):
+        """! Accumulates the displacement of the encoder of the run - Constant time per frame
+        """
+        if (list_message_info[INDEX_ID] != self.encoder_id):
+            return
+
+        if (self.last_position != None):
+            self.displacement = self.displacement + calculate_encoder_delta(self.last_position, list_message_info[INDEX_MOTOR_POSITION])
+
+        self.last_position = list_message_info[INDEX_MOTOR_POSITION]
+
+    def calibrate(self):
+        """! Computes the encoder counts per motor pulse from the movements of the calibration and checks these movements against it
+        """
+        list_ratios = sorted(abs(displacement) / self.expected_pulses for repetition, displacement in self.list_calibration_movements)
+        counts_per_pulse = list_ratios[len(list_ratios) // 2]
+
+        if (self.reference_counts_per_pulse != None):
+            # Movements that stalled or lost steps during the calibration must not become the reference of the run
+            if (abs(counts_per_pulse - self.reference_counts_per_pulse) > (STALL_CALIBRATION_TOLERANCE * self.reference_counts_per_pulse)):
+                metrics.increment_counter("stall_detector.rejected_calibrations")
+                print("Calibration of the encoder " + str(self.encoder_id) + " rejected: " + str(round(counts_per_pulse, 3)) + " counts per pulse instead of " + str(round(self.reference_counts_per_pulse, 3)) + " from the profile of the bench")
+                counts_per_pulse = self.reference_counts_per_pulse
+
+        elif (counts_per_pulse == 0):
+            print("Stall detection disabled: no displacement measured by the encoder " + str(self.encoder_id))
+            self.encoder_id = None
+            return
+
+        # Without a reference, the calibration is only trusted if most of its movements agree
+        elif (sum(1 for ratio in list_ratios if (abs(ratio - counts_per_pulse) <= (self.tolerance * counts_per_pulse))) <= (len(list_ratios) // 2)):
+            metrics.increment_counter("stall_detector.rejected_calibrations")
+            print("Stall detection disabled: the calibration movements of the encoder " + str(self.encoder_id) + " do not agree")
+            self.encoder_id = None
+            return
+
+        self.counts_per_pulse = counts_per_pulse
+
+        for repetition, displacement in self.list_calibration_movements:
+            self.check_movement(repetition, displacement)
+
+    def check_movement(self, counter_repetitions, displacement):
+        """! Compares the displacement of a movement with the expected displacement and applies the rule of the detector
+        @param counter_repetitions  Number of repetitions started
+        @param displacement         Displacement measured by the encoder (counts)
+        """
+        expected_displacement = self.expected_pulses * self.counts_per_pulse
+        error = abs(abs(displacement) - expected_displacement) / expected_displacement
+
+        if (error <= self.tolerance):
+            self.counter_consecutive_faults = 0
+            return
+
+        self.counter_consecutive_faults = self.counter_consecutive_faults + 1
+        self.list_faults.append((counter_repetitions, displacement, expected_displacement))
+        metrics.increment_counter("stall_detector.faults")
+
+        print("Repetition " + str(counter_repetitions) + ": " + str(displacement) + " encoder counts instead of " + str(round(expected_displacement)))
+
+        if ((self.counter_consecutive_faults >= self.max_consecutive_faults) and (self.pause_event != None) and (self.pause_event.is_set() != True)):
+            print("Run paused: " + str(self.counter_consecutive_faults) + " movements in a row lost steps or stalled")
+            self.pause_event.set()
+
+    def on_run_start(self, program, counter_repetitions):
+        """! Starts following the encoder of the motor of the run
+        """
+        if (self.encoder_id == None):
+            return
+
+        self.expected_pulses = AutomaticMode.calculate_movement_pulses(self.motor_id, program["amplitude"], program["turns"])
+
+        if (self.expected_pulses == 0):
+            self.encoder_id = None
+            return
+
+        add_rx_listener(self.rx_listener)
+
+    def on_command_sent(self, counter_repetitions, checkpoint_to_reach):
+        """! Starts the measure of the movement
+        """
+        self.displacement = 0
+
+    def on_trajectory_ended(self, counter_repetitions, checkpoint_reached):
+        """! Checks the displacement of the movement, or keeps it for the calibration
+        """
+        if (self.encoder_id == None):
+            return
+
+        if (self.counts_per_pulse != None):
+            self.check_movement(counter_repetitions, self.displacement)
+            return
+
+        self.list_calibration_movements.append((counter_repetitions, self.displacement))
+
+        if (len(self.list_calibration_movements) >= STALL_CALIBRATION_MOVEMENTS):
+            self.calibrate()
+
+    def on_parameters_changed(self, counter_repetitions, program, dict_changes):
+        """! Updates the expected displacement of the movements when the amplitude changes
+        """
+        if ((self.encoder_id == None) or (PARAMETER_AMPLITUDE not in dict_changes)):
+            return
+
+        self.expected_pulses = AutomaticMode.calculate_movement_pulses(self.motor_id, program["amplitude"], program["turns"])
+
+        if (self.expected_pulses == 0):
+            self.encoder_id = None
+
+        # The movements measured at the previous amplitude cannot be used for the calibration
+        self.list_calibration_movements = []
+
+    def on_run_end(self, counter_repetitions, flag_is_stopped):
+        """! Stops following the encoder
+        """
+        remove_rx_listener(self.rx_listener)
+
+    def __init__(self, directions, pause_event = None, tolerance = STALL_TOLERANCE, max_consecutive_faults = STALL_MAX_CONSECUTIVE_FAULTS, counts_per_pulse = None, path_profile = path_bench_profile):
+        """! Initialisation of the detector of a run - The motors without encoder are not checked
+        @param directions               Combination of movements of the run
+        @param pause_event              Thread event pausing the run - The faults are only reported if None
+        @param tolerance                Maximal difference between the measured and the expected displacement (fraction)
+        @param max_consecutive_faults   Number of faulty movements in a row after which the run is paused
+        @param counts_per_pulse         Encoder counts per motor pulse - Calibrated on the first movements of the run if None
+        @param path_profile             Path of the profile of the bench containing the resolution of the encoders
+        """
+        self.motor_id, command_a, command_b = determine_trajectory_parameters(directions, AutomaticMode.list_movement_entries)
+        self.encoder_id = DICT_MOTOR_ENCODER.get(self.motor_id)
+
+        self.pause_event = pause_event
+        self.tolerance = tolerance
+        self.max_consecutive_faults = max_consecutive_faults
+
+        self.counts_per_pulse = counts_per_pulse
+        self.reference_counts_per_pulse = load_reference_counts_per_pulse(self.encoder_id, path_profile)
+
+        self.expected_pulses = 0
+        self.displacement = 0
+        self.last_position = None
+        self.counter_consecutive_faults = 0
+        self.list_calibration_movements = []
+
+        ## Faulty movements of the run: (repetitions started, measured displacement, expected displacement)
+        self.list_faults = []
@@ -0,0 +1,255 @@
+##
+# @file
+# teach_mode.py
+#
+# @brief
+# Programming of movement paths by demonstration. \n
+# The jog commands of the operator are recorded with the positions measured by the encoders, the path is simplified and saved as a program that the automatic mode replays at full speed.
+
+# Imports
+import json
+import os
+import time
+
+from common import *
+from serial_funcs import *
+from automatic_control import AutomaticMode
+from position_control import DICT_POSITION_AXES, plan_move, calculate_axis_speed
+
+# Constants
+## Folder of the taught programs
+path_taught_programs_folder = 'programs/taught'
+
+## Longest movement in the opposite direction merged into the previous movement as a correction of the operator (mm, turns for the screw)
+TEACH_CORRECTION_MAX = 5
+
+## Axis, commands towards the positive and the negative direction, and stop command of every motor that can be jogged
+DICT_TEACH_MOTORS = {
+    motor_id : (axis, command_positive, command_negative, DICT_MOTOR_STOP[motor_id][0])
+    for axis, (motor_id, encoder_id, command_positive, command_negative, list_slider_info) in DICT_POSITION_AXES.items()}
+
+# Functions
+def simplify_segments(list_segments):
+    """! Simplifies a recorded path\n
+    Consecutive movements of the same axis in the same direction are merged, and a short movement back is merged as a correction of the previous movement.
+    The movements below the resolution of the movement commands are only dropped once nothing can be merged, so that short jogs adding up to a longer movement are kept.
+    The simplification is repeated until nothing changes
+    @param list_segments    Recorded movements: dictionnaries of the "axis", the signed "distance" and the "slider_value" of the speed
+    @return The list of the simplified movements
+    """
+    flag_is_changed = True
+
+    while (flag_is_changed == True):
+        flag_is_changed = False
+        list_simplified = []
+
+        for segment in list_segments:
+            if ((len(list_simplified) != 0) and (list_simplified[-1]["axis"] == segment["axis"])):
+                previous = list_simplified[-1]
+                flag_is_same_direction = ((previous["distance"] > 0) == (segment["distance"] > 0))
+
+                if ((flag_is_same_direction == True) or (min(abs(previous["distance"]), abs(segment["distance"])) <= TEACH_CORRECTION_MAX)):
+                    previous["distance"] = previous["distance"] + segment["distance"]
+                    previous["slider_value"] = max(previous["slider_value"], segment["slider_value"])
+                    flag_is_changed = True
+                    continue
+
+            list_simplified.append(dict(segment))
+
+        # Residues that cannot be commanded - Their neighbours can be merged once they are dropped
+        if (flag_is_changed == False):
+            list_commanded = [segment for segment in list_simplified if (len(plan_move({segment["axis"] : segment["distance"]}, {segment["axis"] : segment["slider_value"]})[0]) != 0)]
+            flag_is_changed = (len(list_commanded) != len(list_simplified))
+            list_simplified = list_commanded
+
+        list_segments = list_simplified
+
+    return list_segments
+
+def build_program_steps(list_segments, flag_close_path = True):
+    """! Converts a simplified path to the steps of a program
+    @param list_segments        Simplified movements, as given by simplify_segments
+    @param flag_close_path      If true, movements back to the start position are added so that the path can be repeated in place
+    @return The list of steps: dictionnaries of the "axis", "motor_id", "command", "data", "slider_value" and planned "duration" (s)
+    """
+    list_segments = list(list_segments)
+
+    if (flag_close_path == True):
+        dict_displacements = {}
+        dict_slider_values = {}
+
+        for segment in list_segments:
+            dict_displacements[segment["axis"]] = dict_displacements.get(segment["axis"], 0) + segment["distance"]
+            dict_slider_values[segment["axis"]] = max(dict_slider_values.get(segment["axis"], 0), segment["slider_value"])
+
+        for axis, displacement in dict_displacements.items():
+            list_segments.append({"axis" : axis, "distance" : -displacement, "slider_value" : dict_slider_values[axis]})
+
+    list_steps = []
+
+    for segment in list_segments:
+        dict_moves, duration = plan_move({segment["axis"] : segment["distance"]}, {segment["axis"] : segment["slider_value"]})
+
+        for axis, (command, data, duration) in dict_moves.items():
+            list_steps.append({
+                                "axis"          : axis,
+                                "motor_id"      : DICT_POSITION_AXES[axis][0],
+                                "command"       : command,
+                                "data"          : data,
+                                "slider_value"  : segment["slider_value"],
+                                "duration"      : duration})
+
+    return list_steps
+
+def save_taught_program(name, list_steps, folder = path_taught_programs_folder):
+    """! Writes a taught program
+    @param name         Name of the program
+    @param list_steps   Steps of the program, as given by build_program_steps
+    @param folder       Folder of the taught programs
+    @return The path of the program file
+    """
+    os.makedirs(folder, exist_ok = True)
+    path_program = os.path.join(folder, name + '.json')
+
+    with open(path_program, "w") as f:
+        json.dump({"name" : name, "created" : time.strftime('%Y-%m-%d %H:%M:%S'), "steps" : list_steps}, f, indent = 4)
+
+    return path_program
+
+def load_taught_program(name, folder = path_taught_programs_folder):
+    """! Reads a taught program
+    @param name     Name of the program
+    @param folder   Folder of the taught programs
+    @return The dictionnary of the program
+    """
+    with open(os.path.join(folder, name + '.json'), "r") as f:
+        return json.load(f)
+
+def list_taught_programs(folder = path_taught_programs_folder):
+    """! Gives the names of the taught programs
+    @param folder   Folder of the taught programs
+    @return The sorted list of the names
+    """
+    if (os.path.isdir(folder) == False):
+        return []
+
+    return sorted(name[:-len('.json')] for name in os.listdir(folder) if name.endswith('.json'))
+
+def replay_taught_program(name, number_reps_to_do, label_reps_actual, connected_device, stop_event, pause_event):
+    """! Replays a taught program with the automatic mode, then restores the speeds chosen with the sliders - Executed by the automatic mode worker
+    @param name                 Name of the program
+    @param number_reps_to_do    Number of times the path is executed
+    @param label_reps_actual    Label object to update the number of repetitions executed
+    @param connected_device     The Serial object currently connected to the application
+    @param stop_event           Thread event to stop the replay
+    @param pause_event          Thread event to pause the replay at the end of the current movement
+    """
+    list_steps = load_taught_program(name)["steps"]
+
+    AutomaticMode.auto_mode_sequence(list_steps, number_reps_to_do, label_reps_actual, connected_device, stop_event, pause_event)
+
+    for motor_id in set(step["motor_id"] for step in list_steps):
+        list_slider_info = DICT_POSITION_AXES[DICT_TEACH_MOTORS[motor_id][0]][4]
+        transmit_serial_data(motor_id, COMMAND_MOTOR_CHANGE_SPEED, MODE_CHANGE_PARAMS, round(list_slider_info[SLIDER_PREV_VALUE_INDEX]), connected_device)
+
+# Classes
+class TeachRecorder():
+    """! Records the jog commands of the operator as movements of the axes\n
+    The distance of a movement is measured by the encoder of its axis when its resolution is known, and computed from its duration and the speed of the axis otherwise
+    """
+    def get_axis_position(self, axis):
+        """! Gives the measured position of an axis
+        @param axis     Name of the axis
+        @return The position (mm) - None if the axis is not measured by its encoder
+        """
+        if ((self.position_controller == None) or (self.position_controller.is_closed_loop(axis) == False)):
+            return None
+
+        return self.position_controller.get_position(axis)
+
+    def end_segment(self, time_command, motor_id):
+        """! Ends the movement of a motor in progress, if any, and keeps it
+        @param time_command     Time (perf_counter) of the end of the movement
+        @param motor_id         The ID of the motor
+        """
+        segment = self.dict_segments_in_progress.pop(motor_id, None)
+
+        if (segment == None):
+            return
+
+        position_end = self.get_axis_position(segment["axis"])
+
+        if ((segment["position_start"] != None) and (position_end != None)):
+            distance = position_end - segment["position_start"]
+        else:
+            distance = segment["sign"] * (time_command - segment["time_start"]) * calculate_axis_speed(segment["axis"], segment["slider_value"])
+
+        self.list_segments.append({"axis" : segment["axis"], "distance" : distance, "slider_value" : segment["slider_value"]})
+
+    def jog_listener(self, time_command, motor_id, command):
+        """! Starts or ends a movement from a jog command - Repeated commands of a held key are ignored
+        """
+        if (motor_id not in DICT_TEACH_MOTORS):
+            return
+
+        axis, command_positive, command_negative, command_stop = DICT_TEACH_MOTORS[motor_id]
+        segment = self.dict_segments_in_progress.get(motor_id)
+
+        if ((segment != None) and (segment["command"] == command)):
+            return
+
+        self.end_segment(time_command, motor_id)
+
+        if (command in (command_positive, command_negative)):
+            if (command == command_positive):
+                sign = 1
+            else:
+                sign = -1
+
+            self.dict_segments_in_progress[motor_id] = {
+                                                        "axis"              : axis,
+                                                        "command"           : command,
+                                                        "sign"              : sign,
+                                                        "time_start"        : time_command,
+                                                        "position_start"    : self.get_axis_position(axis),
+                                                        "slider_value"      : round(DICT_POSITION_AXES[axis][4][SLIDER_PREV_VALUE_INDEX])}
+
+    def start(self):
+        """! Starts recording the jog commands
+        """
+        self.list_segments = []
+        self.dict_segments_in_progress = {}
+
+        add_jog_listener(self.jog_listener)
+
+    def stop_recording(self):
+        """! Stops recording the jog commands and ends the movements in progress
+        """
+        remove_jog_listener(self.jog_listener)
+
+        for motor_id in list(self.dict_segments_in_progress):
+            self.end_segment(time.perf_counter(), motor_id)
+
+    def stop(self, name, flag_close_path = True):
+        """! Stops recording and saves the simplified path as a taught program
+        @param name                 Name of the program
+        @param flag_close_path      If true, the program returns to its start position at the end of every repetition
+        @return The path of the program file - None if nothing was recorded
+        """
+        self.stop_recording()
+
+        list_simplified = simplify_segments(self.list_segments)
+        print("Taught path: " + str(len(self.list_segments)) + " movements recorded, " + str(len(list_simplified)) + " kept")
+
+        if (len(list_simplified) == 0):
+            return None
+
+        return save_taught_program(name, build_program_steps(list_simplified, flag_close_path))
+
+    def __init__(self, position_controller = None):
+        """! Initialisation of a recorder
+        @param position_controller  PositionController measuring the position of the axes - The distances are computed from the durations if None
+        """
+        self.position_controller = position_controller
+        self.list_segments = []
+        self.dict_segments_in_progress = {}
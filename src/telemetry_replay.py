@@ -0,0 +1,230 @@
+##
+# @file
+# telemetry_replay.py
+#
+# @brief
+# Replay of the telemetry of an archived run. \n
+# A fake serial port gives back the recorded frames at their recorded pace, faster, or as fast as possible, so the GUI and the automatic mode can be run against a real session without the bench.
+
+# Imports
+import argparse
+import contextlib
+import os
+import time
+from threading import Event, Thread
+
+import numpy
+
+# The common module must be imported before the serial functions
+import common
+import metrics
+from serial_funcs import *
+from automatic_control import AutomaticMode
+from archive_compaction import open_run_archive
+from run_archive import list_archived_runs, path_archive_folder
+from control_server import RepetitionsCounter
+
+# Constants
+## Prefix of the replayed runs in the list of COM ports
+REPLAY_PORT_PREFIX = "Replay "
+
+## Number of most recent archived runs proposed for replay in the list of COM ports
+REPLAY_PORTS_LISTED = 10
+
+# Functions
+def encode_frames(dict_columns):
+    """! Rebuilds the bytes sent by the microcontroler from the columns of an archive
+    @param dict_columns     Columns of the archive, as given by RunArchive
+    @return numpy array of the frames, one row of NUM_BYTES_TO_READ bytes per frame
+    """
+    ids = numpy.asarray(dict_columns["id"], dtype = numpy.uint32)
+    frames = (ids << 16) | (numpy.asarray(dict_columns["movement"], dtype = numpy.uint32) << 8) | numpy.asarray(dict_columns["state"], dtype = numpy.uint32)
+
+    # Encoders send their position count in place of the status bytes
+    mask_encoder = numpy.isin(ids, LIST_ENCODER_IDS)
+    frames[mask_encoder] = (ids[mask_encoder] << 16) | (numpy.asarray(dict_columns["position"])[mask_encoder].astype(numpy.uint32) & MASK_DATA)
+
+    if (ENDIANNESS == 'little'):
+        dtype = '<u4'
+    else:
+        dtype = '>u4'
+
+    return frames.astype(dtype).view(numpy.uint8).reshape(-1, 4)[:, :NUM_BYTES_TO_READ]
+
+def list_replay_ports():
+    """! Gives the names under which the most recent archived runs are proposed in the list of COM ports
+    @return The list of the replay port names
+    """
+    return [REPLAY_PORT_PREFIX + os.path.basename(path_run) for path_run in list_archived_runs()[-REPLAY_PORTS_LISTED:]]
+
+def open_replay_port(port_name, speed = 1.0):
+    """! Opens the replay of an archived run from its name in the list of COM ports
+    @param port_name    Name given by list_replay_ports
+    @param speed        Replay speed factor - 0 to replay as fast as possible
+    @return The ReplayPort object - None if the run cannot be opened
+    """
+    try:
+        return ReplayPort(os.path.join(path_archive_folder, port_name[len(REPLAY_PORT_PREFIX):]), speed)
+    except (OSError, ValueError) as error:
+        print("Replay unavailable: ", error)
+        return None
+
+def benchmark_receive(path_run):
+    """! Measures the processing of the frames of a run by the reception function, without pacing
+    @param path_run     Folder of the archive of the run
+    @return A dictionnary of the number of frames, the frames per second and the processing time statistics (s)
+    """
+    port = ReplayPort(path_run, 0)
+    connected_device = [port]
+    list_message_info = [0, 0, 0, 0]
+
+    metrics.reset_metrics()
+    metrics.enable_metrics(True)
+
+    # The printed frames are part of the measured processing, but are not shown
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        time_start = time.perf_counter()
+
+        for i in range(port.counter_frames):
+            receive_serial_data(list_message_info, connected_device)
+
+        duration = time.perf_counter() - time_start
+
+    metrics.enable_metrics(False)
+
+    return {
+            "frames"            : port.counter_frames,
+            "frames_per_second" : port.counter_frames / duration if (duration > 0) else 0.0,
+            "processing"        : metrics.get_metrics_snapshot()["histograms"].get("serial.receive_processing", {"count" : 0})}
+
+def replay_auto_mode(path_run, speed):
+    """! Runs the automatic mode with the program of a run against the replay of its telemetry
+    @param path_run     Folder of the archive of the run
+    @param speed        Replay speed factor - 0 to replay as fast as possible
+    @return The number of repetitions counted by the automatic mode and the commands it sent
+    """
+    port = ReplayPort(path_run, speed)
+    connected_device = [port]
+    program = port.archive.header["program"]
+
+    stop_event = Event()
+    label_reps_actual = RepetitionsCounter()
+
+    reading_stop_event = Event()
+    thread_reading = Thread(target = read_rx_buffer, args = (reading_stop_event, connected_device, ), daemon = True)
+    thread_reading.start()
+
+    thread_auto_mode = Thread(target = AutomaticMode.auto_mode, args = (program["amplitude"], program["movement"], program["turns"], program["reps"], label_reps_actual, connected_device, stop_event, Event(), ), daemon = True)
+    thread_auto_mode.start()
+
+    # The automatic mode cannot end by itself if the replayed run was stopped: it is stopped at the end of the replay
+    while ((thread_auto_mode.is_alive() == True) and (port.event_replay_over.wait(0.1) != True)):
+        pass
+
+    thread_auto_mode.join(1.0)
+    stop_event.set()
+    thread_auto_mode.join()
+
+    reading_stop_event.set()
+    port.close()
+
+    return label_reps_actual.text, port.list_written_frames
+
+# Classes
+class ReplayPort():
+    """! Fake serial port giving back the frames of an archived run\n
+    Can be used wherever the Serial object of the microcontroler is used: the frames are read with the recorded pace divided by the speed factor, and the written frames are kept
+    """
+    def read(self, size = 1):
+        """! Gives the next recorded frame once its time has come
+        @param size     Number of bytes to read - Must be the size of a frame
+        @return The bytes of the frame - Empty once the port is closed
+        """
+        if (self.index_next_frame >= self.counter_frames):
+            # End of the replay: nothing more comes, as a silent microcontroler
+            self.event_replay_over.set()
+            self.event_cancel_read.wait()
+            self.event_cancel_read.clear()
+            return b''
+
+        if (self.speed > 0):
+            if (self.time_replay_start == None):
+                self.time_replay_start = time.perf_counter()
+
+            delay = self.time_replay_start + (self.timestamps[self.index_next_frame] - self.timestamps[0]) / self.speed - time.perf_counter()
+            if ((delay > 0) and (self.event_cancel_read.wait(delay) == True)):
+                self.event_cancel_read.clear()
+                return b''
+
+        frame = self.frames[self.index_next_frame].tobytes()
+        self.index_next_frame = self.index_next_frame + 1
+
+        return frame[:size]
+
+    def write(self, data):
+        """! Keeps the written frame
+        @param data     Bytes of the frame
+        @return The number of bytes written
+        """
+        self.list_written_frames.append(bytes(data))
+        return len(data)
+
+    def cancel_read(self):
+        """! Unblocks a pending read
+        """
+        self.event_cancel_read.set()
+
+    def reset_output_buffer(self):
+        """! Nothing is buffered by the replay
+        """
+        pass
+
+    def flushInput(self):
+        """! Nothing is buffered by the replay
+        """
+        pass
+
+    def flushOutput(self):
+        """! Nothing is buffered by the replay
+        """
+        pass
+
+    def close(self):
+        """! Ends the replay
+        """
+        self.index_next_frame = self.counter_frames
+        self.is_open = False
+        self.event_cancel_read.set()
+
+    def __init__(self, path_run, speed = 1.0):
+        """! Initialisation of the replay of a run
+        @param path_run     Folder of the archive of the run
+        @param speed        Replay speed factor - 0 to replay as fast as possible
+        """
+        self.archive = open_run_archive(path_run)
+        self.frames = encode_frames(self.archive.dict_columns)
+        self.timestamps = numpy.asarray(self.archive.dict_columns["timestamp"], dtype = numpy.float64)
+        self.counter_frames = self.archive.counter_frames
+        self.speed = speed
+
+        self.index_next_frame = 0
+        self.is_open = True
+        self.time_replay_start = None
+        self.list_written_frames = []
+        self.event_cancel_read = Event()
+        self.event_replay_over = Event()
+
+if __name__ == "__main__":
+    """! Replays an archived run in the reception function or in the automatic mode
+    """
+    parser = argparse.ArgumentParser(description = "Replays the telemetry of an archived run")
+    parser.add_argument("path_run", help = "folder of the archived run")
+    parser.add_argument("--speed", type = float, default = 0, help = "replay speed factor, 0 for as fast as possible")
+    parser.add_argument("--auto", action = "store_true", help = "run the automatic mode with the program of the run against the replay")
+    arguments = parser.parse_args()
+
+    if (arguments.auto == True):
+        repetitions, list_written_frames = replay_auto_mode(arguments.path_run, arguments.speed)
+        print("Repetitions counted: " + str(repetitions) + ", commands sent: " + str(len(list_written_frames)))
+    else:
+        print(benchmark_receive(arguments.path_run))
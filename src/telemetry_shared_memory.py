@@ -0,0 +1,315 @@
+##
+# @file
+# telemetry_shared_memory.py
+#
+# @brief
+# Publication of the received frames in shared memory for the other processes of the bench. \n
+# The frames are written in a ring of fixed-width records, and the last frame of every ID in a table, both protected by a sequence lock in the header. \n
+# Other Python processes map the same memory with TelemetryReader and read the positions and states without sockets, copies of the ring, or the GUI process. \n
+# Only the publisher needs the serial functions, and with them the GUI stack: they are imported when it starts so that the readers only depend on numpy.
+
+# Imports
+import os
+import time
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy
+
+# Constants
+## Name of the shared memory block
+TELEMETRY_SHM_NAME = 'test_bench_telemetry'
+
+## Number of frames kept in the ring - About 4 s of frames at 1 kHz
+TELEMETRY_SHM_CAPACITY = 4096
+
+## Identification of the layout of the shared memory, checked by the readers
+TELEMETRY_SHM_MAGIC     = 0x54424331
+TELEMETRY_SHM_VERSION   = 2
+
+## Maximal number of attempts to read a consistent snapshot while the publisher writes
+TELEMETRY_READ_RETRIES = 1000
+
+## Header of the shared memory - The sequence is odd while a frame is being written
+TELEMETRY_HEADER_DTYPE = numpy.dtype([
+    ("magic",       '<u4'),
+    ("version",     '<u4'),
+    ("capacity",    '<u8'),
+    ("sequence",    '<u8'),
+    ("write_index", '<u8'),
+    ("pid",         '<u8')
+])
+
+## Size reserved for the header, so that the records start on a cache line (bytes)
+TELEMETRY_HEADER_SIZE = 64
+
+## Record of a frame - Same columns as the archive of the runs
+TELEMETRY_RECORD_DTYPE = numpy.dtype([
+    ("timestamp",   '<f8'),
+    ("id",          'u1'),
+    ("movement",    'u1'),
+    ("state",       'u1'),
+    ("reserved",    'u1'),
+    ("position",    '<i4')
+])
+
+## Number of records of the table of the last frame of every ID - One per possible ID
+TELEMETRY_LATEST_SIZE = 256
+
+# Functions
+def get_telemetry_size(capacity):
+    """! Gives the size of the shared memory holding a ring
+    @param capacity     Number of frames of the ring
+    @return The size in bytes
+    """
+    return TELEMETRY_HEADER_SIZE + ((TELEMETRY_LATEST_SIZE + capacity) * TELEMETRY_RECORD_DTYPE.itemsize)
+
+def map_telemetry_arrays(buffer, capacity):
+    """! Maps the header, the table of the last frames and the ring on a shared memory buffer, without copy
+    @param buffer       Buffer of the shared memory
+    @param capacity     Number of frames of the ring
+    @return The header (0-d array), the table of the last frame by ID and the ring
+    """
+    header = numpy.ndarray((), dtype = TELEMETRY_HEADER_DTYPE, buffer = buffer, offset = 0)
+    latest = numpy.ndarray((TELEMETRY_LATEST_SIZE, ), dtype = TELEMETRY_RECORD_DTYPE, buffer = buffer, offset = TELEMETRY_HEADER_SIZE)
+    ring = numpy.ndarray((capacity, ), dtype = TELEMETRY_RECORD_DTYPE, buffer = buffer, offset = TELEMETRY_HEADER_SIZE + (TELEMETRY_LATEST_SIZE * TELEMETRY_RECORD_DTYPE.itemsize))
+
+    return header, latest, ring
+
+def is_process_running(pid):
+    """! Indicates if a process is still running
+    @param pid  ID of the process
+    @return True if the process is running
+    """
+    if (os.name != "posix"):
+        # Windows destroys a block once no process maps it: a block that still exists is always in use
+        return True
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return True
+
+def import_serial_functions():
+    """! Imports the serial functions used by the publisher in this module - Only the application publishing the frames imports them
+    """
+    global add_rx_listener, remove_rx_listener, INDEX_ID, INDEX_STATUS_MOVEMENT_MOTOR, INDEX_STATUS_MOTOR, INDEX_MOTOR_POSITION
+
+    # The common module must be imported before the serial functions
+    import common
+    from serial_funcs import add_rx_listener, remove_rx_listener, INDEX_ID, INDEX_STATUS_MOVEMENT_MOTOR, INDEX_STATUS_MOTOR, INDEX_MOTOR_POSITION
+
+def attach_shared_memory(name):
+    """! Opens an existing shared memory block without taking its ownership
+    @param name     Name of the shared memory block
+    @return The SharedMemory object
+    """
+    try:
+        return shared_memory.SharedMemory(name = name, track = False)
+    except TypeError:
+        pass
+
+    # Before Python 3.13 the attaching process registers the block and destroys it when it exits
+    shm = shared_memory.SharedMemory(name = name)
+
+    if (os.name == "posix"):
+        resource_tracker.unregister(shm._name, "shared_memory")
+
+    return shm
+
+# Classes
+class TelemetryPublisher():
+    """! Writes every received frame in the shared memory - Constant time per frame, executed by the serial reading thread\n
+    The publisher is the only writer: the readers never block it and a slow reader only loses the frames overwritten in the ring
+    """
+    def rx_listener(self, reception_time, list_message_info):
+        """! Publishes a received frame
+        """
+        record = (
+                    reception_time,
+                    list_message_info[INDEX_ID],
+                    list_message_info[INDEX_STATUS_MOVEMENT_MOTOR],
+                    list_message_info[INDEX_STATUS_MOTOR],
+                    0,
+                    list_message_info[INDEX_MOTOR_POSITION])
+
+        # The sequence is odd while the records are inconsistent
+        self.sequence = self.sequence + 1
+        self.header["sequence"] = self.sequence
+
+        self.ring[self.write_index % self.capacity] = record
+        self.latest[list_message_info[INDEX_ID]] = record
+
+        self.write_index = self.write_index + 1
+        self.header["write_index"] = self.write_index
+
+        self.sequence = self.sequence + 1
+        self.header["sequence"] = self.sequence
+
+    def start(self):
+        """! Creates the shared memory and starts publishing the received frames - A block left by a previous session is replaced
+        @return True if the publication started, False if the block is used by another running application
+        """
+        import_serial_functions()
+
+        size = get_telemetry_size(self.capacity)
+
+        try:
+            self.shm = shared_memory.SharedMemory(name = self.name, create = True, size = size)
+        except FileExistsError:
+            shm_previous = attach_shared_memory(self.name)
+
+            # Only a block left by a process that is not running anymore can be replaced
+            pid_previous = 0
+            if (shm_previous.size >= TELEMETRY_HEADER_DTYPE.itemsize):
+                header_previous = numpy.ndarray((), dtype = TELEMETRY_HEADER_DTYPE, buffer = shm_previous.buf, offset = 0)
+                if ((int(header_previous["magic"]) == TELEMETRY_SHM_MAGIC) and (int(header_previous["version"]) == TELEMETRY_SHM_VERSION)):
+                    pid_previous = int(header_previous["pid"])
+                del header_previous
+
+            shm_previous.close()
+
+            if ((pid_previous != 0) and (is_process_running(pid_previous) == True)):
+                print("Telemetry not published: the shared memory " + self.name + " is used by the running process " + str(pid_previous))
+                return False
+
+            shm_previous.unlink()
+
+            self.shm = shared_memory.SharedMemory(name = self.name, create = True, size = size)
+
+        self.header, self.latest, self.ring = map_telemetry_arrays(self.shm.buf, self.capacity)
+        self.latest[:] = numpy.zeros(1, dtype = TELEMETRY_RECORD_DTYPE)
+        self.sequence = 0
+        self.write_index = 0
+
+        # The magic is written last so that a reader never maps a block being initialised
+        self.header["version"] = TELEMETRY_SHM_VERSION
+        self.header["capacity"] = self.capacity
+        self.header["sequence"] = 0
+        self.header["write_index"] = 0
+        self.header["pid"] = os.getpid()
+        self.header["magic"] = TELEMETRY_SHM_MAGIC
+
+        add_rx_listener(self.rx_listener)
+
+        return True
+
+    def stop(self):
+        """! Stops publishing and destroys the shared memory - The readers keep their mapping until they close it
+        """
+        import_serial_functions()
+        remove_rx_listener(self.rx_listener)
+
+        if (self.shm != None):
+            # The views must be released before the block can be closed
+            self.header = None
+            self.latest = None
+            self.ring = None
+
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def __init__(self, name = TELEMETRY_SHM_NAME, capacity = TELEMETRY_SHM_CAPACITY):
+        """! Initialisation of the publisher
+        @param name         Name of the shared memory block
+        @param capacity     Number of frames kept in the ring
+        """
+        self.name = name
+        self.capacity = capacity
+        self.shm = None
+        self.header = None
+        self.latest = None
+        self.ring = None
+        self.sequence = 0
+        self.write_index = 0
+
+class TelemetryReader():
+    """! Reads the frames published by the application from another process\n
+    The ring and the table of the last frames are mapped without copy - Only the records returned are copied, after checking that they were not being written
+    """
+    def read_latest(self, id):
+        """! Gives the last frame received with an ID
+        @param id   ID of the motor, encoder or program
+        @return The record of the frame (fields "timestamp", "id", "movement", "state" and "position") - None if no frame was received with this ID
+        """
+        for i in range(TELEMETRY_READ_RETRIES):
+            sequence_start = int(self.header["sequence"])
+
+            if ((sequence_start % 2) == 0):
+                record = self.latest[id].copy()
+
+                if (int(self.header["sequence"]) == sequence_start):
+                    if (record["timestamp"] == 0):
+                        return None
+
+                    return record
+
+        raise TimeoutError("No consistent frame could be read")
+
+    def read_new_frames(self):
+        """! Gives the frames published since the previous call - Frames overwritten before being read are lost
+        @return The structured numpy array of the frames, oldest first, and the number of frames lost
+        """
+        write_index = int(self.header["write_index"])
+        index_start = max(self.read_index, write_index - self.capacity)
+        counter_lost = index_start - self.read_index
+
+        list_indexes = numpy.arange(index_start, write_index) % self.capacity
+        frames = self.ring[list_indexes]
+
+        # The slot being written when the copy ended held the oldest frame: the frames of the slots overwritten during the copy are dropped
+        index_first_valid = int(self.header["write_index"]) + 1 - self.capacity
+        if (index_first_valid > index_start):
+            counter_dropped = min(index_first_valid - index_start, len(frames))
+            frames = frames[counter_dropped:]
+            counter_lost = counter_lost + counter_dropped
+
+        self.read_index = write_index
+
+        return frames, counter_lost
+
+    def wait_new_frames(self, timeout, poll_period = 0.0001):
+        """! Waits for frames to be published, then reads them
+        @param timeout      Maximal time to wait (s)
+        @param poll_period  Time between two verifications of the ring (s)
+        @return The frames and the number of frames lost, as given by read_new_frames
+        """
+        time_limit = time.perf_counter() + timeout
+
+        while ((int(self.header["write_index"]) == self.read_index) and (time.perf_counter() < time_limit)):
+            time.sleep(poll_period)
+
+        return self.read_new_frames()
+
+    def close(self):
+        """! Unmaps the shared memory
+        """
+        self.header = None
+        self.latest = None
+        self.ring = None
+
+        self.shm.close()
+
+    def __init__(self, name = TELEMETRY_SHM_NAME):
+        """! Initialisation of a reader - Maps the shared memory published by the application
+        @param name     Name of the shared memory block
+        """
+        self.shm = attach_shared_memory(name)
+
+        header = numpy.ndarray((), dtype = TELEMETRY_HEADER_DTYPE, buffer = self.shm.buf, offset = 0)
+        if ((int(header["magic"]) != TELEMETRY_SHM_MAGIC) or (int(header["version"]) != TELEMETRY_SHM_VERSION)):
+            del header
+            self.shm.close()
+            raise ValueError("The shared memory " + name + " does not hold published telemetry")
+
+        self.capacity = int(header["capacity"])
+        del header
+
+        self.header, self.latest, self.ring = map_telemetry_arrays(self.shm.buf, self.capacity)
+
+        ## Index of the next frame to read - Starts with the frames published from now on
+        self.read_index = int(self.header["write_index"])
@@ -6,33 +6,371 @@
 # Thread manager of the GUI.\n
 
 # Imports
-from threading import Event, Thread
+import time
+import traceback
+from threading import Event, Lock, Thread
 
 from automatic_control import *
+from run_journal import RunJournal, find_resumable_run, abandon_run
+from cycle_statistics import CycleStatistics
+from run_archive import RunRecorder
+from archive_compaction import compact_archives
+from rep_index import RepIndexWriter
+from common import SLIDER_PREV_VALUE_INDEX, estimate_program_duration_sec
+from motion_profile import MotionProfileStreamer, PROFILE_CONSTANT, DICT_MOTOR_SLIDER
+from speed_autotune import autotune_axes, DICT_AUTOTUNE_AXES
+from stall_detector import StallDetector
+from position_control import PositionController, DICT_POSITION_AXES
+from teach_mode import replay_taught_program, load_taught_program
+from parameter_sweep import EndOfRunWaiter, SWEEP_END_TIMEOUT_MARGIN_SEC
+from results_database import ResultsWriter, ResultsRecorder
+
+# Constants
+## Maximal time to wait for a worker to end once it was asked to stop (s)
+WORKER_JOIN_TIMEOUT_SEC = 2.0
+
+## Period of verification of the workers health by the supervisor (s)
+SUPERVISOR_PERIOD_SEC = 1.0
+
+## Maximal number of restarts of a failed worker
+WORKER_MAX_RESTARTS = 5
+
+## Names of the workers managed by the thread manager - Only one worker of each name can run at a time
+WORKER_SERIAL_READ      = "serial_read"
+WORKER_AUTO_TEST_MODE   = "auto_test_mode"
+WORKER_AUTO_MODE        = "auto_mode"
+WORKER_HALT_CONFIRMATION = "halt_confirmation"
+WORKER_ARCHIVE_COMPACTION = "archive_compaction"
+WORKER_RESULTS_WRITER   = "results_writer"
+WORKER_AUTOTUNE         = "autotune"
+WORKER_POSITION         = "position"
+
+## Maximal time to wait for the microcontroler to confirm that a motor is stopped (s)
+HALT_CONFIRMATION_TIMEOUT_SEC = 1.0
+
+# Classes
+class SupervisedWorker():
+    """! Thread executing a target function, keeping its state for the supervisor
+    """
+    def run(self):
+        """! Executes the target function and keeps the error that ended it, if any
+        """
+        try:
+            self.target(*self.args)
+        except Exception as error:
+            self.flag_has_failed = True
+            self.last_error = repr(error)
+            print("Worker " + self.name + " failed:")
+            traceback.print_exc()
+
+    def start(self):
+        """! Starts the execution of the target function in a new thread
+        """
+        self.flag_has_failed = False
+        self.time_start = time.time()
+        self.thread = Thread(target = self.run, name = self.name, daemon = True)
+        self.thread.start()
+
+    def is_alive(self):
+        """! Indicates if the target function is still executing
+        @return True if the worker thread is alive
+        """
+        return ((self.thread != None) and self.thread.is_alive())
+
+    def has_failed(self):
+        """! Indicates if the worker ended by itself because of an error
+        @return True if the worker ended with an error without being asked to stop
+        """
+        return ((self.is_alive() == False) and (self.flag_has_failed == True) and (self.stop_event.is_set() != True))
+
+    def stop(self, timeout = WORKER_JOIN_TIMEOUT_SEC):
+        """! Asks the worker to stop and waits for its end
+        @param timeout  Maximal time to wait for the end of the worker (s) - Does not wait if 0
+        @return True if the worker is not running anymore
+        """
+        self.stop_event.set()
+
+        if ((self.thread != None) and (timeout > 0) and (self.thread.is_alive() == True)):
+            self.thread.join(timeout)
+
+        return (self.is_alive() == False)
+
+    def get_health(self):
+        """! Gives the state of the worker
+        @return A dictionnary of the worker state
+        """
+        return {
+                "name"          : self.name,
+                "alive"         : self.is_alive(),
+                "uptime"        : (time.time() - self.time_start) if self.is_alive() else 0.0,
+                "restarts"      : self.counter_restarts,
+                "last_error"    : self.last_error}
+
+    def __init__(self, name, target, args, stop_event, flag_restart_on_failure = False, can_restart = None):
+        """! Initialisation of a worker
+        @param name                     Role of the worker
+        @param target                   Function executed by the worker
+        @param args                     Arguments of the function
+        @param stop_event               Thread event that stops the function when set
+        @param flag_restart_on_failure  If true, the supervisor restarts the worker when it fails
+        @param can_restart              Function telling if the failed worker can be restarted - Always if None
+        """
+        self.name = name
+        self.target = target
+        self.args = args
+        self.stop_event = stop_event
+        self.flag_restart_on_failure = flag_restart_on_failure
+        self.can_restart = can_restart
+        self.counter_restarts = 0
+        self.flag_has_failed = False
+        self.last_error = None
+        self.time_start = 0.0
+        self.thread = None
+
+        ## Token of the priority lane opened to halt the worker - None if it was not halted
+        self.halt_token = None
 
 class ThreadManager():
-    """! Thread managing class giving specific access to the thread managing events and functions
+    """! Thread managing class giving specific access to the thread managing events and functions\n
+    Every thread is started as a named worker: starting a worker stops the previous worker of the same name first
     """
-    ## Thread event to stop the serial buffer reading
-    serial_buffer_read_thread_event = Event()
+    def start_worker(self, name, target, args, stop_event, flag_restart_on_failure = False, can_restart = None):
+        """! Starts a named worker, after stopping the previous worker of the same name
+        @param name                     Role of the worker
+        @param target                   Function executed by the worker
+        @param args                     Arguments of the function
+        @param stop_event               Thread event that stops the function when set
+        @param flag_restart_on_failure  If true, the supervisor restarts the worker when it fails
+        @param can_restart              Function telling if the failed worker can be restarted - Always if None
+        @return The started worker
+        """
+        # The starts are serialized, but the previous worker is waited for without blocking the readers of the workers state
+        with self.lock_start_workers:
+            with self.lock_workers:
+                previous_worker = self.dict_workers.pop(name, None)
+
+            if ((previous_worker != None) and (previous_worker.stop() == False)):
+                print("Worker " + name + " did not stop in time")
+            elif ((previous_worker != None) and (previous_worker.halt_token != None)):
+                # The halted worker is over: its stop does not need to block the messages of the new one
+                release_priority_lane(previous_worker.halt_token)
 
-    ## Thread event to stop the test of automatic movement in the home page
-    auto_test_mode_thread_event = Event()
+            worker = SupervisedWorker(name, target, args, stop_event, flag_restart_on_failure, can_restart)
 
-    ## Thread event to stop the automatic mode position control
-    auto_mode_thread_event = Event()
+            with self.lock_workers:
+                self.dict_workers[name] = worker
+                worker.start()
 
-    ## Thread event to pause the automatic mode position control
-    auto_mode_pause_thread_event = Event()
+        self.start_supervisor()
 
-    ## List of thread events for further management purposes
-    list_thread_events = [serial_buffer_read_thread_event, auto_mode_thread_event, auto_mode_pause_thread_event, auto_test_mode_thread_event]
+        return worker
+
+    def stop_worker(self, name, timeout = 0):
+        """! Asks a named worker to stop
+        @param name     Role of the worker
+        @param timeout  Maximal time to wait for the end of the worker (s) - Does not wait if 0
+        @return True if the worker is not running anymore
+        """
+        worker = self.dict_workers.get(name)
+
+        if (worker == None):
+            return True
+
+        return worker.stop(timeout)
+
+    def is_worker_alive(self, name):
+        """! Indicates if a named worker is running
+        @param name     Role of the worker
+        @return True if the worker is running
+        """
+        worker = self.dict_workers.get(name)
+
+        return ((worker != None) and worker.is_alive())
+
+    def is_auto_mode_running(self):
+        """! Indicates if an automatic program is running - A paused program is still running
+        @return True if the automatic mode worker is running
+        """
+        return self.is_worker_alive(WORKER_AUTO_MODE)
+
+    def get_workers_health(self):
+        """! Gives the state of every worker started since the start of the application
+        @return A list of dictionnaries of the workers state
+        """
+        with self.lock_workers:
+            return [worker.get_health() for worker in self.dict_workers.values()]
+
+    def supervise_workers(self):
+        """! Restarts the failed workers that allow it - Executed by the supervisor thread
+        """
+        while (self.supervisor_stop_event.wait(SUPERVISOR_PERIOD_SEC) != True):
+            with self.lock_workers:
+                for worker in self.dict_workers.values():
+                    if ((worker.flag_restart_on_failure == True) and (worker.has_failed() == True) and (worker.counter_restarts < WORKER_MAX_RESTARTS) and ((worker.can_restart == None) or (worker.can_restart() == True))):
+                        worker.counter_restarts = worker.counter_restarts + 1
+                        print("Restarting worker " + worker.name + " (" + str(worker.counter_restarts) + "/" + str(WORKER_MAX_RESTARTS) + ")")
+                        worker.start()
+
+    def start_supervisor(self):
+        """! Starts the supervisor thread if it is not running yet
+        """
+        if ((self.thread_supervisor == None) or (self.thread_supervisor.is_alive() == False)):
+            self.thread_supervisor = Thread(target = self.supervise_workers, name = "supervisor", daemon = True)
+            self.thread_supervisor.start()
 
     def close_all_threads(self):
         """! Closes all threads in order to correctly quit the application
         """
-        for i in range(len(self.list_thread_events)):
-            self.list_thread_events[i].set()
+        self.supervisor_stop_event.set()
+
+        with self.lock_workers:
+            list_workers = list(self.dict_workers.values())
+
+        for worker in list_workers:
+            worker.stop_event.set()
+
+        for worker in list_workers:
+            if (worker.stop(WORKER_JOIN_TIMEOUT_SEC) == False):
+                print("Worker " + worker.name + " did not stop in time")
+
+    def start_serial_read_thread(self, connected_device):
+        """! Manages the start of the continuous reading of the serial input buffer\n
+                Does nothing if the serial input buffer is already being read
+        @param connected_device     The Serial object currently connected to the application
+        """
+        if (self.is_worker_alive(WORKER_SERIAL_READ) == True):
+            print("Serial data is already being read")
+            return
+
+        self.serial_buffer_read_thread_event = Event()
+        # A reader that failed because its port was closed is not restarted
+        self.start_worker(WORKER_SERIAL_READ, read_rx_buffer, (self.serial_buffer_read_thread_event, connected_device, ), self.serial_buffer_read_thread_event, True, lambda : is_port_open(connected_device))
+
+    def stop_serial_read_thread(self, connected_device):
+        """! Manages the stop of the continuous reading of the serial input buffer and closes the connected device
+        @param connected_device     The Serial object currently connected to the application
+        """
+        self.serial_buffer_read_thread_event.set()
+
+        device = connected_device[INDEX_STM32]
+        if (device not in (None, 0)):
+            # Unblock the pending read so that the reading thread can see its stop event
+            if (hasattr(device, "cancel_read") == True):
+                device.cancel_read()
+
+            self.stop_worker(WORKER_SERIAL_READ, WORKER_JOIN_TIMEOUT_SEC)
+            device.close()
+
+    def start_archive_compaction_thread(self):
+        """! Manages the start of the background compaction of the finished runs of the archive
+        """
+        self.start_worker(WORKER_ARCHIVE_COMPACTION, compact_archives, (self.archive_compaction_thread_event, ), self.archive_compaction_thread_event, True)
+
+    def start_results_writer_thread(self):
+        """! Manages the start of the writing of the results of the runs in the results database
+        """
+        self.results_writer_thread_event = Event()
+        self.start_worker(WORKER_RESULTS_WRITER, self.results_writer.run, (self.results_writer_thread_event, ), self.results_writer_thread_event, True)
+
+    def start_autotune_thread(self, list_axes, tool, load, connected_device):
+        """! Manages the start of the tuning of the maximal speed of axes
+        @param list_axes            Names of the axes to tune
+        @param tool                 Name of the tool mounted on the bench
+        @param load                 Description of the load applied
+        @param connected_device     The Serial object currently connected to the application
+        @return True if the tuning was started - False if an automatic run or another tuning is in progress
+        """
+        if (self.is_motion_in_progress() == True):
+            print("Tuning refused: a movement is already in progress")
+            return False
+
+        self.autotune_thread_event = Event()
+        self.start_worker(WORKER_AUTOTUNE, autotune_axes, (list_axes, tool, load, connected_device, self.autotune_thread_event, ), self.autotune_thread_event)
+
+        return True
+
+    def stop_autotune_thread(self, connected_device):
+        """! Manages the stop of the tuning of the maximal speed of axes - Every tuned axis is stopped immediately
+        @param connected_device     The Serial object currently connected to the application
+        """
+        self.autotune_thread_event.set()
+
+        for axis, (motor_id, encoder_id, command_out, command_back, list_slider_info, slider_max) in DICT_AUTOTUNE_AXES.items():
+            stop_command, stop_state = DICT_MOTOR_STOP[motor_id]
+            transmit_serial_data(motor_id, stop_command, MODE_MANUAL_CONTROL, DATA_NONE, connected_device)
+
+    def get_position_controller(self, connected_device):
+        """! Gives the controller of the position of the tool - It is created the first time only and follows the encoders from then on
+        @param connected_device     The Serial object currently connected to the application
+        @return The PositionController object
+        """
+        if (self.position_controller == None):
+            self.position_controller = PositionController(connected_device)
+
+        return self.position_controller
+
+    def is_motion_in_progress(self, worker_name_replaced = None):
+        """! Tells if a worker is moving the tool
+        @param worker_name_replaced     Role of the worker that the start being checked stops first - Its movement is not counted
+        @return True if an automatic run, a test, a tuning or a positioning is in progress
+        """
+        for name in (WORKER_AUTO_MODE, WORKER_AUTO_TEST_MODE, WORKER_AUTOTUNE, WORKER_POSITION):
+            if ((name != worker_name_replaced) and (self.is_worker_alive(name) == True)):
+                return True
+
+        return False
+
+    def calibrate_position_axes(self, list_axes, connected_device, stop_event):
+        """! Measures the resolution of the encoders of axes one after the other - Executed by the positioning worker
+        @param list_axes            Names of the axes to calibrate
+        @param connected_device     The Serial object currently connected to the application
+        @param stop_event           Thread event stopping the calibration when set
+        """
+        for axis in list_axes:
+            if (stop_event.is_set() == True):
+                return
+
+            print("Axis " + axis + ": " + str(self.get_position_controller(connected_device).calibrate_axis(axis, stop_event)) + " encoder counts per mm")
+
+    def start_position_thread(self, dict_targets, connected_device):
+        """! Manages the start of the movement of the tool to an absolute position
+        @param dict_targets         Target position by axis (mm, turns for the screw)
+        @param connected_device     The Serial object currently connected to the application
+        @return True if the movement was started - False if another movement is in progress
+        """
+        if (self.is_motion_in_progress() == True):
+            print("Positioning refused: a movement is already in progress")
+            return False
+
+        self.position_thread_event = Event()
+        self.start_worker(WORKER_POSITION, self.get_position_controller(connected_device).go_to, (dict_targets, self.position_thread_event, ), self.position_thread_event)
+
+        return True
+
+    def start_position_calibration_thread(self, list_axes, connected_device):
+        """! Manages the start of the measure of the resolution of the encoders used by the positioning
+        @param list_axes            Names of the axes to calibrate
+        @param connected_device     The Serial object currently connected to the application
+        @return True if the calibration was started - False if another movement is in progress
+        """
+        if (self.is_motion_in_progress() == True):
+            print("Calibration refused: a movement is already in progress")
+            return False
+
+        self.position_thread_event = Event()
+        self.start_worker(WORKER_POSITION, self.calibrate_position_axes, (list_axes, connected_device, self.position_thread_event, ), self.position_thread_event)
+
+        return True
+
+    def stop_position_thread(self, connected_device):
+        """! Manages the stop of the positioning - Every axis is stopped immediately
+        @param connected_device     The Serial object currently connected to the application
+        """
+        self.position_thread_event.set()
+
+        for axis, (motor_id, encoder_id, command_positive, command_negative, list_slider_info) in DICT_POSITION_AXES.items():
+            stop_command, stop_state = DICT_MOTOR_STOP[motor_id]
+            transmit_serial_data(motor_id, stop_command, MODE_MANUAL_CONTROL, DATA_NONE, connected_device)
 
     def start_test_repetition_thread(self, desired_position, desired_direction, desired_turns, connected_device):
         """! Manages the start of the automatic test mode available in the home page
@@ -41,17 +379,122 @@ class ThreadManager():
         @param desired_turns        Number of turns for the adaptor motor to execute
         @param connected_device     The Serial object currently connected to the application
         """
-        self.auto_test_mode_thread_event.clear()
+        # New event for every run, so that stopping a previous run cannot be undone by this start
+        self.auto_test_mode_thread_event = Event()
+
+        id, command_a, command_b = determine_trajectory_parameters(desired_direction, AutomaticMode.list_movement_entries)
+        self.dict_motion_targets[WORKER_AUTO_TEST_MODE] = (id, connected_device)
 
-        thread_auto_mode = Thread(target = AutomaticMode.auto_mode_test, args = (desired_position, desired_direction, desired_turns, connected_device, self.auto_test_mode_thread_event, ))
-        thread_auto_mode.start()
+        # A single movement cannot calibrate the detector: the faults are only reported once a run calibrated the encoder
+        self.stall_detector = StallDetector(desired_direction)
 
-    def stop_test_repetition_thread(self):
-        """! Manages the stop of the automatic test mode available in the home page
+        self.start_worker(WORKER_AUTO_TEST_MODE, AutomaticMode.auto_mode_test, (desired_position, desired_direction, desired_turns, connected_device, self.auto_test_mode_thread_event, [self.stall_detector], ), self.auto_test_mode_thread_event)
+
+    def stop_test_repetition_thread(self, flag_wait_confirmation = False):
+        """! Manages the stop of the automatic test mode available in the home page - The motor is halted immediately
+        @param flag_wait_confirmation   If true, waits for the microcontroler to confirm the stop
+        @return The stop latency (s) if it was waited for and confirmed - None otherwise
         """
         self.auto_test_mode_thread_event.set()
 
-    def start_auto_mode_thread(self, position_to_reach, directions, number_of_turns, number_reps_to_do, label_reps_actual, connected_device):
+        return self.halt_motion(WORKER_AUTO_TEST_MODE, flag_wait_confirmation)
+
+    def create_run_observers(self, directions, path_journal, connected_device, speed_profile, program_name = None, path_program = None, flag_offload = False):
+        """! Creates the observers of an automatic run and keeps the ones giving live information about it
+        @param directions           Combination of movements of the run
+        @param path_journal         Journal of the run to resume - A new journal is created if None
+        @param connected_device     The Serial object currently connected to the application
+        @param speed_profile        Speed profile of the movements
+        @param program_name         Name of the saved program of the run - None if it was not started from a saved program
+        @param path_program         Path of the saved program of the run
+        @param flag_offload         If true, the run is executed by the microcontroler, whose movements are only known from its polled progress:
+                                    the timing statistics and the detection of the stalls, which need the movements as they are commanded, are left off
+        @return The list of RunObserver objects of the run
+        """
+        run_journal = RunJournal(path_journal)
+        run_recorder = RunRecorder()
+        list_run_observers = [run_journal, run_recorder, RepIndexWriter(run_recorder)]
+
+        if (flag_offload == True):
+            self.cycle_statistics = None
+            self.stall_detector = None
+        else:
+            self.cycle_statistics = CycleStatistics()
+            self.stall_detector = StallDetector(directions, self.auto_mode_pause_thread_event)
+            list_run_observers = list_run_observers + [self.cycle_statistics, self.stall_detector]
+
+        if (speed_profile != PROFILE_CONSTANT):
+            list_run_observers.append(MotionProfileStreamer(speed_profile, directions, connected_device))
+
+        list_run_observers.append(ResultsRecorder(self.results_writer, program_name, path_program, run_journal.path_journal, run_recorder.path_run, self.stall_detector, speed_profile))
+
+        return list_run_observers
+
+    def run_program_queue(self, list_programs, label_reps_actual, connected_device, stop_event, pause_event, speed_profile):
+        """! Executes programs one after the other, each as a new automatic run, without waiting for the operator - Executed by the automatic mode worker
+        @param list_programs        Dictionnaries of the program parameters, with the slider value of the "speed" and the "name" of every program
+        @param label_reps_actual    Label object to update the number of repetitions executed
+        @param connected_device     The Serial object currently connected to the application
+        @param stop_event           Thread event stopping the queue when set
+        @param pause_event          Thread event pausing the current program
+        @param speed_profile        Speed profile of the movements
+        """
+        for index, program in enumerate(list_programs):
+            if (stop_event.is_set() == True):
+                break
+
+            id, command_a, command_b = determine_trajectory_parameters(program["movement"], AutomaticMode.list_movement_entries)
+            self.dict_motion_targets[WORKER_AUTO_MODE] = (id, connected_device)
+
+            # The speed of the program is set as if it was chosen with the slider, before the ramps are planned
+            list_slider_info, slider_max = DICT_MOTOR_SLIDER[id]
+            list_slider_info[SLIDER_PREV_VALUE_INDEX] = program["speed"]
+            transmit_serial_data(id, COMMAND_MOTOR_CHANGE_SPEED, MODE_CHANGE_PARAMS, program["speed"], connected_device)
+
+            self.auto_mode_program = create_program_parameters(program["amplitude"], program["movement"], program["turns"], program["reps"])
+
+            end_of_run_waiter = EndOfRunWaiter(id)
+            list_run_observers = self.create_run_observers(program["movement"], None, connected_device, speed_profile, program["name"]) + [end_of_run_waiter]
+            self.auto_mode_parameter_changes = ParameterChanges()
+
+            print("Program " + str(index + 1) + "/" + str(len(list_programs)) + ": " + program["name"])
+
+            AutomaticMode.auto_mode(program["amplitude"], program["movement"], program["turns"], program["reps"], label_reps_actual, connected_device, stop_event, pause_event, list_run_observers, 0, self.auto_mode_parameter_changes)
+
+            # The run ends when the last movement is sent: the next program starts as soon as the tool is back
+            if (stop_event.is_set() != True):
+                duration_movement = estimate_program_duration_sec(program["amplitude"], program["turns"], 0.5, program["speed"], (id == ID_MOTOR_ADAPT))
+                end_of_run_waiter.wait(duration_movement + SWEEP_END_TIMEOUT_MARGIN_SEC)
+
+    def start_program_queue_thread(self, list_programs, label_reps_actual, connected_device, speed_profile = PROFILE_CONSTANT):
+        """! Manages the start of a queue of programs executed back to back by the automatic mode worker - It is paused and stopped as an automatic run
+        @param list_programs        Dictionnaries of the program parameters, with the slider value of the "speed" and the "name" of every program
+        @param label_reps_actual    Label object to update the number of repetitions executed
+        @param connected_device     The Serial object currently connected to the application
+        @param speed_profile        Speed profile of the movements
+        @return True if the queue was started - False if another movement is in progress or if the queue is empty
+        """
+        if (self.is_motion_in_progress(WORKER_AUTO_MODE) == True):
+            print("Queue refused: a movement is already in progress")
+            return False
+
+        self.stop_auto_mode_thread(True)
+        self.stop_worker(WORKER_AUTO_MODE, WORKER_JOIN_TIMEOUT_SEC)
+
+        if (len(list_programs) == 0):
+            return False
+
+        self.auto_mode_thread_event = Event()
+        self.auto_mode_pause_thread_event = Event()
+
+        id, command_a, command_b = determine_trajectory_parameters(list_programs[0]["movement"], AutomaticMode.list_movement_entries)
+        self.dict_motion_targets[WORKER_AUTO_MODE] = (id, connected_device)
+
+        self.start_worker(WORKER_AUTO_MODE, self.run_program_queue, (list_programs, label_reps_actual, connected_device, self.auto_mode_thread_event, self.auto_mode_pause_thread_event, speed_profile, ), self.auto_mode_thread_event)
+
+        return True
+
+    def start_auto_mode_thread(self, position_to_reach, directions, number_of_turns, number_reps_to_do, label_reps_actual, connected_device, flag_resume = False, speed_profile = PROFILE_CONSTANT, flag_offload = False, program_name = None, path_program = None):
         """! Manages the start of the automatic mode available in the programs page
         @param position_to_reach    Amplitude of movement in millimeters
         @param directions           Combination of movements to execute in repetition
@@ -59,25 +502,271 @@ class ThreadManager():
         @param number_reps_to_do    Number of repetitions to execute before the test stops
         @param label_reps_actual    Label object to verify and update the repetitions executed up to a certain point
         @param connected_device     The Serial object currently connected to the application
+        @param flag_resume          If true, restarts from the last confirmed repetition of the previous unfinished run of the same program
+        @param speed_profile        Speed profile of the movements - The speed chosen with the slider is kept constant with PROFILE_CONSTANT
+        @param flag_offload         If true, the program is uploaded to the microcontroler which executes the repetitions by itself - Only with PROFILE_CONSTANT
+        @param program_name         Name of the saved program, recorded with the results of the run - None if it was not started from a saved program
+        @param path_program         Path of the saved program
+        @return True if the run was started - False if a test, a tuning or a positioning is in progress
         """
-        self.auto_mode_thread_event.clear()
-        self.auto_mode_pause_thread_event.clear()
+        if (self.is_motion_in_progress(WORKER_AUTO_MODE) == True):
+            print("Run refused: a movement is already in progress")
+            return False
+
+        # Stop the previous run before its journal is searched, then use new events so that the previous run cannot be restarted by this one
+        self.stop_auto_mode_thread(True)
+        self.stop_worker(WORKER_AUTO_MODE, WORKER_JOIN_TIMEOUT_SEC)
+
+        self.auto_mode_thread_event = Event()
+        self.auto_mode_pause_thread_event = Event()
+
+        program = create_program_parameters(position_to_reach, directions, number_of_turns, number_reps_to_do)
+        path_journal, start_repetition = find_resumable_run(program)
+
+        if ((flag_resume == False) and (path_journal != None)):
+            abandon_run(path_journal)
+            path_journal = None
+            start_repetition = 0
+
+        id, command_a, command_b = determine_trajectory_parameters(directions, AutomaticMode.list_movement_entries)
+        self.dict_motion_targets[WORKER_AUTO_MODE] = (id, connected_device)
+
+        self.auto_mode_program = program
+        self.auto_mode_parameter_changes = ParameterChanges()
+
+        # The ramps are streamed during every movement, which the microcontroler cannot do by itself
+        flag_offload = ((flag_offload == True) and (speed_profile == PROFILE_CONSTANT))
+        list_run_observers = self.create_run_observers(directions, path_journal, connected_device, speed_profile, program_name, path_program, flag_offload)
+
+        if (flag_offload == True):
+            # The microcontroler executes the whole program as it was uploaded
+            self.auto_mode_parameter_changes = None
+
+            list_slider_info, slider_max = DICT_MOTOR_SLIDER[id]
+            self.start_worker(WORKER_AUTO_MODE, AutomaticMode.auto_mode_offloaded, (position_to_reach, directions, number_of_turns, number_reps_to_do, label_reps_actual, connected_device, self.auto_mode_thread_event, self.auto_mode_pause_thread_event, round(list_slider_info[SLIDER_PREV_VALUE_INDEX]), list_run_observers, start_repetition, ), self.auto_mode_thread_event)
+        else:
+            self.start_worker(WORKER_AUTO_MODE, AutomaticMode.auto_mode, (position_to_reach, directions, number_of_turns, number_reps_to_do, label_reps_actual, connected_device, self.auto_mode_thread_event, self.auto_mode_pause_thread_event, list_run_observers, start_repetition, self.auto_mode_parameter_changes, ), self.auto_mode_thread_event)
+
+        return True
+
+    def change_auto_mode_parameters(self, dict_parameters):
+        """! Requests changes of the parameters of the running automatic program - They are applied at its next checkpoint without resetting its repetitions
+        @param dict_parameters  Dictionnary of the new values by parameter (PARAMETER_SPEED, PARAMETER_REPS or PARAMETER_AMPLITUDE)
+        @return True if the changes were queued - False if no program whose parameters can change is running
+        """
+        if ((self.is_worker_alive(WORKER_AUTO_MODE) == False) or (self.auto_mode_parameter_changes == None)):
+            return False
+
+        dict_parameters = dict(dict_parameters)
+
+        if (PARAMETER_SPEED in dict_parameters):
+            motor_id, connected_device = self.dict_motion_targets[WORKER_AUTO_MODE]
+            list_slider_info, slider_max = DICT_MOTOR_SLIDER[motor_id]
+
+            dict_parameters[PARAMETER_SPEED] = min(max(round(dict_parameters[PARAMETER_SPEED]), 0), slider_max)
+
+            # The speed chosen for the motor is the one restored after the run
+            list_slider_info[SLIDER_PREV_VALUE_INDEX] = dict_parameters[PARAMETER_SPEED]
+
+        self.auto_mode_parameter_changes.request(dict_parameters)
+
+        return True
+
+    def get_auto_mode_program(self):
+        """! Gives the parameters of the running automatic program whose parameters can change
+        @return The dictionnary of the program parameters, as it was started - None if no such program is running
+        """
+        if ((self.is_worker_alive(WORKER_AUTO_MODE) == False) or (self.auto_mode_parameter_changes == None)):
+            return None
+
+        return self.auto_mode_program
+
+    def start_taught_program_thread(self, name, number_reps_to_do, label_reps_actual, connected_device):
+        """! Manages the start of the replay of a taught program with the automatic mode worker - It is paused and stopped as an automatic run
+        @param name                 Name of the taught program
+        @param number_reps_to_do    Number of times the path is executed
+        @param label_reps_actual    Label object to update the number of repetitions executed
+        @param connected_device     The Serial object currently connected to the application
+        @return True if the replay was started - False if another movement is in progress
+        """
+        if (self.is_motion_in_progress() == True):
+            print("Replay refused: a movement is already in progress")
+            return False
+
+        list_steps = load_taught_program(name)["steps"]
+        if (len(list_steps) == 0):
+            return False
 
-        thread_auto_mode = Thread(target = AutomaticMode.auto_mode, args = (position_to_reach, directions, number_of_turns, number_reps_to_do, label_reps_actual, connected_device, self.auto_mode_thread_event, self.auto_mode_pause_thread_event,  ))
-        thread_auto_mode.start()
+        self.auto_mode_thread_event = Event()
+        self.auto_mode_pause_thread_event = Event()
+        self.auto_mode_parameter_changes = None
 
-    def stop_auto_mode_thread(self):
-        """! Manages the stop of the automatic test mode available in the home page
+        # The motor halted immediately on stop is the one of the first movement, the others end their movement
+        self.dict_motion_targets[WORKER_AUTO_MODE] = (list_steps[0]["motor_id"], connected_device)
+
+        self.start_worker(WORKER_AUTO_MODE, replay_taught_program, (name, number_reps_to_do, label_reps_actual, connected_device, self.auto_mode_thread_event, self.auto_mode_pause_thread_event, ), self.auto_mode_thread_event)
+
+        return True
+
+    def get_resumable_repetitions(self, position_to_reach, directions, number_of_turns, number_reps_to_do):
+        """! Gives the number of repetitions that a previous unfinished run of a program already executed
+        @param position_to_reach    Amplitude of movement in millimeters
+        @param directions           Combination of movements to execute in repetition
+        @param number_of_turns      Number of turns for the adaptor motor to execute
+        @param number_reps_to_do    Number of repetitions to execute before the test stops
+        @return The number of confirmed repetitions of the unfinished run - 0 if there is none
+        """
+        program = create_program_parameters(position_to_reach, directions, number_of_turns, number_reps_to_do)
+        path_journal, start_repetition = find_resumable_run(program)
+
+        return start_repetition
+
+    def stop_auto_mode_thread(self, flag_wait_confirmation = False):
+        """! Manages the stop of the automatic mode available in the programs page - The motor is halted immediately
+        @param flag_wait_confirmation   If true, waits for the microcontroler to confirm the stop
+        @return The stop latency (s) if it was waited for and confirmed - None otherwise
         """
         self.auto_mode_thread_event.set()
         self.auto_mode_pause_thread_event.set()
 
+        return self.halt_motion(WORKER_AUTO_MODE, flag_wait_confirmation)
+
+    def halt_motion(self, worker_name, flag_wait_confirmation = False):
+        """! Sends the stop command of the motor moved by a worker ahead of any other message\n
+                The confirmation of the stop is waited for in a separate worker unless asked otherwise
+        @param worker_name              Role of the worker moving the motor
+        @param flag_wait_confirmation   If true, waits for the microcontroler to confirm the stop
+        @return The stop latency (s) if it was waited for and confirmed - None otherwise
+        """
+        # Only the worker running now is halted: a worker started later under the same name is not affected by this stop
+        worker = self.dict_workers.get(worker_name)
+        if ((worker == None) or (worker.is_alive() != True)):
+            return None
+
+        motor_id, connected_device = self.dict_motion_targets[worker_name]
+        if (motor_id not in DICT_MOTOR_STOP):
+            return None
+
+        stop_command, stop_state = DICT_MOTOR_STOP[motor_id]
+
+        # The waiter follows the frames before the stop is sent so that a fast answer cannot be missed
+        # An end of trajectory may have been sent before the stop: only the stopped state of the halted motor confirms it - Encoders send their count in place of the state
+        waiter = MotorStateWaiter([stop_state], motor_id)
+        worker.halt_token = open_priority_lane()
+        time_sent = transmit_priority_serial_data(
+                                                    motor_id,
+                                                    stop_command,
+                                                    MODE_MANUAL_CONTROL,
+                                                    DATA_NONE,
+                                                    connected_device)
+
+        if (flag_wait_confirmation == True):
+            return self.confirm_halt(waiter, time_sent, worker)
+
+        self.start_worker(WORKER_HALT_CONFIRMATION, self.confirm_halt, (waiter, time_sent, worker, ), Event())
+
+        return None
+
+    def confirm_halt(self, waiter, time_sent, worker):
+        """! Lets the other messages be sent again once the halted worker is over, then waits for the microcontroler to confirm the stop and measures its latency
+        @param waiter       MotorStateWaiter created before the stop command was sent
+        @param time_sent    Time (s since epoch) at which the stop command was sent - None if it could not be sent
+        @param worker       SupervisedWorker that moved the motor
+        @return The stop latency (s) - None if the stop was not confirmed
+        """
+        # The worker must be over before its messages are allowed again
+        if (worker.stop(WORKER_JOIN_TIMEOUT_SEC) == False):
+            print("Worker " + worker.name + " did not stop in time")
+        release_priority_lane(worker.halt_token)
+
+        reception_time = waiter.wait(HALT_CONFIRMATION_TIMEOUT_SEC)
+
+        if ((time_sent == None) or (reception_time == None)):
+            latency = None
+            metrics.increment_counter("motion.stops_not_confirmed")
+            print("Stop not confirmed by the microcontroler")
+        else:
+            latency = max(0.0, reception_time - time_sent)
+            metrics.record_duration("motion.stop_latency", latency)
+            print(f"Stop confirmed in {latency * 1000:.1f} ms")
+
+        self.last_stop_latency = latency
+
+        return latency
+
     def pause_auto_mode_thread(self):
-        """! Manages the pause of the automatic thread of the programs page for official automatic tests
+        """! Manages the pause of the automatic thread of the programs page for official automatic tests\n
+                The current stroke is completed and no other command is sent until the run is resumed
         """
         self.auto_mode_pause_thread_event.set()
 
     def resume_auto_mode_thread(self):
         """! Manages the resume of the automatic thread of the programs page for official automatic tests
         """
-        self.auto_mode_pause_thread_event.clear()
\ No newline at end of file
+        self.auto_mode_pause_thread_event.clear()
+
+    def __init__(self):
+        """! Initialisation of the thread manager
+        """
+        ## Thread event to stop the serial buffer reading
+        self.serial_buffer_read_thread_event = Event()
+
+        ## Thread event to stop the test of automatic movement in the home page
+        self.auto_test_mode_thread_event = Event()
+
+        ## Thread event to stop the automatic mode position control
+        self.auto_mode_thread_event = Event()
+
+        ## Thread event to pause the automatic mode position control
+        self.auto_mode_pause_thread_event = Event()
+
+        ## Thread event to stop the compaction of the archive
+        self.archive_compaction_thread_event = Event()
+
+        ## Thread event to stop the tuning of the maximal speeds
+        self.autotune_thread_event = Event()
+
+        ## Thread event to stop the positioning of the tool
+        self.position_thread_event = Event()
+
+        ## Thread event to stop the writing of the results database
+        self.results_writer_thread_event = Event()
+
+        ## Writer of the results of the runs, shared by their recorders
+        self.results_writer = ResultsWriter()
+
+        ## Controller of the position of the tool, created when first needed
+        self.position_controller = None
+
+        ## Timing statistics of the last automatic run started
+        self.cycle_statistics = None
+
+        ## Parameter changes of the running automatic program - None if its parameters cannot change
+        self.auto_mode_parameter_changes = None
+
+        ## Parameters of the last automatic program started
+        self.auto_mode_program = None
+
+        ## Detector of the steps lost by the last automatic run or test started
+        self.stall_detector = None
+
+        ## Motor moved and device used by the motion workers, by name
+        self.dict_motion_targets = {}
+
+        ## Latency of the last stop confirmed by the microcontroler (s)
+        self.last_stop_latency = None
+
+        ## Workers started by the thread manager, by name
+        self.dict_workers = {}
+
+        ## Lock protecting the dictionnary of workers
+        self.lock_workers = Lock()
+
+        ## Lock serializing the starts of workers, held while the previous worker of the same name is waited for
+        self.lock_start_workers = Lock()
+
+        ## Thread event to stop the supervisor
+        self.supervisor_stop_event = Event()
+
+        ## Thread restarting the failed workers
+        self.thread_supervisor = None
\ No newline at end of file
@@ -0,0 +1,129 @@
+##
+# @file
+# watchdog.py
+#
+# @brief
+# Watchdog of the Tk main loop. \n
+# Measures the lag of a periodic heartbeat and samples the stack of the main thread while the main loop is blocked.
+
+# Imports
+import os
+import sys
+import time
+import traceback
+from threading import Event, Thread, main_thread
+
+import metrics
+
+# Constants
+## Period of the heartbeat scheduled in the main loop (ms)
+WATCHDOG_HEARTBEAT_PERIOD_MS = 100
+
+## Lag from which the main loop is considered blocked (s)
+WATCHDOG_LAG_THRESHOLD_SEC = 0.2
+
+## Period of the verification of the heartbeat by the watchdog thread (s)
+WATCHDOG_SAMPLE_PERIOD_SEC = 0.05
+
+## Report in which the blockings of the main loop are written
+path_watchdog_report = 'logs/mainloop_watchdog.txt'
+
+# Classes
+class MainloopWatchdog():
+    """! Detects the blockings of the main loop and reports the code that was executing in the main thread during the blocking
+    """
+    def heartbeat(self):
+        """! Measures the lag of the main loop and schedules the next heartbeat - Executed by the main loop
+        """
+        time_now = time.perf_counter()
+        lag = max(0.0, time_now - self.time_heartbeat_expected)
+
+        metrics.record_duration("gui.mainloop_lag", lag)
+        self.max_lag = max(self.max_lag, lag)
+
+        self.time_heartbeat_expected = time_now + (WATCHDOG_HEARTBEAT_PERIOD_MS / 1000)
+
+        if (self.stop_event.is_set() != True):
+            self.root.after(WATCHDOG_HEARTBEAT_PERIOD_MS, self.heartbeat)
+
+    def sample_main_thread(self):
+        """! Adds the current stack of the main thread to the samples of the blocking
+        """
+        frame = sys._current_frames().get(self.main_thread_id)
+
+        if (frame != None):
+            stack = ''.join(traceback.format_stack(frame))
+            self.dict_stack_samples[stack] = self.dict_stack_samples.get(stack, 0) + 1
+
+    def write_report(self, time_blocking_start):
+        """! Writes the samples of the last blocking in the report
+        @param time_blocking_start  Time (s since epoch) at which the blocking was detected
+        """
+        counter_samples = sum(self.dict_stack_samples.values())
+
+        folder = os.path.dirname(self.path_report)
+        if (folder != ''):
+            os.makedirs(folder, exist_ok = True)
+
+        with open(self.path_report, "a") as f:
+            f.write("=== " + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(time_blocking_start)) +
+                    f" Main loop blocked for {self.max_lag * 1000:.0f} ms ({counter_samples} samples)\n")
+
+            # Most frequent stacks first : they show where the main thread spent the blocking
+            for stack, counter in sorted(self.dict_stack_samples.items(), key = lambda item : item[1], reverse = True):
+                f.write("[" + str(counter) + " samples]\n")
+                f.write(stack)
+
+            f.write('\n')
+
+        print(f"Main loop blocked for {self.max_lag * 1000:.0f} ms, see " + self.path_report)
+
+    def monitor(self):
+        """! Verifies periodically that the heartbeat is on time - Executed by the watchdog thread
+        """
+        time_blocking_start = None
+
+        while (self.stop_event.wait(WATCHDOG_SAMPLE_PERIOD_SEC) != True):
+            lateness = time.perf_counter() - self.time_heartbeat_expected
+
+            if (lateness > WATCHDOG_LAG_THRESHOLD_SEC):
+                if (time_blocking_start == None):
+                    time_blocking_start = time.time()
+                    self.max_lag = 0.0
+                    self.dict_stack_samples = {}
+
+                self.sample_main_thread()
+
+            elif (time_blocking_start != None):
+                # Heartbeat came back: the blocking is over
+                metrics.increment_counter("gui.mainloop_blockings")
+                self.write_report(time_blocking_start)
+                time_blocking_start = None
+
+    def start(self):
+        """! Starts the heartbeat and the watchdog thread - Must be called from the main thread
+        """
+        self.main_thread_id = main_thread().ident
+        self.time_heartbeat_expected = time.perf_counter() + (WATCHDOG_HEARTBEAT_PERIOD_MS / 1000)
+        self.root.after(WATCHDOG_HEARTBEAT_PERIOD_MS, self.heartbeat)
+
+        thread_watchdog = Thread(target = self.monitor, daemon = True)
+        thread_watchdog.start()
+
+    def stop(self):
+        """! Stops the heartbeat and the watchdog thread
+        """
+        self.stop_event.set()
+
+    def __init__(self, root, path_report = path_watchdog_report):
+        """! Initialisation of the watchdog
+        @param root         Tk window whose main loop is watched
+        @param path_report  File in which the blockings are reported
+        """
+        self.root = root
+        self.path_report = path_report
+        self.stop_event = Event()
+        self.main_thread_id = None
+        self.time_heartbeat_expected = 0.0
+        self.max_lag = 0.0
+        self.dict_stack_samples = {}
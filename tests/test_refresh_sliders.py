@@ -0,0 +1,82 @@
+##
+# @file
+# test_refresh_sliders.py
+#
+# @brief
+# Regression test of the pooled mode panels of the home page. \n
+# The panels are generated once, then only hidden, shown and refreshed: the widgets and the memory allocated must stay flat over thousands of mode switches.
+
+# Imports
+import os
+import sys
+import tracemalloc
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+customtkinter = pytest.importorskip("customtkinter")
+
+# The common module must be imported before the serial functions
+import common
+import thread_manager
+import app
+import home_page
+
+# Constants
+## Number of mode switches executed before measuring, so that every panel is generated and the caches of tkinter are filled
+SWITCH_WARMUP_CYCLES = 50
+
+## Number of mode switches measured
+SWITCH_MEASURED_CYCLES = 3000
+
+## Maximal growth of the allocated memory over the measured switches (bytes)
+SWITCH_MAX_GROWTH_BYTES = 256 * 1024
+
+# Functions
+@pytest.fixture
+def window():
+    """! Gives a hidden window of the application - The test is skipped without a display
+    """
+    try:
+        root = customtkinter.CTk()
+    except Exception as error:
+        pytest.skip("No display available: " + str(error))
+
+    root.withdraw()
+    yield root
+    root.destroy()
+
+def test_mode_switches_keep_widgets_and_allocations_flat(window):
+    """! Switches many times between the manual and the automatic panels of the home page with its own callbacks, and checks that no widget nor memory is retained by the switches
+    """
+    thread_services = thread_manager.ThreadManager()
+    frame = home_page.HomePageFrame(window, thread_services, None)
+
+    def cycle():
+        frame.button_manual_mode_click(thread_services, None)
+        window.update_idletasks()
+        frame.button_back_click(common.MODE_MANUAL)
+
+        frame.button_auto_mode_click(thread_services, None)
+        window.update_idletasks()
+        frame.button_back_click(common.MODE_AUTOMATIC_TEST)
+
+    for i in range(SWITCH_WARMUP_CYCLES):
+        cycle()
+
+    counter_children_start = len(frame.winfo_children())
+
+    tracemalloc.start()
+    try:
+        size_start = tracemalloc.get_traced_memory()[0]
+
+        for i in range(SWITCH_MEASURED_CYCLES):
+            cycle()
+
+        size_end = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    assert len(frame.winfo_children()) == counter_children_start
+    assert (size_end - size_start) < SWITCH_MAX_GROWTH_BYTES